@@ -0,0 +1,1164 @@
+import contextlib
+import os
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+
+import unicodedata
+
+from nucleo import (config, PPLAParser, PPLAtoBPLBConverter, EmuladorBPLB, EnvioFormularios, ImpressoraBPLB,
+                    ImpressoraTCPFalsa, FilaImpressao, TrabalhoImpressao, ESTRATEGIAS, RitmoImpressora,
+                    agrupar_series, gerar_bplb_etiquetas, processar_e_imprimir)
+from nucleo.transporte import Transporte, TRANSPORTES, fechar_conexoes_ociosas
+from nucleo.paralelo import contar_para_paralelo
+from nucleo.ppla_lexer import tokenizar_etiqueta, extrair_textos_e_codigos, TOKEN_TEXTO, TOKEN_CODIGO
+from nucleo.classificador_campos import ClassificadorCampos, PALAVRAS_DESCRICAO_PADRAO
+from nucleo.leitor_spool import LeitorSpool
+from nucleo.etiqueta import Etiqueta
+from nucleo.cabecalhos_ppla import decodificar_cabecalhos, comandos_texto_bplb
+from nucleo.layout_etiqueta import CacheLayouts
+from nucleo.cache_bplb import CacheBPLB
+from nucleo.diagnostico import diag, DEBUG, INFO
+from nucleo.normalizacao import normalizar, somente_digitos
+from corpus_ppla import gerar_corpus, escrever_corpus
+
+# ====================== MICROBENCHMARKS ======================
+# Uso: python benchmark_ppla.py [nome ...]
+# Sem argumentos roda todos os benchmarks registrados.
+
+ETIQUETA_EXEMPLO = """<xpml><page quantity='0' pitch='75.1 mm'></xpml>
+M0739
+O0220
+V0
+f324
+D
+<xpml></page></xpml><xpml><page quantity='1' pitch='75.1 mm'></xpml>
+L
+D11
+A2
+1911A1202510200CONSERTO
+1911A1202510044OP:
+1911A1202250044Ref:
+1911A1202250089121302105
+1911A140248008921301507
+1911A1201810044CAMISETA CASUAL MASC MC
+1911A1201390044Faccao:
+1911A1401360118LP ACABAMENTOS E TRANSPORTES
+1911A1201130044Cidade:
+1911A1201130118GUABIRUBA
+1911A1200920044Regiao:
+1911A1200920118SC - MEIO VALE
+1e8405000330142C2130150727412
+1911A12001401832130150727412
+1911A14024203382/2
+Q0001
+E
+<xpml></page></xpml><xpml><end/></xpml>"""
+
+# Segundo exemplo dos scripts: sem CONSERTO e sem região
+ETIQUETA_SEM_CONSERTO = """<xpml><page quantity='0' pitch='75.1 mm'></xpml>
+M0739
+O0220
+V0
+f324
+D
+<xpml></page></xpml><xpml><page quantity='1' pitch='75.1 mm'></xpml>
+L
+D11
+A2
+1911A1202510044OP:
+1911A1202250044Ref:
+1911A1202250089121301027
+1911A140248008921303219
+1911A1201810044CAMISA CASUAL MASC ML
+1911A1201390044Faccao:
+1911A1401360118MARCELO LONDRINA RIGRETTE CONFECCOES LTDA ME
+1911A1201130044Cidade:
+1911A1201130118LONDRINA
+1e8405000330142C2130321901
+1911A12001401832130321901
+1911A14024203381/1
+Q0001
+E
+<xpml></page></xpml><xpml><end/></xpml>"""
+
+
+def _cronometrar(nome, funcao, repeticoes=5, numero=2000):
+    """Executa a função e imprime o melhor tempo por chamada em microssegundos"""
+    melhor = min(timeit.repeat(funcao, repeat=repeticoes, number=numero)) / numero
+    print(f"  {nome:<40} {melhor * 1e6:9.2f} µs")
+    return melhor
+
+
+# ---------------------- Lexer PPLA ----------------------
+
+def _extrair_antigo(etiqueta_raw):
+    """Caminho antigo: dois re.sub, split e filtro por linha"""
+    content = re.sub(r'<[^>]*>', '', etiqueta_raw)
+    content = re.sub(r'[\x00-\x09\x0B-\x1F\x7F]', ' ', content)
+    lines = [line.strip() for line in content.split('\n') if line.strip()]
+    textos, codigos = [], []
+    for line in lines:
+        if line.startswith('19') and len(line) >= 15:
+            texto = line[15:].strip()
+            if texto:
+                textos.append(texto)
+        elif line.startswith('1e') and len(line) > 2:
+            codigo = line[2:].strip()
+            if codigo:
+                codigos.append(codigo)
+    return textos, codigos
+
+
+def _extrair_tokens(etiqueta_raw):
+    """Lexer completo (tokens tipados), filtrando textos e códigos"""
+    textos, codigos = [], []
+    for tipo, valor, _ in tokenizar_etiqueta(etiqueta_raw):
+        if tipo == TOKEN_TEXTO:
+            textos.append(valor)
+        elif tipo == TOKEN_CODIGO:
+            codigos.append(valor)
+    return textos, codigos
+
+
+def bench_lexer():
+    print("\n⏱️  Lexer PPLA (por etiqueta)")
+    esperado = _extrair_antigo(ETIQUETA_EXEMPLO)
+    assert _extrair_tokens(ETIQUETA_EXEMPLO) == esperado
+    assert extrair_textos_e_codigos(ETIQUETA_EXEMPLO) == esperado
+    antigo = _cronometrar("re.sub + split (antigo)", lambda: _extrair_antigo(ETIQUETA_EXEMPLO))
+    _cronometrar("tokenizar_etiqueta (todos os tokens)", lambda: _extrair_tokens(ETIQUETA_EXEMPLO))
+    novo = _cronometrar("extrair_textos_e_codigos", lambda: extrair_textos_e_codigos(ETIQUETA_EXEMPLO))
+    print(f"  Ganho do caminho rápido: {antigo / novo:.2f}x")
+
+
+# ---------------------- Classificador de campos ----------------------
+
+def _classificar_antigo(textos, palavras_descricao):
+    """Caminho antigo: re.match por texto, listas literais e any() no vocabulário"""
+    rotulos = ['OP:', 'Ref:', 'Faccao:', 'Facção:', 'Cidade:', 'Regiao:', 'Região:', 'CONSERTO']
+    resultado = []
+    for texto in textos:
+        if texto in rotulos:
+            resultado.append('rotulo')
+        elif re.match(r'^\d+/\d+$', texto):
+            resultado.append('fracao')
+        elif re.match(r'^\d{8,}$', texto):
+            resultado.append('codigo')
+        else:
+            texto_upper = texto.upper()
+            resultado.append(any(palavra in texto_upper for palavra in palavras_descricao))
+    return resultado
+
+
+def _classificar_novo(classificador, textos):
+    resultado = []
+    for texto, classe in zip(textos, classificador.classificar_todos(textos)):
+        if classe is None:
+            resultado.append(classificador.parece_descricao(texto))
+        else:
+            resultado.append(classe)
+    return resultado
+
+
+def bench_classificador():
+    print("\n⏱️  Classificador de campos (por etiqueta)")
+    textos, _ = extrair_textos_e_codigos(ETIQUETA_EXEMPLO)
+    # Vocabulário padrão e um vocabulário grande, como o carregado do arquivo de configuração
+    vocabulario_grande = PALAVRAS_DESCRICAO_PADRAO + tuple(f"PRODUTO{n:04d}" for n in range(500))
+    for nome, vocabulario in (("17 palavras", PALAVRAS_DESCRICAO_PADRAO),
+                              (f"{len(vocabulario_grande)} palavras", vocabulario_grande)):
+        classificador = ClassificadorCampos(vocabulario)
+        esperado = [c if isinstance(c, bool) else None for c in _classificar_antigo(textos, vocabulario)]
+        assert [c if isinstance(c, bool) else None for c in _classificar_novo(classificador, textos)] == esperado
+        antigo = _cronometrar(f"if/elif + any() ({nome})", lambda: _classificar_antigo(textos, vocabulario))
+        novo = _cronometrar(f"ClassificadorCampos ({nome})", lambda: _classificar_novo(classificador, textos))
+        print(f"  Ganho: {antigo / novo:.2f}x")
+
+
+# ---------------------- Leitura do arquivo de spool ----------------------
+
+def _ler_antigo(caminho):
+    """Caminho antigo: decodifica o arquivo inteiro e separa as etiquetas por regex"""
+    with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    padrao = r"<xpml><page quantity='0'[^>]*>.*?Q0001\s*E\s*<xpml></page></xpml><xpml><end/></xpml>"
+    return [extrair_textos_e_codigos(raw) for raw in re.findall(padrao, content, re.DOTALL)]
+
+
+def _ler_mmap(caminho):
+    with LeitorSpool(caminho) as leitor:
+        return [extrair_textos_e_codigos(raw) for raw in leitor.iterar_etiquetas()]
+
+
+def _pico_memoria(funcao):
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico
+
+
+def bench_leitor(quantidade=5000):
+    print(f"\n⏱️  Leitura do arquivo de spool ({quantidade} etiquetas)")
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+        for _ in range(quantidade):
+            f.write(ETIQUETA_EXEMPLO + "\n")
+        caminho = f.name
+    try:
+        assert _ler_antigo(caminho) == _ler_mmap(caminho)
+        tamanho = os.path.getsize(caminho)
+        antigo = _cronometrar("read() + re.findall (antigo)", lambda: _ler_antigo(caminho), numero=3)
+        novo = _cronometrar("LeitorSpool (mmap + bytes.find)", lambda: _ler_mmap(caminho), numero=3)
+        print(f"  Ganho: {antigo / novo:.2f}x")
+        print(f"  Arquivo: {tamanho / 1024:.0f} KiB")
+        print(f"  Pico de memória antigo: {_pico_memoria(lambda: _ler_antigo(caminho)) / 1024:.0f} KiB")
+        print(f"  Pico de memória mmap:   {_pico_memoria(lambda: _ler_mmap(caminho)) / 1024:.0f} KiB")
+    finally:
+        os.unlink(caminho)
+
+
+# ---------------------- Memória das etiquetas ----------------------
+
+def _campos_lidos(etiqueta_raw):
+    """Campos como o parser os encontra: strings novas a cada etiqueta lida"""
+    textos, codigos = extrair_textos_e_codigos(etiqueta_raw)
+    return dict(tipo=textos[0], op=textos[4], referencia=textos[3], descricao=textos[5],
+                faccao=textos[7], cidade=textos[9], regiao=textos[11], fracao=textos[13],
+                codigo_barras=textos[12], codigos=codigos)
+
+
+def _etiqueta_dict(numero, campos):
+    """Formato antigo: um dict de 12 chaves por etiqueta"""
+    data = {'numero': numero, 'tipo': '', 'op': '', 'referencia': '', 'descricao': '',
+            'faccao': '', 'cidade': '', 'regiao': '', 'fracao': '', 'codigo_barras': '',
+            'codigos': [], 'textos': []}
+    data.update(campos)
+    return data
+
+
+def _medir_etiquetas(fabrica, quantidade):
+    tracemalloc.start()
+    etiquetas = [fabrica(i + 1, _campos_lidos(ETIQUETA_EXEMPLO)) for i in range(quantidade)]
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return etiquetas, atual
+
+
+def bench_memoria(quantidade=100_000):
+    print(f"\n💾 Memória de {quantidade} etiquetas em parser.etiquetas")
+    dicts, memoria_dict = _medir_etiquetas(_etiqueta_dict, quantidade)
+    print(f"  {'dict por etiqueta (antigo)':<40} {memoria_dict / 2**20:9.1f} MiB")
+    del dicts
+    registros, memoria_registro = _medir_etiquetas(lambda n, campos: Etiqueta(n, **campos), quantidade)
+    print(f"  {'Etiqueta (__slots__ + intern)':<40} {memoria_registro / 2**20:9.1f} MiB")
+    print(f"  Redução: {memoria_dict / memoria_registro:.2f}x")
+    
+    dicionario = _etiqueta_dict(1, _campos_lidos(ETIQUETA_EXEMPLO))
+    registro = registros[0]
+    _cronometrar("leitura de 6 campos (dict.get)",
+                 lambda: (dicionario.get('tipo'), dicionario.get('op'), dicionario.get('referencia'),
+                          dicionario.get('descricao'), dicionario.get('faccao'), dicionario.get('cidade')),
+                 numero=100_000)
+    _cronometrar("leitura de 6 campos (atributo)",
+                 lambda: (registro.tipo, registro.op, registro.referencia,
+                          registro.descricao, registro.faccao, registro.cidade),
+                 numero=100_000)
+
+
+# ---------------------- Cabeçalhos de posição ----------------------
+
+def _posicao_antiga(cabecalho):
+    """Caminho antigo: fatia e int() por cabeçalho (só os campos usados no BPLB)"""
+    if cabecalho.isdigit():
+        return {'orientacao': cabecalho[0], 'fonte': cabecalho[1:3],
+                'multiplicador_altura': cabecalho[3], 'multiplicador_largura': cabecalho[4],
+                'y_pontos': int(cabecalho[8:12]), 'x_pontos': int(cabecalho[12:])}
+    if cabecalho[-8:-4].isdigit() and cabecalho[-4:].isdigit():
+        return {'orientacao': cabecalho[0], 'fonte': cabecalho[1:3],
+                'y_pontos': int(cabecalho[-8:-4]), 'x_pontos': int(cabecalho[-4:])}
+    return None
+
+
+def _comandos_antigos(cabecalhos, textos):
+    rotacoes = {'1': '0', '2': '1', '3': '2', '4': '3', '5': '0', '6': '1', '7': '2', '8': '3'}
+    comandos = []
+    for cabecalho, texto in zip(cabecalhos, textos):
+        posicao = _posicao_antiga(cabecalho)
+        if not posicao:
+            continue
+        fonte = posicao['fonte']
+        num_fonte = min(5, max(1, int(fonte[0]))) if fonte[:1].isdigit() else 1
+        reverso = 'R' if posicao['orientacao'] in ('5', '6', '7', '8') else 'N'
+        comandos.append(f"A{max(0, posicao['x_pontos'] // 8)},{max(0, posicao['y_pontos'] // 8)},"
+                        f"{rotacoes.get(posicao['orientacao'], '0')},{num_fonte}A,"
+                        f"{posicao.get('multiplicador_largura', '1')},{posicao.get('multiplicador_altura', '1')},"
+                        f"{reverso},\"{texto}\"")
+    return comandos
+
+
+def bench_cabecalhos(quantidade=20_000):
+    print(f"\n⏱️  Cabeçalhos de posição ({quantidade} textos)")
+    modelos = ['11A1202510200', '11A1402480089', '1220000010002', '4110000250100']
+    cabecalhos = [modelos[i % len(modelos)] for i in range(quantidade)]
+    textos = [f"TEXTO {i}" for i in range(quantidade)]
+    assert _comandos_antigos(cabecalhos, textos) == comandos_texto_bplb(decodificar_cabecalhos(cabecalhos, textos))
+    antigo = _cronometrar("fatia + int() por cabeçalho (antigo)",
+                          lambda: _comandos_antigos(cabecalhos, textos), numero=5)
+    novo = _cronometrar("decodificar + comandos_texto_bplb",
+                        lambda: comandos_texto_bplb(decodificar_cabecalhos(cabecalhos, textos)), numero=5)
+    print(f"  Ganho: {antigo / novo:.2f}x")
+    _cronometrar("só decodificar_cabecalhos",
+                 lambda: decodificar_cabecalhos(cabecalhos, textos), numero=5)
+
+
+# ---------------------- Planos por layout ----------------------
+
+def bench_layout():
+    print("\n⏱️  Plano por layout (por etiqueta, mensagens DEBUG descartadas)")
+    parser_cache = PPLAParser(layouts=CacheLayouts())
+    parser_sem_cache = PPLAParser(layouts=CacheLayouts(maximo=0))
+    
+    with open(os.devnull, 'w', encoding='utf-8') as nulo:
+        def silencioso(parser):
+            def processar():
+                with contextlib.redirect_stdout(nulo):
+                    parser._processar_etiqueta(ETIQUETA_EXEMPLO, 1)
+            return processar
+        
+        with contextlib.redirect_stdout(nulo):
+            assert parser_cache._processar_etiqueta(ETIQUETA_EXEMPLO, 1) == \
+                parser_sem_cache._processar_etiqueta(ETIQUETA_EXEMPLO, 1)
+        assert len(parser_cache.layouts) == 1
+        # Mesmo layout, a primeira sem código longo: o plano dela não vale para a segunda
+        sem_codigo = ETIQUETA_EXEMPLO.replace("2130150727412", "1234567").replace("2/2", "1/2")
+        lidos = []
+        for parser in (PPLAParser(layouts=CacheLayouts()), parser_sem_cache):
+            with contextlib.redirect_stdout(nulo):
+                etiquetas = [parser._processar_etiqueta(e, i) for i, e in enumerate((sem_codigo, ETIQUETA_EXEMPLO), 1)]
+            lidos.append([(e.codigo_barras, e.fracao) for e in etiquetas])
+        assert lidos[0] == lidos[1] == [('', '1/2'), ('2130150727412', '2/2')], lidos
+        # Descrições curtas ou fora do vocabulário: o plano recusa como a heurística
+        descricoes = ("CAMISETA CASUAL MASC MC", "BONE", "MEIAS", "ABCDEFGH", "CALCA JEANS", "XYZ ABCDEF")
+        lidos = []
+        for parser in (PPLAParser(layouts=CacheLayouts()), parser_sem_cache):
+            with contextlib.redirect_stdout(nulo):
+                lidos.append([parser._processar_etiqueta(
+                    ETIQUETA_EXEMPLO.replace("CAMISETA CASUAL MASC MC", descricao), i).descricao
+                    for i, descricao in enumerate(descricoes, 1)])
+        assert lidos[0] == lidos[1] == ["CAMISETA CASUAL MASC MC", "", "", "", "CALCA JEANS", "XYZ ABCDEF"], lidos
+        sem_cache = _cronometrar("heurística a cada etiqueta", silencioso(parser_sem_cache))
+        com_cache = _cronometrar("layout conhecido (plano)", silencioso(parser_cache))
+    print(f"  Ganho: {sem_cache / com_cache:.2f}x")
+
+
+
+def bench_cache():
+    print("\n⏱️  Cache de BPLB (por etiqueta, mensagens DEBUG descartadas)")
+    parser = PPLAParser()
+    converter = PPLAtoBPLBConverter()
+    configuracao = converter.assinatura_configuracao(parser)
+    raw = ETIQUETA_EXEMPLO.encode('utf-8')
+    cache = CacheBPLB()
+    
+    with open(os.devnull, 'w', encoding='utf-8') as nulo:
+        def gerar():
+            with contextlib.redirect_stdout(nulo):
+                etiqueta = parser._processar_etiqueta(raw, 1)
+                return converter.converter_etiqueta_bytes(etiqueta), (etiqueta.faccao, etiqueta.regiao)
+        
+        bplb, afinidade, _ = cache.obter_ou_gerar(raw, configuracao, gerar)
+        assert (bplb, afinidade) == gerar() and afinidade == ('LP ACABAMENTOS E TRANSPORTES', 'SC - MEIO VALE')
+        sem_cache = _cronometrar("análise + conversão", gerar)
+        com_cache = _cronometrar("BPLB do cache (hash do bloco)",
+                                 lambda: cache.obter_ou_gerar(raw, configuracao, gerar))
+    print(f"  Ganho: {sem_cache / com_cache:.2f}x")
+
+
+
+def bench_diagnostico():
+    print("\n⏱️  Mensagens de depuração (por etiqueta, heurística completa)")
+    parser = PPLAParser(layouts=CacheLayouts(maximo=0))
+    nivel, rastro = diag.nivel, diag._rastro.maxlen if diag._rastro is not None else 0
+    nivel_rastro = diag.nivel_rastro
+    
+    with open(os.devnull, 'w', encoding='utf-8') as nulo:
+        def processar():
+            with contextlib.redirect_stdout(nulo):
+                parser._processar_etiqueta(ETIQUETA_EXEMPLO, 1)
+        try:
+            diag.configurar(DEBUG, 0)
+            no_console = _cronometrar("DEBUG no console (como antes)", processar)
+            diag.configurar(INFO, 200, DEBUG)
+            com_rastro = _cronometrar("DEBUG só no rastro em memória", processar)
+            diag.configurar(INFO, 200, INFO)
+            padrao = _cronometrar("rastro de INFO para cima (padrão)", processar)
+            diag.configurar(INFO, 0)
+            desligado = _cronometrar("sem rastro", processar)
+        finally:
+            diag.configurar(nivel, rastro, nivel_rastro)
+    print(f"  Ganho (rastro DEBUG): {no_console / com_rastro:.2f}x  (padrão): {no_console / padrao:.2f}x  "
+          f"(sem rastro): {no_console / desligado:.2f}x")
+
+
+
+def bench_paralelo(quantidade=20_000):
+    print(f"\n⏱️  Análise + conversão de {quantidade} etiquetas: um processo x ProcessPoolExecutor")
+    converter = PPLAtoBPLBConverter()
+    limiar = config.LIMIAR_PARALELO
+    
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'Imprime.txt')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            for i in range(quantidade):
+                f.write(ETIQUETA_EXEMPLO.replace('2130150727412', str(2130150727412 + i)) + "\n")
+        
+        def processar(limiar_paralelo, caminho=caminho, parser=None):
+            config.LIMIAR_PARALELO = limiar_paralelo
+            parser = parser or PPLAParser()
+            configuracao = converter.assinatura_configuracao(parser)
+            with LeitorSpool(caminho) as leitor, open(os.devnull, 'w', encoding='utf-8') as nulo, \
+                    contextlib.redirect_stdout(nulo):
+                resultados = gerar_bplb_etiquetas(
+                    leitor.iterar_etiquetas(), 1, parser, converter,
+                    CacheBPLB(maximo_memoria=0), configuracao, contar_para_paralelo(caminho, leitor))
+                return [(bplb, afinidade) for _, bplb, afinidade, _ in resultados]
+        
+        # Vocabulário próprio: os processos analisam com ele, como a análise direta
+        vocabulario = os.path.join(pasta, 'Vocabulario.txt')
+        with open(vocabulario, 'w', encoding='utf-8') as f:
+            f.write(ETIQUETA_EXEMPLO.replace('CAMISETA CASUAL MASC MC', 'ZIPERADO') * 8)
+        proprio = PPLAParser(ClassificadorCampos(PALAVRAS_DESCRICAO_PADRAO + ('ZIPER',)), CacheLayouts())
+        try:
+            com_vocabulario = processar(1, vocabulario, proprio)
+            assert com_vocabulario == processar(0, vocabulario, proprio)
+            assert b'ZIPERADO' in com_vocabulario[0][0] and b'ZIPERADO' not in processar(1, vocabulario)[0][0]
+            assert processar(1) == processar(0)
+            print(f"  Processos: {config.PROCESSOS_PARALELO or os.cpu_count()}")
+            direto = min(timeit.repeat(lambda: processar(0), repeat=3, number=1))
+            paralelo = min(timeit.repeat(lambda: processar(1), repeat=3, number=1))
+        finally:
+            config.LIMIAR_PARALELO = limiar
+    print(f"  {'um processo':<40} {direto * 1e3:9.1f} ms")
+    print(f"  {'em paralelo (com subida do pool)':<40} {paralelo * 1e3:9.1f} ms")
+    print(f"  Ganho: {direto / paralelo:.2f}x")
+
+
+def bench_preguicosa(quantidade=20_000):
+    print(f"\n⏱️  parse_file de {quantidade} etiquetas: análise completa x sob demanda")
+    limiar = config.LIMIAR_PARALELO
+    
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'Imprime.txt')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            for i in range(quantidade):
+                f.write(ETIQUETA_EXEMPLO.replace('2130150727412', str(2130150727412 + i)) + "\n")
+        
+        def localizar():
+            parser = PPLAParser()
+            parser.parse_file(caminho)
+            return parser.etiquetas
+        
+        def completa():
+            etiquetas = localizar()
+            PPLAParser().extrair_campos(etiquetas)
+            return etiquetas
+        
+        # Cada etiqueta guarda só o seu trecho, não uma cópia do arquivo inteiro
+        assert all(type(e.raw) is bytes and len(e.raw) == e.fim - e.inicio for e in localizar())
+        
+        casos = (
+            ("campos de todas (como antes)", completa),
+            ("só fronteiras + hash (monitor)", lambda: [e.hash for e in localizar()]),
+            ("uma etiqueta em BPLB (reimpressão)", lambda: localizar()[quantidade // 2].bplb()),
+        )
+        try:
+            config.LIMIAR_PARALELO = 0
+            tempos = [min(timeit.repeat(funcao, repeat=3, number=1)) for _, funcao in casos]
+        finally:
+            config.LIMIAR_PARALELO = limiar
+    for (nome, _), tempo in zip(casos, tempos):
+        print(f"  {nome:<40} {tempo * 1e3:9.1f} ms")
+    print(f"  Ganho (monitor): {tempos[0] / tempos[1]:.2f}x")
+
+
+def _remover_acentos_antigo(texto):
+    texto = unicodedata.normalize('NFKD', texto)
+    texto = ''.join([c for c in texto if not unicodedata.combining(c)])
+    for de, para in (('Ç', 'C'), ('ç', 'c'), ('Ã', 'A'), ('ã', 'a'), ('Õ', 'O'), ('õ', 'o'),
+                     ('Â', 'A'), ('â', 'a'), ('Ê', 'E'), ('ê', 'e'), ('Î', 'I'), ('î', 'i'),
+                     ('Ô', 'O'), ('ô', 'o'), ('Û', 'U'), ('û', 'u')):
+        texto = texto.replace(de, para)
+    return texto.upper()
+
+
+def bench_normalizacao():
+    print("\n⏱️  Normalização dos campos (por campo)")
+    campos = ["CONFECÇÕES SÃO JOSÉ LTDA", "JARAGUÁ DO SUL", "SC - VALE DO ITAJAÍ", "CALÇA JEANS"]
+    assert [_remover_acentos_antigo(c) for c in campos] == [normalizar(c) for c in campos]
+    antigo = _cronometrar("NFKD + combining + replace", lambda: [_remover_acentos_antigo(c) for c in campos])
+    novo = _cronometrar("str.translate + LRU", lambda: [normalizar(c) for c in campos])
+    print(f"  Ganho: {antigo / novo:.2f}x")
+    
+    numeros = ["21301507", "Ref: 121302105", "OP:21303219"]
+    assert [''.join(filter(str.isdigit, n)) for n in numeros] == [somente_digitos(n) for n in numeros]
+    antigo = _cronometrar("''.join(filter(str.isdigit))", lambda: [''.join(filter(str.isdigit, n)) for n in numeros])
+    novo = _cronometrar("somente_digitos", lambda: [somente_digitos(n) for n in numeros])
+    print(f"  Ganho: {antigo / novo:.2f}x")
+
+
+def _bplbs_series(quantidade, tamanho, codigo_seguido=False):
+    """
+    BPLB das frações 1/n..n/n de cada etiqueta do corpus, como o ERP manda
+    uma OP; codigo_seguido: o código de barras anda junto com a fração
+    """
+    parser = PPLAParser()
+    conversor = PPLAtoBPLBConverter()
+    bplbs = []
+    for i, (etiqueta, campos) in enumerate(gerar_corpus(quantidade // tamanho)):
+        for parte in range(1, tamanho + 1):
+            fracao = etiqueta.replace(campos['fracao'] + "\n", f"{parte}/{tamanho}\n")
+            if codigo_seguido:
+                fracao = fracao.replace(campos['codigo_barras'], str(int(campos['codigo_barras']) + parte))
+            bplbs.append(conversor.converter_etiqueta_bytes(
+                parser._processar_etiqueta(fracao.encode('utf-8'), i)))
+    return bplbs
+
+
+class _ImpressoraGravador:
+    """Guarda cada trabalho recebido, para comparar com os bytes esperados"""
+
+    def __init__(self):
+        self.trabalhos = []
+
+    def enviar_comandos(self, comandos_bplb):
+        self.trabalhos.append(bytes(comandos_bplb))
+        return True
+
+
+def _verificar_formularios_epl2():
+    """Bytes exatos do envio por formulários, conferidos com o EPL2 e o emulador"""
+    programa = (b'N\nD7\nQ550\nLE20,20,760,2\nA40,140,0,3,1,1,N,"OP: 21301507"\n'
+                b'B185,420,0,1,3,5,80,B,"2130150727412"\nP1\n')
+    gravador = _ImpressoraGravador()
+    envio = EnvioFormularios(gravador)
+    for _ in range(3):
+        envio.enviar(programa)
+    assert gravador.trabalhos == [
+        # 1ª: grava a base (com o N dentro do FS) e desenha o resto por cima
+        b'FK"Ec259da9"\nFS"Ec259da9"\nN\nD7\nQ550\nLE20,20,760,2\nFE\n'
+        b'FR"Ec259da9"\nA40,140,0,3,1,1,N,"OP: 21301507"\nB185,420,0,1,3,5,80,B,"2130150727412"\nP1\n',
+        # 2ª: o modelo se repetiu e vira formulário com variáveis, preenchidas pelo ?
+        b'FK"E2a1f947"\nFS"E2a1f947"\nV00,99,N,""\nV01,99,N,""\nN\nD7\nQ550\nLE20,20,760,2\n'
+        b'A40,140,0,3,1,1,N,V00\nB185,420,0,1,3,5,80,B,V01\nFE\n'
+        b'FR"E2a1f947"\n?\nOP: 21301507\n2130150727412\nP1\n',
+        # 3ª: só o FR, os dados e o P
+        b'FR"E2a1f947"\n?\nOP: 21301507\n2130150727412\nP1\n',
+    ]
+    emulador = EmuladorBPLB()
+    for trabalho in gravador.trabalhos:
+        emulador.enviar_comandos(trabalho)
+    assert emulador.programas() == [programa] * 3
+    # Um N depois do FR limpa a imagem: o formulário chamado não é impresso
+    emulador = EmuladorBPLB()
+    emulador.enviar_comandos(gravador.trabalhos[1] + b'FR"E2a1f947"\n?\nOP: 1\n2\nN\nA10,10,0,1,1,1,N,"X"\nP1\n')
+    assert emulador.programas() == [programa, b'N\nA10,10,0,1,1,1,N,"X"\nP1\n']
+
+
+def bench_formularios(quantidade=3000):
+    print(f"\n⏱️  Bytes enviados à impressora: programa inteiro x formulários ({quantidade} etiquetas)")
+    _verificar_formularios_epl2()
+    parser = PPLAParser()
+    conversor = PPLAtoBPLBConverter()
+    
+    def bplbs_corpus():
+        return [conversor.converter_etiqueta_bytes(parser._processar_etiqueta(etiqueta.encode('utf-8'), i))
+                for i, (etiqueta, _) in enumerate(gerar_corpus(quantidade), 1)]
+    
+    casos = (
+        ("corpus sintético (etiquetas variadas)", bplbs_corpus()),
+        ("séries de 3 frações", _bplbs_series(quantidade, 3)),
+        ("séries de 10 frações", _bplbs_series(quantidade, 10)),
+    )
+    for nome, bplbs in casos:
+        emulador = EmuladorBPLB()
+        envio = EnvioFormularios(emulador)
+        for bplb in bplbs:
+            envio.enviar(bplb)
+        # A impressora imprime exatamente os mesmos programas
+        assert emulador.programas() == bplbs
+        print(f"  {nome:<40} {envio.bytes_programas / len(bplbs):7.0f} -> "
+              f"{envio.bytes_enviados / len(bplbs):5.0f} bytes/etiqueta "
+              f"({envio.bytes_enviados / envio.bytes_programas:.2f}x)")
+
+
+def _verificar_series_literais():
+    """Comandos exatos das séries: passo com sinal e cada série com o seu formulário"""
+    def programa(fracao, codigo):
+        return b'N\nQ550\nA40,140,0,3,1,1,N,"%b"\nB185,420,0,1,3,5,80,B,"%b"\nP1\n' % (fracao, codigo)
+    
+    programas = [programa(b"1/3", b"2130150727412"), programa(b"2/3", b"2130150727412"),
+                 programa(b"3/3", b"2130150727412"), programa(b"1/2", b"105"),
+                 programa(b"1/2", b"104"), programa(b"1/2", b"103"), programa(b"2/2", b"200")]
+    trabalhos = agrupar_series(programas)
+    assert trabalhos == [
+        # Fração subindo: C1 (1 dígito) com passo +1, começando em 1
+        (3, b'FK"Eb600759"\nFS"Eb600759"\nC1,N,+1,""\nN\nQ550\nA40,140,0,3,1,1,N,C0"/3"\n'
+            b'B185,420,0,1,3,5,80,B,"2130150727412"\nFE\nFR"Eb600759"\n?\n1\nP3\nFK"Eb600759"\n'),
+        # Código descendo: outra série, com o seu formulário e o contador de novo em C0
+        (3, b'FK"E39b9b28"\nFS"E39b9b28"\nC3,N,-1,""\nN\nQ550\nA40,140,0,3,1,1,N,"1/2"\n'
+            b'B185,420,0,1,3,5,80,B,C0\nFE\nFR"E39b9b28"\n?\n105\nP3\nFK"E39b9b28"\n'),
+        # Sozinha: o programa como veio
+        (1, programas[-1]),
+    ]
+    emulador = EmuladorBPLB()
+    for _, trabalho in trabalhos:
+        emulador.enviar_comandos(trabalho)
+    assert emulador.programas() == programas
+
+
+def bench_series(quantidade=3000):
+    print(f"\n⏱️  Séries com contadores da impressora ({quantidade} etiquetas)")
+    _verificar_series_literais()
+    casos = (
+        ("séries de 3 frações", _bplbs_series(quantidade, 3)),
+        ("séries de 10 frações", _bplbs_series(quantidade, 10)),
+        ("10 frações + código de barras seguido", _bplbs_series(quantidade, 10, codigo_seguido=True)),
+    )
+    for nome, bplbs in casos:
+        inicio = timeit.default_timer()
+        trabalhos = agrupar_series(bplbs)
+        segundos = timeit.default_timer() - inicio
+        emulador = EmuladorBPLB()
+        for _, bplb in trabalhos:
+            emulador.enviar_comandos(bplb)
+        # A impressora imprime exatamente os mesmos programas
+        assert emulador.programas() == bplbs
+        enviados = sum(len(bplb) for _, bplb in trabalhos)
+        print(f"  {nome:<40} {len(bplbs):6} -> {len(trabalhos):5} trabalhos, "
+              f"{enviados / sum(map(len, bplbs)):.2f}x bytes, {segundos * 1e3:.1f} ms")
+
+
+def bench_transporte(quantidade=2000):
+    print(f"\n⏱️  {quantidade} etiquetas pela rede (RAW TCP) para a impressora falsa local")
+    parser = PPLAParser()
+    conversor = PPLAtoBPLBConverter()
+    bplbs = [conversor.converter_etiqueta_bytes(parser._processar_etiqueta(etiqueta.encode('utf-8'), i))
+             for i, (etiqueta, _) in enumerate(gerar_corpus(min(quantidade, 1000)), 1)]
+    bplbs = [bplbs[i % len(bplbs)] for i in range(quantidade)]
+    conexoes = config.CONEXOES_TCP_POR_IMPRESSORA
+    ritmo, config.RITMO_IMPRESSORA = config.RITMO_IMPRESSORA, 'desligado'
+    
+    def enviar(bplbs, sessao, pool):
+        with ImpressoraTCPFalsa() as falsa, open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            config.CONEXOES_TCP_POR_IMPRESSORA = conexoes if pool else 0
+            impressora = ImpressoraBPLB(falsa.endereco, 'tcp')
+            inicio = timeit.default_timer()
+            if sessao:
+                impressora.abrir_sessao()
+            for bplb in bplbs:
+                assert impressora.enviar_comandos(bplb)
+            impressora.fechar_sessao()
+            fechar_conexoes_ociosas()
+            segundos = timeit.default_timer() - inicio
+            # Espera a impressora falsa terminar de ler
+            while len(falsa.programas()) < len(bplbs) and timeit.default_timer() - inicio < 30:
+                time.sleep(0.01)
+            assert falsa.programas() == bplbs
+            return segundos, falsa.conexoes
+    
+    # Sem pool cada etiqueta abre uma conexão: só um décimo das etiquetas
+    casos = (
+        ("sessão (vários por trabalho)", bplbs, True, True),
+        ("um trabalho por etiqueta, com pool", bplbs, False, True),
+        ("um trabalho por etiqueta, sem pool", bplbs[:quantidade // 10], False, False),
+    )
+    try:
+        for nome, enviadas, sessao, pool in casos:
+            segundos, usadas = enviar(enviadas, sessao, pool)
+            print(f"  {nome:<40} {len(enviadas) / segundos:9.0f} etiquetas/s  {usadas:5} conexão(ões)")
+    finally:
+        config.CONEXOES_TCP_POR_IMPRESSORA = conexoes
+        config.RITMO_IMPRESSORA = ritmo
+
+
+def bench_fila(quantidade=2000):
+    print(f"\n⏱️  Aviso do watchdog com {quantidade} etiquetas novas (impressora TCP falsa)")
+    anteriores = (config.TRANSPORTE_IMPRESSORA, config.PASTA_CACHE_BPLB, config.ESPERA_ARQUIVO_ALTERADO,
+                  config.RITMO_IMPRESSORA)
+    (config.TRANSPORTE_IMPRESSORA, config.PASTA_CACHE_BPLB, config.ESPERA_ARQUIVO_ALTERADO,
+     config.RITMO_IMPRESSORA) = 'tcp', None, 0, 'desligado'
+    try:
+        with tempfile.TemporaryDirectory() as pasta, ImpressoraTCPFalsa() as falsa, \
+                open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            caminho = os.path.join(pasta, 'Imprime.txt')
+            escrever_corpus(caminho, quantidade)
+            
+            # Antes: o handler processava e imprimia na linha do watchdog
+            inicio = timeit.default_timer()
+            processar_e_imprimir(caminho, True, falsa.endereco)
+            no_handler = timeit.default_timer() - inicio
+            
+            # Fila: o handler só avisa. Enquanto a impressão anda, outros avisos
+            # (de um arquivo que não existe, para não imprimir de novo)
+            fila = FilaImpressao(falsa.endereco, lambda c: processar_e_imprimir(c, fila=fila), maximo=50)
+            outro = os.path.join(pasta, 'Outro.txt')
+            avisos = []
+            with fila:
+                inicio = timeit.default_timer()
+                while fila.enviados < quantidade:
+                    antes = timeit.default_timer()
+                    fila.avisar(outro if avisos else caminho)
+                    avisos.append(timeit.default_timer() - antes)
+                    time.sleep(0.001)
+                fila.aguardar()
+            com_fila = timeit.default_timer() - inicio
+            estado = fila.estado()
+    finally:
+        (config.TRANSPORTE_IMPRESSORA, config.PASTA_CACHE_BPLB, config.ESPERA_ARQUIVO_ALTERADO,
+         config.RITMO_IMPRESSORA) = anteriores
+    
+    print(f"  {'handler processando e imprimindo':<40} {no_handler * 1e3:9.1f} ms por aviso")
+    print(f"  {'handler com fila (pior de %d avisos)' % len(avisos):<40} {max(avisos) * 1e3:9.3f} ms por aviso")
+    print(f"  {'fila: tudo impresso em':<40} {com_fila * 1e3:9.1f} ms, maior fila {estado['maior_fila']}"
+          f"/{estado['maximo']}, leitura esperou {estado['esperas']} vez(es)")
+
+
+def _impressora_simulada(pasta, segundos_por_etiqueta, parar):
+    """Tira da pasta de spool um .bplb por vez, no tempo de impressão das suas etiquetas"""
+    while not parar.is_set():
+        arquivos = sorted(nome for nome in os.listdir(pasta) if nome.endswith('.bplb'))
+        if not arquivos:
+            time.sleep(0.002)
+            continue
+        caminho = os.path.join(pasta, arquivos[0])
+        with open(caminho, 'rb') as f:
+            etiquetas = sum(int(n) for n in re.findall(rb'^P(\d+)', f.read(), re.MULTILINE))
+        time.sleep(etiquetas * segundos_por_etiqueta)
+        os.remove(caminho)
+
+
+def bench_ritmo(quantidade=200, escala=50):
+    ritmo = RitmoImpressora('fixo')
+    bplb = PPLAtoBPLBConverter().converter_etiqueta_bytes(
+        PPLAParser()._processar_etiqueta(ETIQUETA_EXEMPLO.encode('utf-8'), 1))
+    ritmo.prever(bplb)
+    print(f"\n⏱️  Ritmo previsto (Q{ritmo.comprimento}), etiquetas por minuto; antes: sleep(2) = 30")
+    for velocidade in sorted(config.VELOCIDADES_IMPRESSORA):
+        ritmo.velocidade = velocidade
+        print(f"  S{velocidade}{'':<38} {60 / ritmo.segundos_por_etiqueta():9.1f} etiquetas/min")
+    
+    # Tempo comprimido escala vezes: impressora simulada (pasta de spool) que
+    # imprime no dobro da velocidade prevista
+    print(f"\n⏱️  {quantidade} etiquetas para a impressora simulada 2x mais rápida que a previsão "
+          f"(tempo /{escala})")
+    ritmo.velocidade = config.VELOCIDADE_PADRAO
+    real = ritmo.segundos_por_etiqueta() / escala / 2
+    nomes = ('VELOCIDADES_IMPRESSORA', 'SEGUNDOS_EXTRA_POR_ETIQUETA', 'SEGUNDOS_ADIANTADOS',
+             'INTERVALO_CONSULTA_IMPRESSORA', 'TRABALHOS_NA_FILA', 'TRANSPORTE_IMPRESSORA', 'RITMO_IMPRESSORA')
+    anteriores = [getattr(config, nome) for nome in nomes]
+    config.VELOCIDADES_IMPRESSORA = {s: v * escala for s, v in anteriores[0].items()}
+    config.SEGUNDOS_EXTRA_POR_ETIQUETA /= escala
+    config.SEGUNDOS_ADIANTADOS = 1.0 / escala * 20
+    config.INTERVALO_CONSULTA_IMPRESSORA = 0.01
+    # Só o ritmo decide quanto vai adiantado
+    config.TRABALHOS_NA_FILA = 10 ** 6
+    config.TRANSPORTE_IMPRESSORA = 'pasta'
+    try:
+        for modo in ('desligado', 'fixo', 'adaptativo'):
+            config.RITMO_IMPRESSORA = modo
+            with tempfile.TemporaryDirectory() as pasta:
+                parar = threading.Event()
+                simulada = threading.Thread(target=_impressora_simulada, args=(pasta, real, parar))
+                simulada.start()
+                impressora = ImpressoraBPLB(pasta)
+                inicio = timeit.default_timer()
+                impressora.abrir_sessao()
+                maior_fila = 0
+                for _ in range(quantidade):
+                    impressora.enviar_comandos(bplb)
+                    maior_fila = max(maior_fila, impressora.sessao._consultar_fila())
+                impressora.fechar_sessao()
+                while any(nome.endswith('.bplb') for nome in os.listdir(pasta)):
+                    time.sleep(0.002)
+                segundos = timeit.default_timer() - inicio
+                parar.set()
+                simulada.join()
+            fator = f"fator {impressora.ritmo.fator:.2f}" if impressora.ritmo else ""
+            print(f"  {modo:<40} {segundos:6.2f} s (ideal {quantidade * real:.2f}), "
+                  f"até {maior_fila} trabalho(s) na fila {fator}")
+    finally:
+        for nome, valor in zip(nomes, anteriores):
+            setattr(config, nome, valor)
+
+
+def _endereco_sem_impressora():
+    """host:porta local em que ninguém escuta (a conexão é recusada)"""
+    with socket.socket() as livre:
+        livre.bind(("127.0.0.1", 0))
+        return "127.0.0.1:%d" % livre.getsockname()[1]
+
+
+class _TransporteFalso(Transporte):
+    """
+    Guarda em impressos os envios dos trabalhos terminados, por destino. No
+    destino 'falha' o 2º envio de cada trabalho falha, e o trabalho aberto é
+    descartado como no spooler.
+    """
+    impressos = {}
+
+    def __init__(self, destino):
+        super().__init__(destino)
+        self._trabalho = None
+
+    def iniciar_trabalho(self):
+        self._trabalho = []
+
+    def escrever(self, dados):
+        if self.destino == 'falha' and len(self._trabalho) == 1:
+            raise OSError("envio recusado")
+        self._trabalho.append(bytes(dados))
+
+    def terminar_trabalho(self):
+        _TransporteFalso.impressos.setdefault(self.destino, []).extend(self._trabalho)
+        self._trabalho = None
+
+    def fechar(self):
+        self._trabalho = None
+
+
+def _verificar_falha_no_trabalho():
+    """3 etiquetas num trabalho RAW, o 2º envio falha: as 3 vão para a outra impressora"""
+    nomes = ('TRANSPORTE_IMPRESSORA', 'RITMO_IMPRESSORA', 'USAR_FORMULARIOS')
+    anteriores = [getattr(config, nome) for nome in nomes]
+    TRANSPORTES['falso'] = _TransporteFalso
+    config.TRANSPORTE_IMPRESSORA, config.RITMO_IMPRESSORA, config.USAR_FORMULARIOS = 'falso', 'desligado', False
+    _TransporteFalso.impressos = {}
+    bplbs = [b'N\nA10,10,0,1,1,1,N,"ETIQUETA %d"\nP1\n' % i for i in range(1, 4)]
+    try:
+        fila = FilaImpressao(['falha', 'boa'], None, estrategia='faccao')
+        # Mesma facção: as 3 vão para a primeira impressora, no mesmo trabalho
+        for i, bplb in enumerate(bplbs, 1):
+            fila.enfileirar(TrabalhoImpressao(f"etiqueta {i}", bplb, faccao='LP'))
+        with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo), fila:
+            fila.aguardar()
+            estado = fila.estado()
+    finally:
+        del TRANSPORTES['falso']
+        for nome, valor in zip(nomes, anteriores):
+            setattr(config, nome, valor)
+    assert 'falha' not in _TransporteFalso.impressos, _TransporteFalso.impressos
+    assert sorted(_TransporteFalso.impressos['boa']) == bplbs, _TransporteFalso.impressos
+    assert (estado['enviados'], estado['falhas']) == (3, 1), estado
+
+
+def bench_pool(quantidade=300, escala=100):
+    _verificar_falha_no_trabalho()
+    print(f"\n⏱️  {quantidade} etiquetas para um pool de impressoras TCP falsas no ritmo previsto (tempo /{escala})")
+    parser = PPLAParser()
+    conversor = PPLAtoBPLBConverter()
+    etiquetas = [parser._processar_etiqueta(etiqueta.encode('utf-8'), i)
+                 for i, (etiqueta, _) in enumerate(gerar_corpus(quantidade), 1)]
+    bplbs = [conversor.converter_etiqueta_bytes(etiqueta) for etiqueta in etiquetas]
+    nomes = ('VELOCIDADES_IMPRESSORA', 'SEGUNDOS_EXTRA_POR_ETIQUETA', 'SEGUNDOS_ADIANTADOS',
+             'TRANSPORTE_IMPRESSORA', 'RITMO_IMPRESSORA', 'PASTA_CACHE_BPLB')
+    anteriores = [getattr(config, nome) for nome in nomes]
+    # As impressoras falsas recebem na hora: quem limita é o ritmo previsto
+    config.VELOCIDADES_IMPRESSORA = {s: v * escala for s, v in anteriores[0].items()}
+    config.SEGUNDOS_EXTRA_POR_ETIQUETA /= escala
+    config.SEGUNDOS_ADIANTADOS = 1.0 / escala * 10
+    config.TRANSPORTE_IMPRESSORA, config.RITMO_IMPRESSORA, config.PASTA_CACHE_BPLB = 'tcp', 'fixo', None
+    
+    def imprimir(vivas, mortas=0, estrategia='menos_ocupada'):
+        with contextlib.ExitStack() as pilha:
+            falsas = [pilha.enter_context(ImpressoraTCPFalsa()) for _ in range(vivas)]
+            pilha.enter_context(contextlib.redirect_stdout(pilha.enter_context(open(os.devnull, 'w'))))
+            destinos = [_endereco_sem_impressora() for _ in range(mortas)] + [f.endereco for f in falsas]
+            fila = FilaImpressao(destinos, None, estrategia=estrategia)
+            inicio = timeit.default_timer()
+            with fila:
+                for i, (etiqueta, bplb) in enumerate(zip(etiquetas, bplbs), 1):
+                    fila.enfileirar(TrabalhoImpressao(f"etiqueta {i}", bplb,
+                                                      faccao=etiqueta.faccao, regiao=etiqueta.regiao))
+                fila.aguardar()
+            segundos = timeit.default_timer() - inicio
+            fechar_conexoes_ociosas()
+            while sum(len(f.programas()) for f in falsas) < quantidade and timeit.default_timer() - inicio < 30:
+                time.sleep(0.01)
+            assert sorted(p for f in falsas for p in f.programas()) == sorted(bplbs)
+            if estrategia in ('faccao', 'regiao'):
+                # Cada facção (região) numa impressora só
+                impressora_de = {p: n for n, f in enumerate(falsas) for p in f.programas()}
+                destinos = {}
+                for etiqueta, bplb in zip(etiquetas, bplbs):
+                    destinos.setdefault(getattr(etiqueta, estrategia), set()).add(impressora_de[bplb])
+                destinos.pop('', None)  # sem o campo: vai para a menos ocupada
+                assert destinos and all(len(usadas) == 1 for usadas in destinos.values())
+            return segundos, fila.estado()
+    
+    def divisao(estado):
+        return " / ".join(str(impressora['enviados']) for impressora in estado['impressoras'])
+    
+    try:
+        base = None
+        for vivas in (1, 2, 4):
+            segundos, estado = imprimir(vivas)
+            base = base or segundos
+            print(f"  {f'{vivas} impressora(s)':<40} {quantidade / segundos:9.0f} etiquetas/s  "
+                  f"{base / segundos:5.2f}x  ({divisao(estado)})")
+        
+        print("\n⏱️  Estratégias com 2 impressoras, e uma terceira fora do ar (failover)")
+        for estrategia in ESTRATEGIAS:
+            segundos, estado = imprimir(2, estrategia=estrategia)
+            print(f"  {estrategia:<40} {quantidade / segundos:9.0f} etiquetas/s  ({divisao(estado)})")
+        segundos, estado = imprimir(2, mortas=1)
+        print(f"  {'1 fora do ar + 2 (menos_ocupada)':<40} {quantidade / segundos:9.0f} etiquetas/s  "
+              f"({divisao(estado)}), {estado['falhas']} falha(s), todas as etiquetas impressas")
+    finally:
+        for nome, valor in zip(nomes, anteriores):
+            setattr(config, nome, valor)
+
+
+# ---------------------- Núcleo x scripts antigos ----------------------
+# Cópia do caminho mais rápido dos scripts antes do núcleo (monitora.py):
+# arquivo inteiro em memória, etiquetas separadas por regex, heurística
+# sequencial em dict e comandos BPLB montados em str.
+
+_PADRAO_ETIQUETA_ANTIGO = re.compile(
+    r"(<xpml><page quantity='0'[^>]*>.*?Q0001\s*E\s*<xpml></page></xpml><xpml><end/></xpml>)",
+    re.DOTALL)
+
+
+def _processar_textos_sequencial(textos, data):
+    i = 0
+    while i < len(textos):
+        texto = textos[i]
+        data['textos'].append(texto)
+        if texto == 'OP:' and i + 1 < len(textos):
+            data['op'] = textos[i + 3]
+        elif texto == 'Ref:' and i + 1 < len(textos):
+            data['referencia'] = textos[i + 1]
+        elif texto in ('Faccao:', 'Facção:') and i + 1 < len(textos):
+            data['faccao'] = textos[i + 1]
+        elif texto == 'Cidade:' and i + 1 < len(textos):
+            data['cidade'] = textos[i + 1]
+        elif texto in ('Regiao:', 'Região:') and i + 1 < len(textos):
+            data['regiao'] = textos[i + 1]
+        elif 'CONSERTO' in texto:
+            data['tipo'] = 'CONSERTO'
+        elif any(p in texto for p in ('CAMISETA', 'BLUSA', 'CALCA')):
+            data['descricao'] = texto
+        elif re.match(r'^\d+/\d+$', texto):
+            data['fracao'] = texto
+            if i > 0 and re.match(r'^\d+$', textos[i-1]) and len(textos[i-1]) >= 12:
+                data['codigo_barras'] = textos[i-1]
+        i += 1
+
+
+def _analisar_antigo(caminho):
+    with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    etiquetas = []
+    for i, etiqueta_raw in enumerate(_PADRAO_ETIQUETA_ANTIGO.findall(content), 1):
+        data = {'numero': i, 'tipo': '', 'op': '', 'referencia': '', 'descricao': '',
+                'faccao': '', 'cidade': '', 'regiao': '', 'fracao': '', 'codigo_barras': '',
+                'codigos': [], 'textos': []}
+        textos, data['codigos'] = extrair_textos_e_codigos(etiqueta_raw)
+        _processar_textos_sequencial(textos, data)
+        etiquetas.append(data)
+    return etiquetas
+
+
+class _GeradorAntigo:
+    """BPLBGenerator dos scripts antigos: str, normalização Unicode em todo texto"""
+
+    def __init__(self):
+        self.comandos = []
+        self.codepage = config.CODEPAGE_IMPRESSORA
+        self.largura_etiqueta = 800
+        self.altura_etiqueta = 550
+        self.montar_fixos = None
+
+    def remover_acentos(self, texto):
+        if not texto:
+            return ""
+        texto = unicodedata.normalize('NFKD', str(texto))
+        texto = ''.join([c for c in texto if not unicodedata.combining(c)])
+        return texto.replace('Ç', 'C').replace('ç', 'c').upper()
+
+    def iniciar_etiqueta(self):
+        self.comandos = ["N", "D7", "S3", "JF", f"Q{self.altura_etiqueta}", f"q{self.largura_etiqueta}"]
+        # Borda refeita a cada etiqueta, como antes do prefixo compilado
+        if self.montar_fixos is not None:
+            self.montar_fixos(self)
+
+    def adicionar_texto(self, x, y, texto, fonte=2, tamanho_h=1, tamanho_v=1, normalizado=False):
+        # Os scripts antigos normalizavam de novo todo texto
+        self.comandos.append(f'A{x},{y},0,{fonte},{tamanho_h},{tamanho_v},N,"{self.remover_acentos(texto)}"')
+
+    adicionar_legenda = adicionar_texto
+
+    def adicionar_codigo_barras(self, x, y, codigo, tipo=1, largura_fina=3, largura_larga=5, altura=80, exibir_texto='B'):
+        self.comandos.append(f'B{x},{y},0,{tipo},{largura_fina},{largura_larga},{altura},{exibir_texto},"{codigo}"')
+
+    def adicionar_linha_horizontal(self, x, y, comprimento, espessura=1):
+        self.comandos.append(f"LE{x},{y},{comprimento},{espessura}")
+
+    def adicionar_linha_vertical(self, x, y, comprimento, espessura=1):
+        self.comandos.append(f"LE{x},{y},{espessura},{comprimento}")
+
+    def adicionar_borda(self, x1, y1, x2, y2, espessura=2):
+        self.comandos.append(f"LE{x1},{y1},{x2-x1},{espessura}")
+        self.comandos.append(f"LE{x1},{y2},{x2-x1},{espessura}")
+        self.comandos.append(f"LE{x1},{y1},{espessura},{y2-y1}")
+        self.comandos.append(f"LE{x2-espessura},{y1},{espessura},{y2-y1}")
+
+    def finalizar_etiqueta(self, quantidade=1):
+        self.comandos.append(f"P{quantidade}")
+
+    def obter_comandos_bytes(self):
+        return ("\n".join(self.comandos) + "\n").encode(self.codepage, 'replace')
+
+
+def bench_nucleo(quantidade=4000):
+    print(f"\n⏱️  Núcleo x scripts antigos ({quantidade} etiquetas dos exemplos, µs por etiqueta)")
+    limiar = config.LIMIAR_PARALELO
+    
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'Imprime.txt')
+        with open(caminho, 'w', encoding='utf-8') as f:
+            for i in range(quantidade):
+                exemplo = ETIQUETA_EXEMPLO if i % 2 else ETIQUETA_SEM_CONSERTO
+                f.write(exemplo.replace('21303219', str(21303219 + i)) + "\n")
+        
+        def analisar_nucleo():
+            parser = PPLAParser()
+            parser.parse_file(caminho)
+            parser.extrair_campos()
+            return [etiqueta.campos for etiqueta in parser.etiquetas]
+        
+        try:
+            # Comparação num processo só
+            config.LIMIAR_PARALELO = 0
+            etiquetas = analisar_nucleo()
+            assert len(etiquetas) == len(_analisar_antigo(caminho)) == quantidade
+            analise_antiga = min(timeit.repeat(lambda: _analisar_antigo(caminho), repeat=5, number=1))
+            analise_nucleo = min(timeit.repeat(analisar_nucleo, repeat=5, number=1))
+        finally:
+            config.LIMIAR_PARALELO = limiar
+    
+    antigo = PPLAtoBPLBConverter()
+    antigo.generator = _GeradorAntigo()
+    antigo.generator.montar_fixos = antigo._adicionar_fixos
+    nucleo = PPLAtoBPLBConverter()
+    assert [antigo.converter_etiqueta_bytes(e) for e in etiquetas[:2]] == \
+        [nucleo.converter_etiqueta_bytes(e) for e in etiquetas[:2]]
+    
+    def converter(conversor):
+        return lambda: [conversor.converter_etiqueta_bytes(e) for e in etiquetas]
+    conversao_antiga = min(timeit.repeat(converter(antigo), repeat=5, number=1))
+    conversao_nucleo = min(timeit.repeat(converter(nucleo), repeat=5, number=1))
+    
+    for nome, antes, depois in (("análise", analise_antiga, analise_nucleo),
+                                ("conversão", conversao_antiga, conversao_nucleo)):
+        print(f"  {nome + ' (scripts antigos)':<40} {antes / quantidade * 1e6:9.2f} µs")
+        print(f"  {nome + ' (núcleo)':<40} {depois / quantidade * 1e6:9.2f} µs")
+        print(f"  Ganho: {antes / depois:.2f}x")
+
+
+class _GeradorLista(_GeradorAntigo):
+    """
+    Comandos numa lista de str, juntados com \\n e codificados no fim, com a
+    normalização e o prefixo do núcleo: só o acúmulo dos comandos muda
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.prefixo = None
+
+    def remover_acentos(self, texto):
+        return normalizar(str(texto)) if texto else ""
+
+    def iniciar_etiqueta(self):
+        if self.prefixo is None:
+            super().iniciar_etiqueta()
+            self.prefixo = "\n".join(self.comandos) + "\n"
+        self.comandos = []
+
+    def adicionar_texto(self, x, y, texto, fonte=2, tamanho_h=1, tamanho_v=1, normalizado=False):
+        texto = texto if normalizado else self.remover_acentos(texto)
+        self.comandos.append(f'A{x},{y},0,{fonte},{tamanho_h},{tamanho_v},N,"{texto}"')
+
+    adicionar_legenda = adicionar_texto
+
+    def obter_comandos_bytes(self):
+        return (self.prefixo + "\n".join(self.comandos) + "\n").encode(self.codepage, 'replace')
+
+
+def bench_construtor(quantidade=100_000, distintas=1000):
+    print(f"\n⏱️  Montagem do BPLB de {quantidade} etiquetas ({distintas} distintas do corpus)")
+    parser = PPLAParser()
+    etiquetas = [parser._processar_etiqueta(etiqueta.encode('utf-8'), i)
+                 for i, (etiqueta, _) in enumerate(gerar_corpus(distintas), 1)]
+    lista = PPLAtoBPLBConverter()
+    lista.generator = _GeradorLista()
+    lista.generator.montar_fixos = lista._adicionar_fixos
+    nucleo = PPLAtoBPLBConverter()
+    assert [lista.converter_etiqueta_bytes(e) for e in etiquetas] == \
+        [nucleo.converter_etiqueta_bytes(e) for e in etiquetas]
+    
+    def converter(metodo):
+        def todas():
+            total = 0
+            for i in range(quantidade):
+                total += len(metodo(etiquetas[i % distintas]))
+            return total
+        return todas
+    
+    casos = (
+        ("lista de str + join + encode", converter(lista.converter_etiqueta_bytes)),
+        ("bytearray, bytes por etiqueta", converter(nucleo.converter_etiqueta_bytes)),
+        ("bytearray sem cópia (memoryview)", converter(nucleo.converter_etiqueta_buffer)),
+    )
+    tempos = []
+    for nome, funcao in casos:
+        tempos.append(min(timeit.repeat(funcao, repeat=3, number=1)))
+        print(f"  {nome:<40} {tempos[-1] / quantidade * 1e6:9.2f} µs")
+    print(f"  Ganho (bytes): {tempos[0] / tempos[1]:.2f}x   (sem cópia): {tempos[0] / tempos[2]:.2f}x")
+
+
+BENCHMARKS = {
+    'lexer': bench_lexer,
+    'classificador': bench_classificador,
+    'leitor': bench_leitor,
+    'memoria': bench_memoria,
+    'cabecalhos': bench_cabecalhos,
+    'layout': bench_layout,
+    'cache': bench_cache,
+    'diagnostico': bench_diagnostico,
+    'paralelo': bench_paralelo,
+    'preguicosa': bench_preguicosa,
+    'normalizacao': bench_normalizacao,
+    'formularios': bench_formularios,
+    'series': bench_series,
+    'transporte': bench_transporte,
+    'fila': bench_fila,
+    'ritmo': bench_ritmo,
+    'pool': bench_pool,
+    'nucleo': bench_nucleo,
+    'construtor': bench_construtor,
+}
+
+if __name__ == "__main__":
+    nomes = sys.argv[1:] or list(BENCHMARKS)
+    for nome in nomes:
+        if nome not in BENCHMARKS:
+            print(f"❌ Benchmark desconhecido: {nome}")
+            print(f"   Disponíveis: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[nome]()
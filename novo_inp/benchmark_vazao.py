@@ -0,0 +1,169 @@
+import argparse
+import contextlib
+import gc
+import os
+import re
+import tempfile
+import time
+
+from nucleo import config, PPLAParser, PPLAtoBPLBConverter, LeitorSpool, gerar_bplb_etiquetas
+from nucleo.paralelo import contar_para_paralelo
+from nucleo.cache_bplb import CacheBPLB
+from nucleo.layout_etiqueta import CacheLayouts
+from corpus_ppla import SEMENTE_PADRAO, escrever_corpus, gerar_corpus
+
+# ====================== VAZÃO DO NÚCLEO ======================
+# Uso: python benchmark_vazao.py [QUANTIDADE ...] [--semente N] [--paralelo]
+# Para cada quantidade grava um corpus sintético (corpus_ppla) e mede
+# etiquetas/s, MB/s e pico de RSS de cada etapa:
+#   análise  - parse_file + extrair_campos (MB do arquivo PPLA lido)
+#   conversão - campos -> BPLB com o PPLAtoBPLBConverter (MB de BPLB gerados)
+#   geração  - Imprime.txt -> arquivo BPLB, pelo mesmo caminho do monitor,
+#              sem cache e sem impressora (MB de BPLB gravados)
+# O pico de RSS vem de /proc (Linux) e é zerado no início de cada etapa;
+# entre parênteses, quanto a memória subiu durante a etapa.
+# Não usa impressora nem interface; roda direto no Linux.
+
+QUANTIDADES_PADRAO = (1, 1_000, 10_000, 100_000)
+
+# Etiquetas cujos campos lidos são conferidos com os do gerador
+_CONFERIDAS = 200
+
+
+def _status_kb(campo):
+    """Valor em kB de um campo de /proc/self/status (VmRSS, VmHWM), ou None"""
+    try:
+        with open('/proc/self/status') as f:
+            encontrado = re.search(rf'^{campo}:\s+(\d+)', f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def _reiniciar_pico():
+    """Zera o pico de RSS do processo (Linux 4.0+); False se não for possível"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _medir(nome, etapa):
+    """
+    Executa etapa() -> (etiquetas, bytes, resultado) e devolve a medição e o
+    resultado. O pico de RSS é o da etapa quando o sistema permite zerá-lo;
+    senão é o pico do processo até ali (marcado com *).
+    """
+    gc.collect()
+    inicial = _status_kb('VmRSS')
+    so_etapa = _reiniciar_pico()
+    inicio = time.perf_counter()
+    etiquetas, tamanho, resultado = etapa()
+    segundos = time.perf_counter() - inicio
+    pico = _status_kb('VmHWM')
+    return {
+        'nome': nome, 'etiquetas': etiquetas, 'bytes': tamanho, 'segundos': segundos,
+        'pico': pico, 'inicial': inicial, 'so_etapa': so_etapa,
+    }, resultado
+
+
+def _imprimir(medicao):
+    segundos = max(medicao['segundos'], 1e-9)
+    linha = (f"  {medicao['nome']:<12} {medicao['etiquetas'] / segundos:>14,.0f} "
+             f"{medicao['bytes'] / segundos / 1e6:>9.1f} {segundos:>9.2f}")
+    if medicao['pico'] is None:
+        linha += f" {'-':>11}"
+    else:
+        marca = '' if medicao['so_etapa'] else '*'
+        linha += (f" {medicao['pico'] / 1024:>9.1f}{marca:1} "
+                  f"(+{(medicao['pico'] - medicao['inicial']) / 1024:.1f})")
+    print(linha.replace(',', '.'))
+
+
+def _conferir(etiquetas, quantidade, semente):
+    """Campos lidos pelo parser x campos usados para gerar as primeiras etiquetas"""
+    for etiqueta, (_, campos) in zip(etiquetas[:_CONFERIDAS], gerar_corpus(quantidade, semente)):
+        for campo, valor in campos.items():
+            lido = getattr(etiqueta, campo)
+            assert lido == valor, f"etiqueta {etiqueta.numero}: {campo}={lido!r}, esperado {valor!r}"
+
+
+def medir_quantidade(quantidade, semente, pasta):
+    caminho = os.path.join(pasta, 'Imprime.txt')
+    inicio = time.perf_counter()
+    tamanho = escrever_corpus(caminho, quantidade, semente)
+    print(f"\n📦 {quantidade:_} etiquetas ({tamanho / 1e6:.1f} MB, semente {semente}, ".replace('_', '.') +
+          f"corpus gerado em {time.perf_counter() - inicio:.1f} s)")
+    print(f"  {'etapa':<12} {'etiquetas/s':>14} {'MB/s':>9} {'s':>9} {'pico RSS MB':>11}")
+
+    # Planos de layout novos: cada quantidade começa sem layouts conhecidos
+    parser = PPLAParser(layouts=CacheLayouts())
+
+    def analisar():
+        parser.parse_file(caminho)
+        parser.extrair_campos()
+        etiquetas = [etiqueta.campos for etiqueta in parser.etiquetas]
+        return len(etiquetas), tamanho, etiquetas
+
+    medicao, etiquetas = _medir("análise", analisar)
+    _imprimir(medicao)
+    _conferir(etiquetas, quantidade, semente)
+    parser.etiquetas = []
+
+    conversor = PPLAtoBPLBConverter()
+
+    def converter():
+        bplbs = [conversor.converter_etiqueta_bytes(etiqueta) for etiqueta in etiquetas]
+        return len(bplbs), sum(map(len, bplbs)), None
+
+    medicao, _ = _medir("conversão", converter)
+    _imprimir(medicao)
+    # Libera os campos antes da geração
+    etiquetas = None
+
+    saida = os.path.join(pasta, 'Imprime.bplb')
+
+    def gerar():
+        configuracao = conversor.assinatura_configuracao(parser)
+        total = escrito = 0
+        # Mensagens do núcleo (lotes em paralelo) não entram na medição
+        with LeitorSpool(caminho) as leitor, open(saida, 'wb') as f, \
+                open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+            resultados = gerar_bplb_etiquetas(
+                leitor.iterar_etiquetas(), 1, parser, conversor,
+                CacheBPLB(maximo_memoria=0), configuracao, contar_para_paralelo(caminho, leitor))
+            for _, bplb, _, _ in resultados:
+                total += 1
+                escrito += f.write(bplb)
+        return total, escrito, None
+
+    medicao, _ = _medir("geração", gerar)
+    _imprimir(medicao)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description="Vazão da análise e conversão PPLA -> BPLB")
+    argumentos.add_argument('quantidades', nargs='*', type=int, default=QUANTIDADES_PADRAO,
+                            help="etiquetas por corpus (de 1 a 1.000.000)")
+    argumentos.add_argument('--semente', type=int, default=SEMENTE_PADRAO)
+    argumentos.add_argument('--paralelo', action='store_true',
+                            help="usa os processos do config (LIMIAR_PARALELO) nos lotes grandes")
+    argumentos.add_argument('--pasta', help="onde gravar o corpus (padrão: pasta temporária)")
+    opcoes = argumentos.parse_args()
+
+    if not opcoes.paralelo:
+        config.LIMIAR_PARALELO = 0
+    if _status_kb('VmHWM') is None:
+        print("ℹ️  Sem /proc/self/status: pico de RSS não medido")
+    elif not _reiniciar_pico():
+        print("ℹ️  * pico de RSS do processo inteiro (não foi possível zerar por etapa)")
+
+    with tempfile.TemporaryDirectory(dir=opcoes.pasta) as pasta:
+        for quantidade in opcoes.quantidades:
+            medir_quantidade(quantidade, opcoes.semente, pasta)
+
+
+if __name__ == "__main__":
+    main()
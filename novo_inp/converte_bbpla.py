@@ -2,29 +2,15 @@ import os
 import time
 import hashlib
 from datetime import datetime
-import re
 
-class PPLAParser:
+from nucleo.analise import AnalisadorPPLA
+from nucleo.cabecalhos_ppla import comandos_texto_bplb
+
+class PPLAParser(AnalisadorPPLA):
+    """Analisador do núcleo com a conversão direta dos comandos PPLA para BPLB"""
+    
     def __init__(self):
-        self.data = {
-            'tipo': '',
-            'op': '',
-            'referencia': '',
-            'descricao': '',
-            'faccao': '',
-            'cidade': '',
-            'regiao': '',
-            'codigos': [],
-            'textos': [],
-            'comandos': {
-                'direcao': '',      # D11
-                'alinhamento': '',  # A2
-                'quantidade': '',   # Q0001
-                'final': False      # E
-            },
-            'posicoes_texto': [],   # Lista de posições dos textos
-            'outros_comandos': []   # Outros comandos encontrados
-        }
+        super().__init__()
         
         # Configurações BPLB padrão
         self.config_bplb = {
@@ -39,393 +25,6 @@ class PPLAParser:
             'margem_y': 30            # Margem padrão Y
         }
     
-    def parse_file(self, file_path):
-        """Analisa um arquivo PPLA completo"""
-        if not os.path.exists(file_path):
-            return False
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Limpar conteúdo - remover tags XML
-            content = re.sub(r'<[^>]*>', '', content)
-            
-            # Remover caracteres de controle (mantendo quebras de linha)
-            content = re.sub(r'[\x00-\x09\x0B-\x1F\x7F]', ' ', content)
-            
-            # Dividir por linhas
-            lines = content.split('\n')
-            
-            # Resetar dados
-            self.data = {
-                'tipo': '',
-                'op': '',
-                'referencia': '',
-                'descricao': '',
-                'faccao': '',
-                'cidade': '',
-                'regiao': '',
-                'codigos': [],
-                'textos': [],
-                'comandos': {
-                    'direcao': '',
-                    'alinhamento': '',
-                    'quantidade': '',
-                    'final': False
-                },
-                'posicoes_texto': [],
-                'outros_comandos': []
-            }
-            
-            # Processar cada linha
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Buscar comandos de texto que começam com "19"
-                # Formato: 19 + 13 caracteres de cabeçalho + texto
-                if line.startswith('19') and len(line) >= 15:
-                    # Extrair cabeçalho (13 caracteres após o '19')
-                    cabecalho = line[2:15]  # posições 2 a 14 (13 caracteres)
-                    # Extrair texto (começa na posição 15, índice 14)
-                    texto = line[15:].strip()
-                    if texto:
-                        self._processar_texto(texto, cabecalho)
-                
-                # Buscar por códigos específicos
-                elif line.startswith('1e') and len(line) > 2:
-                    codigo = line[2:].strip()
-                    if codigo:
-                        self.data['codigos'].append(codigo)
-                
-                # Buscar comandos de configuração
-                else:
-                    self._processar_comando(line)
-            
-            return True
-            
-        except Exception as e:
-            print(f"Erro ao analisar arquivo: {e}")
-            return False
-    
-    def _processar_comando(self, linha):
-        """Processa comandos de configuração da impressora"""
-        linha = linha.strip()
-        
-        # Comando D - Direção do texto
-        if linha.startswith('D') and len(linha) > 1:
-            self.data['comandos']['direcao'] = linha[1:]  # Remove o 'D'
-        
-        # Comando A - Alinhamento
-        elif linha.startswith('A') and len(linha) > 1:
-            self.data['comandos']['alinhamento'] = linha[1:]  # Remove o 'A'
-        
-        # Comando Q - Quantidade
-        elif linha.startswith('Q') and len(linha) > 1:
-            self.data['comandos']['quantidade'] = linha[1:]  # Remove o 'Q'
-        
-        # Comando E - Final
-        elif linha == 'E':
-            self.data['comandos']['final'] = True
-        
-        # Outros comandos importantes
-        elif linha.startswith(('M', 'O', 'V', 'f', 'L', 'H', 'S', 'P')):
-            # M - Velocidade
-            # O - Offset
-            # V - Velocidade de impressão
-            # f - Densidade térmica
-            # L - Início de formato
-            # H - Altura do caractere
-            # S - Largura do caractere
-            # P - Pitch
-            if linha not in self.data['outros_comandos']:
-                self.data['outros_comandos'].append(linha)
-    
-    def _analisar_cabecalho_posicao(self, cabecalho):
-        """
-        Analisa o cabeçalho de 13 caracteres para extrair informações de posição
-        Sintaxe: 1XXXXX000XXXXX (13 caracteres)
-        
-        Baseado no exemplo: 122300001000200
-        1 - orientacao
-        22 - font
-        30 - múltiplo altura e largura (3 para altura, 0 para largura)
-        000 - código de barras (se texto, ignorar)
-        0100 - coordenada Y (em pontos)
-        0200 - coordenada X (em pontos)
-        """
-        if len(cabecalho) < 13:
-            return None
-        
-        try:
-            # Verificar se o cabeçalho contém apenas dígitos
-            if cabecalho.isdigit():
-                # Exemplo: 122300001000200
-                orientacao = cabecalho[0]  # Primeiro dígito
-                fonte = cabecalho[1:3]     # Dois dígitos seguintes
-                multiplicador = cabecalho[3:5]  # Dois dígitos seguintes (altura e largura)
-                codigo_barras = cabecalho[5:8]  # Três dígitos seguintes
-                y_coord = cabecalho[8:12]  # Quatro dígitos seguintes (coordenada Y)
-                x_coord = cabecalho[12:16] if len(cabecalho) >= 16 else cabecalho[12:]  # Quatro dígitos seguintes (coordenada X)
-                
-                return {
-                    'orientacao': orientacao,
-                    'fonte': fonte,
-                    'multiplicador_altura': multiplicador[0] if len(multiplicador) > 0 else '',
-                    'multiplicador_largura': multiplicador[1] if len(multiplicador) > 1 else '',
-                    'codigo_barras': codigo_barras,
-                    'y': y_coord,
-                    'x': x_coord,
-                    'y_pontos': int(y_coord) if y_coord.isdigit() else 0,
-                    'x_pontos': int(x_coord) if x_coord.isdigit() else 0
-                }
-            else:
-                # Tentar extrair informações mesmo com letras
-                # Padrão comum: 11A1202510200
-                # Pode conter letras na parte da fonte ou multiplicadores
-                if len(cabecalho) >= 13:
-                    # Tentar extrair coordenadas que geralmente são números
-                    # As coordenadas geralmente estão no final
-                    ultimos_8 = cabecalho[-8:] if len(cabecalho) >= 8 else cabecalho
-                    
-                    # Tentar extrair Y e X como últimos 8 caracteres (4+4)
-                    if len(ultimos_8) >= 8 and ultimos_8[:4].isdigit() and ultimos_8[4:8].isdigit():
-                        return {
-                            'orientacao': cabecalho[0] if len(cabecalho) > 0 else '',
-                            'fonte': cabecalho[1:3] if len(cabecalho) >= 3 else '',
-                            'y': ultimos_8[:4],
-                            'x': ultimos_8[4:8],
-                            'y_pontos': int(ultimos_8[:4]),
-                            'x_pontos': int(ultimos_8[4:8]),
-                            'cabecalho_bruto': cabecalho
-                        }
-        
-        except (ValueError, IndexError) as e:
-            # Se houver erro na conversão, retornar None
-            return None
-        
-        return None
-    
-    def _processar_texto(self, texto, cabecalho=None):
-        """Processa e classifica o texto extraído, incluindo informações de posição"""
-        # Limpar o texto
-        texto_limpo = texto.strip()
-        
-        # Armazenar todos os textos para referência
-        self.data['textos'].append(texto_limpo)
-        
-        # Analisar informações de posição do cabeçalho
-        if cabecalho:
-            info_posicao = self._analisar_cabecalho_posicao(cabecalho)
-            if info_posicao:
-                info_posicao['texto'] = texto_limpo
-                info_posicao['cabecalho'] = cabecalho
-                self.data['posicoes_texto'].append(info_posicao)
-        
-        # Identificar tipo de informação
-        if not texto_limpo:
-            return
-        
-        # Verificar padrões específicos
-        if 'CONSERTO' in texto_limpo:
-            self.data['tipo'] = texto_limpo
-        elif texto_limpo.startswith('OP:'):
-            # Extrair o valor após "OP:"
-            partes = texto_limpo.split(':', 1)
-            if len(partes) > 1:
-                self.data['op'] = partes[1].strip()
-        elif texto_limpo.startswith('Ref:'):
-            partes = texto_limpo.split(':', 1)
-            if len(partes) > 1:
-                self.data['referencia'] = partes[1].strip()
-        elif 'CAMISETA' in texto_limpo:
-            self.data['descricao'] = texto_limpo
-        elif texto_limpo.startswith('Faccao:') or texto_limpo.startswith('Facção:'):
-            partes = texto_limpo.split(':', 1)
-            if len(partes) > 1:
-                self.data['faccao'] = partes[1].strip()
-        elif texto_limpo.startswith('Cidade:'):
-            partes = texto_limpo.split(':', 1)
-            if len(partes) > 1:
-                self.data['cidade'] = partes[1].strip()
-        elif texto_limpo.startswith('Regiao:') or texto_limpo.startswith('Região:'):
-            partes = texto_limpo.split(':', 1)
-            if len(partes) > 1:
-                self.data['regiao'] = partes[1].strip()
-        elif texto_limpo.replace('/', '').isdigit() or len(texto_limpo) >= 8:
-            # Possível código numérico (pelo menos 8 dígitos ou contém números)
-            # Verificar se parece ser um código
-            if any(c.isdigit() for c in texto_limpo) and len(texto_limpo) >= 5:
-                self.data['codigos'].append(texto_limpo)
-    
-    def _interpretar_comandos(self):
-        """Interpreta o significado dos comandos"""
-        interpretacoes = []
-        
-        # Interpretar direção (D)
-        direcao = self.data['comandos']['direcao']
-        if direcao:
-            if direcao == '11':
-                interpretacoes.append("📐 Direção: 0° (normal)")
-            elif direcao == '21':
-                interpretacoes.append("📐 Direção: 90°")
-            elif direcao == '31':
-                interpretacoes.append("📐 Direção: 180°")
-            elif direcao == '41':
-                interpretacoes.append("📐 Direção: 270°")
-            else:
-                interpretacoes.append(f"📐 Direção: D{direcao}")
-        
-        # Interpretar alinhamento (A)
-        alinhamento = self.data['comandos']['alinhamento']
-        if alinhamento:
-            if alinhamento == '2':
-                interpretacoes.append("↔️ Alinhamento: Esquerda")
-            elif alinhamento == '3':
-                interpretacoes.append("↔️ Alinhamento: Centro")
-            elif alinhamento == '4':
-                interpretacoes.append("↔️ Alinhamento: Direita")
-            else:
-                interpretacoes.append(f"↔️ Alinhamento: A{alinhamento}")
-        
-        # Interpretar quantidade (Q)
-        quantidade = self.data['comandos']['quantidade']
-        if quantidade:
-            try:
-                qtd_num = int(quantidade)
-                interpretacoes.append(f"🔢 Quantidade: {qtd_num:,} etiqueta(s)".replace(',', '.'))
-            except:
-                interpretacoes.append(f"🔢 Quantidade: Q{quantidade}")
-        
-        # Comando final
-        if self.data['comandos']['final']:
-            interpretacoes.append("🏁 Comando E: Fim do formato")
-        
-        return interpretacoes
-    
-    def _interpretar_posicoes(self):
-        """Interpreta as posições dos textos"""
-        interpretacoes = []
-        
-        for i, pos in enumerate(self.data['posicoes_texto']):
-            # Interpretar orientação
-            orientacao_map = {
-                '1': "0° (normal)",
-                '2': "90°",
-                '3': "180°", 
-                '4': "270°",
-                '5': "0° espelhado",
-                '6': "90° espelhado",
-                '7': "180° espelhado",
-                '8': "270° espelhado"
-            }
-            
-            orientacao = orientacao_map.get(pos.get('orientacao', ''), f"Desconhecida ({pos.get('orientacao', '')})")
-            
-            # Interpretar fonte
-            fonte_map = {
-                '11': "Fonte padrão 1",
-                '22': "Fonte 2",
-                '33': "Fonte 3",
-                '44': "Fonte 4"
-            }
-            
-            fonte = fonte_map.get(pos.get('fonte', ''), f"Fonte {pos.get('fonte', '')}")
-            
-            # Criar interpretação
-            interpretacao = f"📝 Texto {i+1}: '{pos.get('texto', '')[:30]}...'"
-            
-            if 'y_pontos' in pos and 'x_pontos' in pos:
-                interpretacao += f"\n     📍 Posição: X={pos['x_pontos']}pts, Y={pos['y_pontos']}pts"
-            
-            if pos.get('orientacao'):
-                interpretacao += f"\n     🧭 Orientação: {orientacao}"
-            
-            if pos.get('fonte'):
-                interpretacao += f"\n     🔤 Fonte: {fonte}"
-            
-            if pos.get('multiplicador_altura') or pos.get('multiplicador_largura'):
-                altura = pos.get('multiplicador_altura', '1')
-                largura = pos.get('multiplicador_largura', '1')
-                interpretacao += f"\n     ⚖️  Multiplicador: Altura={altura}x, Largura={largura}x"
-            
-            interpretacoes.append(interpretacao)
-        
-        return interpretacoes
-    
-    def print_summary(self):
-        """Imprime um resumo dos dados extraídos"""
-        print("\n" + "="*60)
-        print("RESUMO DA ETIQUETA PPLA")
-        print("="*60)
-        
-        if self.data['tipo']:
-            print(f"📌 Tipo: {self.data['tipo']}")
-        
-        if self.data['op']:
-            print(f"🔢 OP: {self.data['op']}")
-        
-        if self.data['referencia']:
-            print(f"🏷️  Referência: {self.data['referencia']}")
-        
-        if self.data['descricao']:
-            print(f"👕 Descrição: {self.data['descricao']}")
-        
-        if self.data['faccao']:
-            print(f"🏭 Facção: {self.data['faccao']}")
-        
-        if self.data['cidade']:
-            print(f"📍 Cidade: {self.data['cidade']}")
-        
-        if self.data['regiao']:
-            print(f"🗺️  Região: {self.data['regiao']}")
-        
-        # Comandos de impressão
-        print(f"\n⚙️  COMANDOS DE IMPRESSÃO:")
-        interpretacoes = self._interpretar_comandos()
-        for interpretacao in interpretacoes:
-            print(f"   • {interpretacao}")
-        
-        # Mostrar comandos brutos
-        comandos = self.data['comandos']
-        if comandos['direcao']:
-            print(f"     (D{comandos['direcao']})")
-        if comandos['alinhamento']:
-            print(f"     (A{comandos['alinhamento']})")
-        if comandos['quantidade']:
-            print(f"     (Q{comandos['quantidade']})")
-        if comandos['final']:
-            print(f"     (E)")
-        
-        # Posições dos textos
-        if self.data['posicoes_texto']:
-            print(f"\n🗺️  POSIÇÕES DOS TEXTOS:")
-            pos_interpretacoes = self._interpretar_posicoes()
-            for interpretacao in pos_interpretacoes:
-                # Separar por linhas para melhor formatação
-                linhas = interpretacao.split('\n')
-                for linha in linhas:
-                    print(f"   {linha}")
-        
-        # Outros comandos
-        if self.data['outros_comandos']:
-            print(f"\n🔧 Outros comandos identificados:")
-            for cmd in self.data['outros_comandos']:
-                print(f"   • {cmd}")
-        
-        if self.data['codigos']:
-            print(f"\n🔢 Códigos identificados:")
-            for codigo in self.data['codigos']:
-                print(f"   • {codigo}")
-        
-        print("\n📝 Textos extraídos:")
-        for texto in self.data['textos']:
-            print(f"   • {texto}")
-        
-        print("\n" + "="*60)
-    
     def converter_para_bplb(self):
         """
         Converte os dados extraídos do PPLA para a linguagem BPLB
@@ -506,44 +105,8 @@ class PPLAParser:
     
     def _gerar_comandos_texto_bplb(self):
         """Gera comandos A (texto) para BPLB baseado nas posições extraídas"""
-        comandos_texto = []
-        
-        for i, posicao in enumerate(self.data['posicoes_texto']):
-            texto = posicao.get('texto', '')
-            if not texto:
-                continue
-            
-            # Extrair parâmetros do texto PPLA para BPLB
-            # p1 -> coordenada x (converter pontos PPLA para BPLB)
-            x_ppla = posicao.get('x_pontos', 0)
-            x_bplb = self._converter_pontos_para_bplb(x_ppla, 'x')
-            
-            # p2 -> coordenada y
-            y_ppla = posicao.get('y_pontos', 0)
-            y_bplb = self._converter_pontos_para_bplb(y_ppla, 'y')
-            
-            # p3 -> rotação (0 a 3)
-            rotacao = self._converter_rotacao_para_bplb(posicao.get('orientacao', '1'))
-            
-            # p4 -> fonte (1 a 5)
-            fonte = self._converter_fonte_para_bplb(posicao.get('fonte', '11'))
-            
-            # p5 -> múltiplo horizontal
-            multiplo_h = posicao.get('multiplicador_largura', '1')
-            if not multiplo_h.isdigit():
-                multiplo_h = '1'
-            
-            # p6 -> múltiplo vertical
-            multiplo_v = posicao.get('multiplicador_altura', '1')
-            if not multiplo_v.isdigit():
-                multiplo_v = '1'
-            
-            # p7 -> reverso (n=não, r=reverso)
-            reverso = self._determinar_reverso(posicao)
-            
-            # Criar comando A
-            comando = f'A{x_bplb},{y_bplb},{rotacao},{fonte},{multiplo_h},{multiplo_v},{reverso},"{texto}"'
-            comandos_texto.append(comando)
+        # Coordenadas, rotação e fonte calculadas de uma vez para todas as posições
+        comandos_texto = comandos_texto_bplb(self.posicoes)
         
         # Se não houver posições de texto, criar comandos básicos dos textos extraídos
         if not comandos_texto and self.data['textos']:
@@ -558,67 +121,6 @@ class PPLAParser:
         
         return comandos_texto
     
-    def _converter_pontos_para_bplb(self, pontos_ppla, eixo='x'):
-        """
-        Converte pontos PPLA para coordenadas BPLB
-        Nota: Esta é uma conversão aproximada que pode precisar de calibração
-        """
-        if not isinstance(pontos_ppla, int):
-            try:
-                pontos_ppla = int(pontos_ppla)
-            except:
-                pontos_ppla = 0
-        
-        # Fator de conversão aproximado (8 pontos/mm para PPLA, BPLB usa pontos diferentes)
-        # Ajuste conforme necessário para sua impressora específica
-        if eixo == 'x':
-            return max(0, pontos_ppla // 8)  # Converter para milímetros aproximados
-        else:  # eixo y
-            return max(0, pontos_ppla // 8)  # Converter para milímetros aproximados
-    
-    def _converter_rotacao_para_bplb(self, orientacao_ppla):
-        """Converte orientação PPLA para rotação BPLB (0-3)"""
-        mapa_rotacao = {
-            '1': '0',  # 0°
-            '2': '1',  # 90°
-            '3': '2',  # 180°
-            '4': '3',  # 270°
-            '5': '0',  # 0° espelhado (tratar como normal)
-            '6': '1',  # 90° espelhado
-            '7': '2',  # 180° espelhado
-            '8': '3'   # 270° espelhado
-        }
-        return mapa_rotacao.get(orientacao_ppla, '0')
-    
-    def _converter_fonte_para_bplb(self, fonte_ppla):
-        """Converte fonte PPLA para fonte BPLB (1A a 5Z)"""
-        # Mapeamento aproximado de fontes
-        if fonte_ppla.startswith('11'):
-            return '1A'
-        elif fonte_ppla.startswith('22'):
-            return '2A'
-        elif fonte_ppla.startswith('33'):
-            return '3A'
-        elif fonte_ppla.startswith('44'):
-            return '4A'
-        elif fonte_ppla.startswith('55'):
-            return '5A'
-        else:
-            # Tentar extrair número da fonte
-            if fonte_ppla and fonte_ppla[0].isdigit():
-                num_fonte = min(5, max(1, int(fonte_ppla[0])))
-                return f'{num_fonte}A'
-            else:
-                return '1A'
-    
-    def _determinar_reverso(self, posicao):
-        """Determina se o texto deve ser reverso baseado na orientação PPLA"""
-        orientacao = posicao.get('orientacao', '1')
-        # Orientações 5-8 no PPLA são versões espelhadas
-        if orientacao in ['5', '6', '7', '8']:
-            return 'R'
-        return 'N'
-    
     def salvar_bplb(self, caminho_original, codigo_bplb):
         """Salva o código BPLB gerado em um arquivo"""
         try:
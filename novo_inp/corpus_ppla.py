@@ -0,0 +1,117 @@
+import random
+import sys
+
+from nucleo.classificador_campos import PALAVRAS_DESCRICAO_PADRAO
+
+# ====================== CORPUS PPLA SINTÉTICO ======================
+# Etiquetas no formato do Imprime.txt do ERP, nos dois modelos dos exemplos
+# (com e sem CONSERTO/região), com facções de tamanhos variados, acentos,
+# frações e códigos de barras. A mesma semente gera sempre o mesmo arquivo.
+# Uso: python corpus_ppla.py QUANTIDADE [ARQUIVO] [SEMENTE]
+
+SEMENTE_PADRAO = 1234
+
+_INICIO = """<xpml><page quantity='0' pitch='75.1 mm'></xpml>
+M0739
+O0220
+V0
+f324
+D
+<xpml></page></xpml><xpml><page quantity='1' pitch='75.1 mm'></xpml>
+L
+D11
+A2
+"""
+_FIM = "Q0001\nE\n<xpml></page></xpml><xpml><end/></xpml>"
+
+# Peças reconhecidas pelo vocabulário padrão do classificador
+_PECAS = tuple(p for p in PALAVRAS_DESCRICAO_PADRAO
+               if p not in ('MASC', 'FEM', 'INFANTIL', 'ADULTO', 'CASUAL', 'ROUPA'))
+_DETALHES = ('CASUAL', 'MASC', 'FEM', 'INFANTIL', 'ADULTO', 'MC', 'ML', 'BÁSICA',
+             'ESTAMPADA', 'LISTRADA', 'MOLETOM', 'JEANS', 'POLO', 'GOLA V')
+_NOMES_FACCAO = ('LP', 'ACABAMENTOS', 'TRANSPORTES', 'MARCELO', 'LONDRINA', 'RIGRETTE',
+                 'CONFECÇÕES', 'COSTURAS', 'JOÃO', 'MARIA', 'ESTAMPARIA', 'BORDADOS',
+                 'TÊXTIL', 'INDÚSTRIA', 'ATELIÊ', 'SÃO', 'JOSÉ', 'IRMÃOS', 'FACÇÃO')
+_SUFIXOS_FACCAO = ('', '', 'LTDA', 'ME', 'LTDA ME', 'EIRELI')
+_CIDADES = ('GUABIRUBA', 'BRUSQUE', 'LONDRINA', 'BLUMENAU', 'GASPAR', 'ITAJAÍ',
+            'SÃO JOÃO BATISTA', 'JARAGUÁ DO SUL', 'POMERODE', 'CAMBÉ')
+_REGIOES = ('SC - MEIO VALE', 'SC - VALE DO ITAJAÍ', 'SC - NORTE', 'PR - NORTE', 'SC - GRANDE FLORIANÓPOLIS')
+
+
+def _faccao(aleatorio):
+    """Facção de 1 a 6 nomes (de 2 a ~60 caracteres)"""
+    nomes = aleatorio.choices(_NOMES_FACCAO, k=aleatorio.randint(1, 6))
+    return ' '.join(nomes + [aleatorio.choice(_SUFIXOS_FACCAO)]).strip()
+
+
+def gerar_etiqueta(aleatorio, conserto=True):
+    """
+    Uma etiqueta PPLA (str) e os campos que o parser deve ler dela.
+    conserto=False segue o segundo exemplo: sem CONSERTO e sem região.
+    """
+    op = f"213{aleatorio.randrange(100000):05d}"
+    campos = {
+        'tipo': 'CONSERTO' if conserto else '',
+        'op': op,
+        'referencia': f"121{aleatorio.randrange(1000000):06d}",
+        'descricao': ' '.join([aleatorio.choice(_PECAS)] +
+                              aleatorio.sample(_DETALHES, aleatorio.randint(1, 3))),
+        'faccao': _faccao(aleatorio),
+        'cidade': aleatorio.choice(_CIDADES),
+        'regiao': aleatorio.choice(_REGIOES) if conserto else '',
+        # Código de barras: a OP seguida de 2 a 5 dígitos
+        'codigo_barras': op + str(aleatorio.randrange(10, 100000)),
+    }
+    total = aleatorio.randint(1, 20)
+    campos['fracao'] = f"{aleatorio.randint(1, total)}/{total}"
+
+    linhas = [_INICIO]
+    if conserto:
+        linhas.append("1911A1202510200CONSERTO\n")
+    linhas.append(
+        "1911A1202510044OP:\n"
+        "1911A1202250044Ref:\n"
+        f"1911A1202250089{campos['referencia']}\n"
+        f"1911A1402480089{op}\n"
+        f"1911A1201810044{campos['descricao']}\n"
+        "1911A1201390044Faccao:\n"
+        f"1911A1401360118{campos['faccao']}\n"
+        "1911A1201130044Cidade:\n"
+        f"1911A1201130118{campos['cidade']}\n")
+    if conserto:
+        linhas.append(
+            "1911A1200920044Regiao:\n"
+            f"1911A1200920118{campos['regiao']}\n")
+    linhas.append(
+        f"1e8405000330142C{campos['codigo_barras']}\n"
+        f"1911A1200140183{campos['codigo_barras']}\n"
+        f"1911A1402420338{campos['fracao']}\n")
+    linhas.append(_FIM)
+    return ''.join(linhas), campos
+
+
+def gerar_corpus(quantidade, semente=SEMENTE_PADRAO, proporcao_conserto=0.5):
+    """Gera (etiqueta, campos) para quantidade etiquetas, sem guardar o corpus em memória"""
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        yield gerar_etiqueta(aleatorio, aleatorio.random() < proporcao_conserto)
+
+
+def escrever_corpus(caminho, quantidade, semente=SEMENTE_PADRAO, proporcao_conserto=0.5):
+    """Grava o corpus como um Imprime.txt (UTF-8) e devolve o tamanho em bytes"""
+    tamanho = 0
+    with open(caminho, 'wb') as f:
+        for etiqueta, _ in gerar_corpus(quantidade, semente, proporcao_conserto):
+            tamanho += f.write((etiqueta + "\n").encode('utf-8'))
+    return tamanho
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python corpus_ppla.py QUANTIDADE [ARQUIVO] [SEMENTE]")
+        sys.exit(1)
+    quantidade = int(sys.argv[1])
+    caminho = sys.argv[2] if len(sys.argv) > 2 else "Imprime.txt"
+    semente = int(sys.argv[3]) if len(sys.argv) > 3 else SEMENTE_PADRAO
+    tamanho = escrever_corpus(caminho, quantidade, semente)
+    print(f"✅ {quantidade} etiqueta(s) gravada(s) em {caminho} ({tamanho / 1e6:.1f} MB, semente {semente})")
@@ -1,34 +1,49 @@
 import os
 import time
-import hashlib
-import re
-import win32print
-import win32api
-import unicodedata
+import multiprocessing
 from datetime import datetime
+
+import nucleo
+from nucleo import (ImpressoraBPLB, LeitorSpool, PosicaoSpool, FilaImpressao,
+                    impressora_padrao, pedir_destinos)
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 # ====================== CONFIGURAÇÃO DA IMPRESSORA ======================
 # Configura a impressora uma vez no início do programa
 IMPRESSORA_SELECIONADA = None
+# Impressoras do monitoramento (pool); a primeira é a IMPRESSORA_SELECIONADA
+IMPRESSORAS_MONITORAMENTO = []
 
 def configurar_impressora():
     """Configura a impressora uma vez no início do programa"""
-    global IMPRESSORA_SELECIONADA
+    global IMPRESSORA_SELECIONADA, IMPRESSORAS_MONITORAMENTO
     
     print("\n" + "="*60)
     print("🖨️  CONFIGURAÇÃO DA IMPRESSORA BPT-L42")
     print("="*60)
     
-    # Verificar se pywin32 está instalado
-    try:
-        import win32print
-        print("✅ pywin32 instalado")
-    except ImportError:
+    # Rede (TCP), dispositivo ou pasta: o destino é digitado, sem pywin32
+    transporte = nucleo.config.TRANSPORTE_IMPRESSORA
+    if transporte != 'spooler':
+        print(f"🔌 Transporte: {transporte}")
+        destinos = pedir_destinos(transporte, varios=True)
+        if destinos:
+            IMPRESSORAS_MONITORAMENTO = destinos
+            IMPRESSORA_SELECIONADA = destinos[0]
+            print(f"✅ Impressora configurada: {IMPRESSORA_SELECIONADA}")
+            if len(destinos) > 1:
+                print(f"✅ Monitoramento em {len(destinos)} impressoras: {', '.join(destinos)}")
+            return True
+        print("❌ Nenhum destino informado!")
+        return False
+    
+    # Verificar se pywin32 está instalado (spooler do Windows)
+    if nucleo.transporte.win32print is None:
         print("❌ pywin32 não está instalado!")
         print("   Instale com: pip install pywin32")
         return False
+    print("✅ pywin32 instalado")
     
     # Verificar se watchdog está instalado
     try:
@@ -57,16 +72,15 @@ def configurar_impressora():
             print(f"  {i:2d}.   {nome}")
     
     # Impressora padrão
-    try:
-        padrao = win32print.GetDefaultPrinter()
+    padrao = impressora_padrao()
+    if padrao:
         print(f"\n📌 Impressora padrão do sistema: {padrao}")
-    except:
-        padrao = None
     
     print("\nEscolha uma opção:")
     print("  0. Usar impressora padrão do sistema")
     for i, nome in enumerate(impressoras, 1):
         print(f"  {i}. {nome}")
+    print("  Várias separadas por vírgula (ex.: 1,3) dividem as etiquetas do monitoramento")
     
     while True:
         try:
@@ -75,16 +89,21 @@ def configurar_impressora():
             if escolha == "0" or escolha == "":
                 if padrao:
                     IMPRESSORA_SELECIONADA = padrao
+                    IMPRESSORAS_MONITORAMENTO = [padrao]
                     print(f"✅ Impressora configurada: {IMPRESSORA_SELECIONADA}")
                     return True
                 else:
                     print("❌ Nenhuma impressora padrão encontrada!")
                     continue
             
-            idx = int(escolha) - 1
-            if 0 <= idx < len(impressoras):
-                IMPRESSORA_SELECIONADA = impressoras[idx]
+            indices = [int(parte) - 1 for parte in escolha.split(",") if parte.strip()]
+            if indices and all(0 <= idx < len(impressoras) for idx in indices):
+                IMPRESSORAS_MONITORAMENTO = list(dict.fromkeys(impressoras[idx] for idx in indices))
+                IMPRESSORA_SELECIONADA = IMPRESSORAS_MONITORAMENTO[0]
                 print(f"✅ Impressora configurada: {IMPRESSORA_SELECIONADA}")
+                if len(IMPRESSORAS_MONITORAMENTO) > 1:
+                    print(f"✅ Monitoramento em {len(IMPRESSORAS_MONITORAMENTO)} impressoras: "
+                          f"{', '.join(IMPRESSORAS_MONITORAMENTO)}")
                 return True
             else:
                 print(f"❌ Opção inválida! Escolha entre 0 e {len(impressoras)}")
@@ -94,756 +113,76 @@ def configurar_impressora():
         except Exception as e:
             print(f"❌ Erro: {e}")
 
-# ====================== CLASSES DO SISTEMA ======================
-
-class BPLBGenerator:
-    def __init__(self):
-        self.comandos = []
-        self.largura_etiqueta = 800
-        self.altura_etiqueta = 550
-        
-    def remover_acentos(self, texto):
-        """Remove acentos e caracteres especiais"""
-        if not texto:
-            return ""
-        texto = unicodedata.normalize('NFKD', str(texto))
-        texto = ''.join([c for c in texto if not unicodedata.combining(c)])
-        texto = texto.replace('Ç', 'C').replace('ç', 'c')
-        texto = texto.replace('Ã', 'A').replace('ã', 'a')
-        texto = texto.replace('Õ', 'O').replace('õ', 'o')
-        texto = texto.replace('Â', 'A').replace('â', 'a')
-        texto = texto.replace('Ê', 'E').replace('ê', 'e')
-        texto = texto.replace('Î', 'I').replace('î', 'i')
-        texto = texto.replace('Ô', 'O').replace('ô', 'o')
-        texto = texto.replace('Û', 'U').replace('û', 'u')
-        return texto.upper()
-    
-    def iniciar_etiqueta(self):
-        """Inicia uma nova etiqueta BPLB"""
-        self.comandos = []
-        self.comandos.append("N")
-        self.comandos.append("D7")
-        self.comandos.append("S3")
-        self.comandos.append("JF")
-        self.comandos.append(f"Q{self.altura_etiqueta}")
-        self.comandos.append(f"q{self.largura_etiqueta}")
-        
-    def adicionar_texto(self, x, y, texto, fonte=2, tamanho_h=1, tamanho_v=1):
-        """Adiciona comando de texto BPLB"""
-        texto_limpo = self.remover_acentos(texto)
-        cmd = f"A{x},{y},0,{fonte},{tamanho_h},{tamanho_v},N,\"{texto_limpo}\""
-        self.comandos.append(cmd)
-        
-    def adicionar_codigo_barras(self, x, y, codigo, tipo=1, largura_fina=3, largura_larga=5, altura=80, exibir_texto='B'):
-        """Adiciona comando de código de barras BPLB"""
-        cmd = f"B{x},{y},0,{tipo},{largura_fina},{largura_larga},{altura},{exibir_texto},\"{codigo}\""
-        self.comandos.append(cmd)
-    
-    def adicionar_linha_horizontal(self, x, y, comprimento, espessura=1):
-        cmd = f"LE{x},{y},{comprimento},{espessura}"
-        self.comandos.append(cmd)
-    
-    def adicionar_linha_vertical(self, x, y, comprimento, espessura=1):
-        cmd = f"LE{x},{y},{espessura},{comprimento}"
-        self.comandos.append(cmd)
-    
-    def adicionar_borda(self, x1, y1, x2, y2, espessura=2):
-        self.comandos.append(f"LE{x1},{y1},{x2-x1},{espessura}")
-        self.comandos.append(f"LE{x1},{y2},{x2-x1},{espessura}")
-        self.comandos.append(f"LE{x1},{y1},{espessura},{y2-y1}")
-        self.comandos.append(f"LE{x2-espessura},{y1},{espessura},{y2-y1}")
-        
-    def finalizar_etiqueta(self, quantidade=1):
-        self.comandos.append(f"P{quantidade}")
-        
-    def obter_comandos(self):
-        return "\n".join(self.comandos) + "\n"
-    
-    def obter_comandos_bytes(self):
-        return self.obter_comandos().encode('utf-8', 'ignore')
-
-class PPLAtoBPLBConverter:
-    def __init__(self):
-        self.parser = PPLAParser()
-        self.generator = BPLBGenerator()
-        
-    def converter_etiqueta(self, etiqueta_data):
-        self.generator.iniciar_etiqueta()
-        largura = self.generator.largura_etiqueta
-        altura = self.generator.altura_etiqueta
-        
-        self.generator.adicionar_borda(20, 20, largura-20, altura-20, espessura=2)
-        
-        # Posição Y inicial
-        y_pos = 50
-        
-        # TIPO (CONSERTO) - se existir
-        if etiqueta_data.get('tipo'):
-            tipo = self.generator.remover_acentos(etiqueta_data['tipo'])
-            x_pos = (largura - len(tipo) * 18) // 3
-            self.generator.adicionar_texto(x_pos, y_pos, tipo, fonte=3, tamanho_h=3, tamanho_v=3)
-            y_pos += 70
-        
-        # Linha horizontal após o tipo (ou no topo se não houver tipo)
-        self.generator.adicionar_linha_horizontal(30, y_pos-10, largura-60)
-        y_pos += 20
-        
-        # OP e REF
-        op_texto = ""
-        if etiqueta_data.get('op'):
-            op_numeros = ''.join(filter(str.isdigit, str(etiqueta_data['op'])))
-            op_texto = f"OP: {op_numeros[:8]}"  # Aumentei para 12 caracteres
-        
-        ref_texto = ""
-        if etiqueta_data.get('referencia'):
-            ref_numeros = ''.join(filter(str.isdigit, str(etiqueta_data['referencia'])))
-            ref_texto = f"REF: {ref_numeros[:9]}"  # Aumentei para 12 caracteres
-        
-        # Fração (se existir)
-        fracao_texto = ""
-        if etiqueta_data.get('fracao'):
-            fracao_texto = self.generator.remover_acentos(str(etiqueta_data['fracao']))
-        
-        # Se tiver ambos OP e REF
-        if op_texto and ref_texto:
-            # OP na primeira linha
-            self.generator.adicionar_texto(40, y_pos, op_texto, fonte=3)
-            
-            # Fração no canto direito (se existir)
-            if fracao_texto:
-                x_fracao = largura - 50 - len(fracao_texto) * 24
-                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-            
-            y_pos += 30  # Espaço para a linha da REF
-            self.generator.adicionar_texto(40, y_pos, ref_texto, fonte=3)
-            y_pos += 40  # Espaçamento padrão após as duas linhas
-        
-        # Se tiver apenas OP
-        elif op_texto:
-            self.generator.adicionar_texto(40, y_pos, op_texto, fonte=3)
-            
-            # Fração no canto direito (se existir)
-            if fracao_texto:
-                x_fracao = largura - 40 - len(fracao_texto) * 24
-                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-            
-            y_pos += 40
-        
-        # Se tiver apenas REF
-        elif ref_texto:
-            self.generator.adicionar_texto(40, y_pos, ref_texto, fonte=3)
-            
-            # Fração no canto direito (se existir)
-            if fracao_texto:
-                x_fracao = largura - 40 - len(fracao_texto) * 24
-                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-            
-            y_pos += 40
-        
-        # Se não tiver OP nem REF, mas tiver fração
-        elif fracao_texto:
-            x_fracao = largura - 40 - len(fracao_texto) * 24
-            self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-            y_pos += 40
-        
-        else:
-            y_pos += 20
-        
-        # DESCRIÇÃO (produto)
-        if etiqueta_data.get('descricao'):
-            descricao = self.generator.remover_acentos(str(etiqueta_data['descricao']))
-            
-            # Quebra de linha inteligente
-            if len(descricao) > 30:
-                palavras = descricao.split()
-                linha_atual = []
-                comprimento_atual = 0
-                partes = []
-                
-                for palavra in palavras:
-                    if comprimento_atual + len(palavra) + 1 <= 30:
-                        linha_atual.append(palavra)
-                        comprimento_atual += len(palavra) + 1
-                    else:
-                        if linha_atual:
-                            partes.append(' '.join(linha_atual))
-                        linha_atual = [palavra]
-                        comprimento_atual = len(palavra)
-                
-                if linha_atual:
-                    partes.append(' '.join(linha_atual))
-                
-                # Limita a 2 linhas
-                for i, parte in enumerate(partes[:2]):
-                    x_centro = (largura - len(parte) * 12) // 2
-                    self.generator.adicionar_texto(x_centro, y_pos, parte, fonte=3)
-                    y_pos += 40 if i == 0 else 30
-            else:
-                x_centro = (largura - len(descricao) * 16) // 5
-                self.generator.adicionar_texto(x_centro, y_pos, descricao, fonte=3,tamanho_h=2, tamanho_v=2)
-                y_pos += 50
-        
-        y_pos += 20
-        
-        # FACÇÃO
-        if etiqueta_data.get('faccao'):
-            faccao = self.generator.remover_acentos(str(etiqueta_data['faccao']))
-            self.generator.adicionar_texto(40, y_pos, "FACCÃO:", fonte=3)
-            y_pos += 40
-            
-            # Quebra de linha para facção muito longa
-            if len(faccao) > 30:
-                partes = [faccao[i:i+30] for i in range(0, len(faccao), 30)]
-                for parte in partes[:2]:  # Limita a 2 linhas
-                    x_centro = (largura - len(parte) * 12) // 6
-                    self.generator.adicionar_texto(x_centro, y_pos, parte, fonte=2, tamanho_h=2, tamanho_v=2)
-                    y_pos += 30
-            else:
-                x_centro = (largura - len(faccao) * 12) // 6
-                self.generator.adicionar_texto(x_centro, y_pos, faccao, fonte=2, tamanho_h=2, tamanho_v=2)
-                y_pos += 40
-        
-        # CIDADE e REGIÃO
-        cidade_texto = ""
-        if etiqueta_data.get('cidade'):
-            cidade = self.generator.remover_acentos(str(etiqueta_data['cidade']))
-            cidade_texto = f"CIDADE: {cidade}"
-        
-        regiao_texto = ""
-        if etiqueta_data.get('regiao'):
-            regiao = self.generator.remover_acentos(str(etiqueta_data['regiao']))
-            regiao_texto = f"REGIAO: {regiao}"
-        
-        # Tenta colocar cidade e região na mesma linha
-        if cidade_texto and regiao_texto:
-            comprimento_total = len(cidade_texto) + len(regiao_texto) + 3
-            if comprimento_total * 8 <= largura - 80:
-                self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3)
-                self.generator.adicionar_texto(40 + len(cidade_texto) * 8 + 150, y_pos, regiao_texto, fonte=3)
-                y_pos += 40
-            else:
-                self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3)
-                y_pos += 40
-                self.generator.adicionar_texto(40, y_pos, regiao_texto, fonte=3)
-                y_pos += 40
-        
-        # Apenas cidade
-        elif cidade_texto:
-            self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3)
-            y_pos += 40
-        
-        # Apenas região
-        elif regiao_texto:
-            self.generator.adicionar_texto(40, y_pos, regiao_texto, fonte=3)
-            y_pos += 40
-        
-        # CÓDIGO DE BARRAS (nova funcionalidade)
-        if etiqueta_data.get('codigo_barras'):
-            codigo = str(etiqueta_data['codigo_barras'])
-            # Adicionar espaço antes do código de barras
-            y_pos += 20
-            
-            # Centralizar o código de barras
-            # Estimativa: cada caractere do código 128 tem cerca de 11 unidades de largura
-            largura_estimada = len(codigo) * 11 * 3  # 3 é a largura da barra fina
-            x_barcode = max(100, (largura - largura_estimada) // 2)
-            
-            # Adicionar código de barras
-            self.generator.adicionar_codigo_barras(
-                x_barcode, 
-                y_pos, 
-                codigo,
-                tipo=1,           # Code128
-                largura_fina=3,   # Largura da barra fina
-                largura_larga=5,  # Largura da barra larga  
-                altura=80,        # Altura do código de barras
-                exibir_texto='B'  # Exibir texto abaixo
-            )
-            
-            # Espaço após código de barras
-            y_pos += 100
-        
-        # Finalizar etiqueta
-        self.generator.finalizar_etiqueta()
-        return self.generator.obter_comandos()
-
-class ImpressoraBPLB:
-    def __init__(self, nome_impressora=None):
-        self.nome_impressora = nome_impressora or IMPRESSORA_SELECIONADA
-        self.conexao_ativa = False
-        
-    def listar_impressoras(self):
-        try:
-            impressoras = win32print.EnumPrinters(
-                win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
-            )
-            return [printer[2] for printer in impressoras]
-        except:
-            return []
-    
-    def enviar_comandos(self, comandos_bplb):
-        """Envia comandos BPLB para a impressora configurada"""
-        if not self.nome_impressora:
-            print("❌ Nenhuma impressora configurada!")
-            return False
-        
-        try:
-            if isinstance(comandos_bplb, str):
-                dados = comandos_bplb.encode('utf-8', 'ignore')
-            else:
-                dados = comandos_bplb
-            
-            hprinter = win32print.OpenPrinter(self.nome_impressora)
-            
-            try:
-                job_id = win32print.StartDocPrinter(hprinter, 1, ("Etiqueta BPLB", None, "RAW"))
-                win32print.StartPagePrinter(hprinter)
-                win32print.WritePrinter(hprinter, dados)
-                win32print.EndPagePrinter(hprinter)
-                win32print.EndDocPrinter(hprinter)
-                
-                print(f"✅ Comandos enviados para {self.nome_impressora}")
-                self.conexao_ativa = True
-                return True
-                
-            except Exception as e:
-                print(f"❌ Erro ao enviar para impressora: {e}")
-                return False
-            finally:
-                win32print.ClosePrinter(hprinter)
-                
-        except Exception as e:
-            print(f"❌ Erro de conexão com impressora: {e}")
-            return False
-
-class PPLAParser:
-    def __init__(self):
-        self.etiquetas = []
-    
-    def parse_file(self, file_path):
-        if not os.path.exists(file_path):
-            return False
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            padrao_etiqueta = r'(<xpml><page quantity=\'0\'[^>]*>.*?Q0001\s*E\s*<xpml></page></xpml><xpml><end/></xpml>)'
-            etiquetas_raw = re.findall(padrao_etiqueta, content, re.DOTALL)
-            
-            if not etiquetas_raw:
-                padrao_alternativo = r'(n.*?Q0001\s*E\s*)'
-                etiquetas_raw = re.findall(padrao_alternativo, content, re.DOTALL)
-            
-            self.etiquetas = []
-            
-            for i, etiqueta_raw in enumerate(etiquetas_raw):
-                etiqueta_data = self._processar_etiqueta(etiqueta_raw, i+1)
-                if etiqueta_data:
-                    self.etiquetas.append(etiqueta_data)
-            
-            return len(self.etiquetas) > 0
-            
-        except Exception as e:
-            print(f"Erro ao analisar arquivo: {e}")
-            return False
-    
-    def _processar_etiqueta(self, etiqueta_raw, numero_etiqueta):
-        content = re.sub(r'<[^>]*>', '', etiqueta_raw)
-        content = re.sub(r'[\x00-\x09\x0B-\x1F\x7F]', ' ', content)
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        
-        data = {
-            'numero': numero_etiqueta,
-            'tipo': '',
-            'op': '',
-            'referencia': '',
-            'descricao': '',
-            'faccao': '',
-            'cidade': '',
-            'regiao': '',
-            'fracao': '',
-            'codigo_barras': '',
-            'codigos': [],
-            'textos': []
-        }
-        
-        textos_coletados = []
-        for line in lines:
-            if line.startswith('19') and len(line) >= 15:
-                texto = line[15:].strip()
-                if texto:
-                    textos_coletados.append(texto)
-            elif line.startswith('1e') and len(line) > 2:
-                codigo = line[2:].strip()
-                if codigo:
-                    data['codigos'].append(codigo)
-        
-        self._processar_textos_inteligente(textos_coletados, data)
-        return data
-    
-    def _processar_textos_inteligente(self, textos, data):
-            """Processa textos de forma inteligente, independente da presença de 'CONSERTO'"""
-            print(f"DEBUG: Textos recebidos: {textos}")
-            
-            i = 0
-            while i < len(textos):
-                texto = textos[i]
-                print(f"DEBUG: Posição {i}: '{texto}'")
-                
-                # Tipo (CONSERTO)
-                if texto == 'CONSERTO':
-                    data['tipo'] = texto
-                    print(f"DEBUG: Encontrou CONSERTO")
-                    i += 1
-                    continue
-                    
-                # OP:
-                elif texto == 'OP:':
-                    print(f"DEBUG: Encontrou OP: na posição {i}")
-                    # A OP vem DEPOIS da referência no formato!
-                    # Não coletamos aqui, vamos coletar depois de encontrar a referência
-                    i += 1
-                    continue
-                    
-                # Ref: - CORREÇÃO PRINCIPAL
-                elif texto == 'Ref:':
-                    print(f"DEBUG: Encontrou Ref: na posição {i}")
-                    
-                    # Procurar o número de referência na PRÓXIMA linha não vazia
-                    j = i + 1
-                    # Pular linhas vazias
-                    while j < len(textos) and (not textos[j] or textos[j].strip() == ''):
-                        j += 1
-                    
-                    if j < len(textos):
-                        ref_texto = textos[j]
-                        print(f"DEBUG: Texto após Ref:: '{ref_texto}'")
-                        
-                        # Extrair apenas números
-                        ref_numeros = ''.join(filter(str.isdigit, ref_texto))
-                        print(f"DEBUG: Números extraídos da referência: '{ref_numeros}'")
-                        
-                        if ref_numeros and len(ref_numeros) >= 6:
-                            data['referencia'] = ref_numeros
-                            print(f"DEBUG: Referência definida como: {data['referencia']}")
-                            
-                            # AGORA, procurar a OP (que vem DEPOIS da referência)
-                            k = j + 1
-                            # Pular linhas vazias
-                            while k < len(textos) and (not textos[k] or textos[k].strip() == ''):
-                                k += 1
-                            
-                            if k < len(textos) and not textos[k].startswith(('Faccao:', 'Facção:', 'Cidade:', 'Regiao:', 'Região:')):
-                                op_texto = textos[k]
-                                print(f"DEBUG: Texto após referência (candidato a OP): '{op_texto}'")
-                                
-                                # Extrair apenas números para OP
-                                op_numeros = ''.join(filter(str.isdigit, op_texto))
-                                print(f"DEBUG: Números extraídos para OP: '{op_numeros}'")
-                                
-                                if op_numeros and len(op_numeros) >= 6:
-                                    data['op'] = op_numeros
-                                    print(f"DEBUG: OP definida como: {data['op']}")
-                                    i = k + 1
-                                    continue
-                            else:
-                                i = j + 1
-                                continue
-                    i += 1
-                    continue
-                    
-                # Faccao:
-                elif texto in ('Faccao:', 'Facção:'):
-                    print(f"DEBUG: Encontrou Faccao: na posição {i}")
-                    j = i + 1
-                    while j < len(textos) and (not textos[j] or textos[j].strip() == ''):
-                        j += 1
-                    if j < len(textos):
-                        data['faccao'] = textos[j]
-                        print(f"DEBUG: Facção definida como: {data['faccao']}")
-                    i = j + 1 if j < len(textos) else i + 1
-                    continue
-                    
-                # Cidade:
-                elif texto == 'Cidade:':
-                    print(f"DEBUG: Encontrou Cidade: na posição {i}")
-                    j = i + 1
-                    while j < len(textos) and (not textos[j] or textos[j].strip() == ''):
-                        j += 1
-                    if j < len(textos):
-                        data['cidade'] = textos[j]
-                        print(f"DEBUG: Cidade definida como: {data['cidade']}")
-                    i = j + 1 if j < len(textos) else i + 1
-                    continue
-                    
-                # Regiao:
-                elif texto in ('Regiao:', 'Região:'):
-                    print(f"DEBUG: Encontrou Regiao: na posição {i}")
-                    j = i + 1
-                    while j < len(textos) and (not textos[j] or textos[j].strip() == ''):
-                        j += 1
-                    if j < len(textos):
-                        data['regiao'] = textos[j]
-                        print(f"DEBUG: Região definida como: {data['regiao']}")
-                    i = j + 1 if j < len(textos) else i + 1
-                    continue
-                    
-                # Fração (ex: "2/2", "1/1")
-                elif re.match(r'^\d+/\d+$', texto):
-                    data['fracao'] = texto
-                    print(f"DEBUG: Fração encontrada: {data['fracao']}")
-                    
-                    # Procurar código de barras (número longo antes da fração)
-                    for m in range(1, 4):
-                        if i - m >= 0:
-                            texto_anterior = textos[i - m]
-                            if re.match(r'^\d{8,}$', texto_anterior):
-                                data['codigo_barras'] = texto_anterior
-                                print(f"DEBUG: Código de barras encontrado: {data['codigo_barras']}")
-                                break
-                    i += 1
-                    continue
-                    
-                # Descrição (produto) - se ainda não encontramos
-                elif (not data.get('descricao') and
-                      len(texto) > 5 and
-                      not texto.endswith(':') and
-                      not re.match(r'^\d+/\d+$', texto) and
-                      not re.match(r'^\d{8,}$', texto) and
-                      texto not in ['OP:', 'Ref:', 'Faccao:', 'Facção:', 'Cidade:', 'Regiao:', 'Região:', 'CONSERTO'] and
-                      texto != data.get('op') and
-                      texto != data.get('referencia')):
-                    
-                    print(f"DEBUG: Candidato a descrição: '{texto}'")
-                    
-                    # Verifica se parece uma descrição de produto
-                    palavras_descricao = ['CAMISETA', 'CAMISA', 'BLUSA', 'CALCA', 'CALÇA', 'BERMUDA', 
-                                          'SHORT', 'VESTIDO', 'SAIA', 'CASACO', 'JAQUETA', 'ROUPA',
-                                          'MASC', 'FEM', 'INFANTIL', 'ADULTO', 'CASUAL']
-                    texto_upper = texto.upper()
-                    if any(palavra in texto_upper for palavra in palavras_descricao):
-                        data['descricao'] = texto
-                        print(f"DEBUG: Descrição definida como: {data['descricao']}")
-                    i += 1
-                    continue
-                    
-                # Código de barras (identificação alternativa)
-                elif (re.match(r'^\d{8,}$', texto) and 
-                      not data.get('codigo_barras') and 
-                      not texto == data.get('op') and 
-                      not texto == data.get('referencia')):
-                    
-                    print(f"DEBUG: Candidato a código de barras: '{texto}'")
-                    
-                    # Verificar se tem fração depois (mas não necessariamente imediatamente)
-                    tem_fracao_depois = False
-                    for k in range(i+1, min(i+4, len(textos))):
-                        if re.match(r'^\d+/\d+$', textos[k]):
-                            tem_fracao_depois = True
-                        break
-                    
-                    if tem_fracao_depois:
-                        data['codigo_barras'] = texto
-                        print(f"DEBUG: Código de barras definido: {data['codigo_barras']}")
-                    i += 1
-                    continue
-                    
-                i += 1
-            
-            print(f"DEBUG: Dados finais: {data}")
-            
-            # Pós-processamento: se não encontrou descrição ainda, tenta uma abordagem diferente
-            if not data.get('descricao'):
-                self._encontrar_descricao_fallback(textos, data)
-    
-    def _encontrar_descricao_fallback(self, textos, data):
-        """Tenta encontrar a descrição usando lógica alternativa"""
-        # Procura por texto significativo que não seja nenhum dos outros campos
-        for texto in textos:
-            if (len(texto) > 5 and
-                not texto.endswith(':') and
-                not re.match(r'^\d+/\d+$', texto) and
-                not re.match(r'^\d{8,}$', texto) and
-                texto not in ['OP:', 'Ref:', 'Faccao:', 'Facção:', 'Cidade:', 'Regiao:', 'Região:', 'CONSERTO'] and
-                texto != data.get('op') and
-                texto != data.get('referencia') and
-                texto != data.get('faccao') and
-                texto != data.get('cidade') and
-                texto != data.get('regiao') and
-                texto != data.get('codigo_barras')):
-                
-                # Verifica se parece uma descrição razoável
-                palavras_comuns = ['DE', 'DA', 'DO', 'E', 'PARA', 'COM']
-                palavras = texto.upper().split()
-                if len(palavras) >= 2:
-                    data['descricao'] = texto
-                    break
-
-# ====================== FUNÇÕES PRINCIPAIS ======================
+# ====================== PROCESSAMENTO ======================
+# Análise, conversão, cache e envio ficam no núcleo compartilhado;
+# a configuração (vocabulário, codepage, cache, paralelo) está em nucleo/config.py
 
-def visualizar_etiqueta_bplb(comandos_bplb):
-    print("\n📋 VISUALIZAÇÃO DA ETIQUETA BPLB:")
-    print("=" * 50)
-    
-    textos = []
-    codigos_barras = []
-    
-    for linha in comandos_bplb.split('\n'):
-        if linha.startswith('A'):
-            partes = linha.split('"')
-            if len(partes) >= 2:
-                textos.append(partes[1])
-        elif linha.startswith('B'):
-            partes = linha.split('"')
-            if len(partes) >= 2:
-                codigos_barras.append(f"[CÓDIGO DE BARRAS: {partes[1]}]")
-    
-    largura = 50
-    print("┌" + "─" * largura + "┐")
-    
-    # Mostrar textos normais
-    for texto in textos:
-        if texto:
-            if len(texto) > largura:
-                texto = texto[:largura-3] + "..."
-            espacos = largura - len(texto)
-            margem_esq = espacos // 2
-            margem_dir = espacos - margem_esq
-            print(f"│{' ' * margem_esq}{texto}{' ' * margem_dir}│")
-    
-    # Mostrar código de barras (se houver)
-    for codigo in codigos_barras:
-        if len(codigo) > largura:
-            codigo = codigo[:largura-3] + "..."
-        espacos = largura - len(codigo)
-        margem_esq = espacos // 2
-        margem_dir = espacos - margem_esq
-        print(f"│{' ' * margem_esq}{codigo}{' ' * margem_dir}│")
-        # Linha representando o código de barras
-        barras = "█" * (largura - 4)
-        print(f"│ {barras} │")
-    
-    print("└" + "─" * largura + "┘")
-
-def processar_e_imprimir(file_path, imprimir=True):
+def processar_e_imprimir(file_path, imprimir=True, leitor=None, inicio=0, numero_inicial=1, fila=None):
     """Processa arquivo PPLA e imprime usando a impressora configurada"""
-    global IMPRESSORA_SELECIONADA
-    
-    print(f"\n📄 Processando: {file_path}")
-    print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    print(f"🖨️  Impressora: {IMPRESSORA_SELECIONADA}")
-    print("-" * 60)
-    
-    parser = PPLAParser()
-    if not parser.parse_file(file_path):
-        print("❌ Falha ao processar arquivo ou nenhuma etiqueta encontrada")
-        return
-    
-    print(f"✅ {len(parser.etiquetas)} etiqueta(s) encontrada(s)")
-    
-    impressora = None
-    if imprimir:
-        if not IMPRESSORA_SELECIONADA:
-            print("❌ Nenhuma impressora configurada!")
-            print("   Use a opção 3 para configurar uma impressora.")
-            imprimir = False
-        else:
-            impressora = ImpressoraBPLB(IMPRESSORA_SELECIONADA)
-    
-    converter = PPLAtoBPLBConverter()
-    
-    for i, etiqueta in enumerate(parser.etiquetas):
-        print(f"\n🔄 Convertendo etiqueta {i+1}...")
-        
-        comandos_bplb = converter.converter_etiqueta(etiqueta)
-        visualizar_etiqueta_bplb(comandos_bplb)
-        
-        nome_base = os.path.splitext(os.path.basename(file_path))[0]
-        pasta_bplb = os.path.join(os.path.dirname(file_path), "bplb_output")
-        
-        if not os.path.exists(pasta_bplb):
-            os.makedirs(pasta_bplb)
-        
-        arquivo_bplb = os.path.join(pasta_bplb, f"{nome_base}_etq{i+1}.bplb")
-        
-        try:
-            with open(arquivo_bplb, 'w', encoding='utf-8') as f:
-                f.write(comandos_bplb)
-            print(f"💾 Comandos BPLB salvos em: {arquivo_bplb}")
-            
-            print("\n📄 PREVIEW DO ARQUIVO BPLB:")
-            print("-" * 40)
-            linhas = comandos_bplb.split('\n')[:15]
-            for linha in linhas:
-                if linha.strip():
-                    print(f"  {linha[:60]}..." if len(linha) > 60 else f"  {linha}")
-            print("-" * 40)
-            
-        except Exception as e:
-            print(f"⚠️  Erro ao salvar arquivo BPLB: {e}")
-        
-        if imprimir and impressora:
-            print(f"\n🖨️  Enviando etiqueta {i+1} para impressão...")
-            if impressora.enviar_comandos(comandos_bplb):
-                print(f"✅ Etiqueta {i+1} enviada com sucesso!")
-            else:
-                print(f"❌ Falha ao enviar etiqueta {i+1}")
-            
-            if i < len(parser.etiquetas) - 1:
-                time.sleep(2)
-    
-    print("\n" + "="*60)
-    print("✅ Processamento concluído!")
-    if imprimir and impressora:
-        print(f"📤 Total de {len(parser.etiquetas)} etiqueta(s) enviada(s) para {IMPRESSORA_SELECIONADA}")
-    print("="*60)
+    return nucleo.processar_e_imprimir(file_path, imprimir, IMPRESSORA_SELECIONADA,
+                                       leitor, inicio, numero_inicial, fila)
 
 # ====================== MONITORAMENTO ======================
 
 class ArquivoAlteradoHandler(FileSystemEventHandler):
     def __init__(self):
-        self.ultimo_hash = None
-        self.arquivo_processando = False
+        # Até onde o Imprime.txt já foi impresso; o ERP só acrescenta etiquetas
+        self.posicao = PosicaoSpool()
+        # Leitura e impressão fora da linha do watchdog, em uma ou mais impressoras
+        self.fila = FilaImpressao(IMPRESSORAS_MONITORAMENTO or IMPRESSORA_SELECIONADA,
+                                  self.processar_alteracao)
+        self.fila.iniciar()
         print(f"\n🔍 Monitorando alterações no arquivo...")
         print(f"📁 Pasta: C:\\Imp")
         print(f"📄 Arquivo: Imprime.txt")
-        print(f"🖨️  Impressora: {IMPRESSORA_SELECIONADA}")
+        print(f"🖨️  Impressora: {self.fila.nome_impressora}")
+        if len(self.fila.membros) > 1:
+            print(f"⚖️  Distribuição: {self.fila.estrategia}")
         print("⏳ Aguardando alterações...")
     
     def on_modified(self, event):
+        # Na linha do watchdog: só anota o arquivo para a fila
         if not event.is_directory and event.src_path.endswith('Imprime.txt'):
-            print(f"\n🔄 Alteração detectada em: {event.src_path}")
+            if self.fila.avisar(event.src_path):
+                estado = self.fila.estado()
+                print(f"\n🔄 Alteração detectada em: {event.src_path} "
+                      f"(fila: {estado['fila']}/{estado['maximo']})")
+    
+    def processar_alteracao(self, caminho):
+        """Lê o trecho novo do Imprime.txt e põe as etiquetas na fila (linha de leitura)"""
+        with LeitorSpool(caminho) as leitor:
+            etiquetas_antes = self.posicao.etiquetas
+            inicio = self.posicao.inicio_para(leitor)
             
-            if self.arquivo_processando:
-                print("⚠️  Já processando arquivo, aguarde...")
-                return
-                
-            self.arquivo_processando = True
+            if inicio == 0 and etiquetas_antes:
+                print("⚠️  Arquivo truncado ou reescrito, processando desde o início...")
             
-            try:
-                time.sleep(0.5)
-                hash_atual = self.calcular_hash(event.src_path)
-                
-                if hash_atual != self.ultimo_hash:
-                    self.ultimo_hash = hash_atual
-                    print(f"📊 Hash do arquivo: {hash_atual[:16]}...")
-                    print("🔄 Iniciando processamento...")
-                    processar_e_imprimir(event.src_path, imprimir=True)
-                else:
-                    print("ℹ️  Arquivo não mudou (mesmo hash), ignorando...")
-                    
-            except Exception as e:
-                print(f"❌ Erro ao processar arquivo alterado: {e}")
-            finally:
-                self.arquivo_processando = False
-    
-    def calcular_hash(self, file_path):
-        try:
-            with open(file_path, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()
-        except:
-            return None
+            # Só espaços/quebras de linha depois da última etiqueta não contam
+            if inicio and not leitor.buffer[inicio:].tobytes().strip():
+                print("ℹ️  Nada novo no arquivo, ignorando...")
+                return
+            print(f"📊 {len(leitor) - inicio} byte(s) novo(s) a partir do byte {inicio}")
+            # Com a fila cheia a leitura espera a impressora: o arquivo não
+            # fica mapeado (preso para o ERP) durante essa espera
+            trecho = leitor.copiar(inicio)
+        
+        print("🔄 Iniciando processamento...")
+        total = processar_e_imprimir(caminho, imprimir=True, leitor=trecho, inicio=inicio,
+                                     numero_inicial=self.posicao.etiquetas + 1,
+                                     fila=self.fila)
+        self.posicao.avancar(trecho, total)
+    
+    def parar(self):
+        """Imprime o que ainda está na fila e encerra as linhas"""
+        estado = self.fila.estado()
+        if estado['fila']:
+            print(f"⏳ Imprimindo {estado['fila']} trabalho(s) ainda na fila...")
+        self.fila.parar()
+        print(f"📤 {self.fila.enviados} trabalho(s) enviado(s), {self.fila.falhas} falha(s)")
+        if len(self.fila.membros) > 1:
+            for impressora in self.fila.estado()['impressoras']:
+                print(f"   {impressora['nome']}: {impressora['enviados']} enviado(s), "
+                      f"{impressora['falhas']} falha(s)")
 
 def iniciar_monitoramento():
     """Inicia o monitoramento da pasta C:\Imp"""
@@ -881,7 +220,7 @@ def iniciar_monitoramento():
     print(f"{'='*60}")
     print(f"📁 Pasta: {pasta_monitorada}")
     print(f"📄 Arquivo: {arquivo_alvo}")
-    print(f"🖨️  Impressora: {IMPRESSORA_SELECIONADA}")
+    print(f"🖨️  Impressora: {', '.join(IMPRESSORAS_MONITORAMENTO) or IMPRESSORA_SELECIONADA}")
     print(f"📅 Início: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     print(f"\n📝 O que fazer:")
     print(f"   1. Cole o conteúdo PPLA no arquivo {arquivo_alvo}")
@@ -905,6 +244,7 @@ def iniciar_monitoramento():
         print(f"❌ Erro no monitoramento: {e}")
     
     observer.join()
+    event_handler.parar()
     print("👋 Monitoramento encerrado.")
 
 def testar_exemplo():
@@ -1057,6 +397,10 @@ def menu_principal():
 # ====================== EXECUÇÃO PRINCIPAL ======================
 
 if __name__ == "__main__":
+    # Executável do PyInstaller: os processos da análise em paralelo
+    # precisam disto para não abrirem o menu de novo
+    multiprocessing.freeze_support()
+    
     # Configurar impressora uma vez no início
     if configurar_impressora():
         print(f"\n✅ Impressora configurada com sucesso!")
@@ -1,11 +1,10 @@
 import os
 import time
 import hashlib
-import re
-import win32print
-import win32api
-import unicodedata
 from datetime import datetime
+
+import nucleo
+from nucleo import ImpressoraBPLB, FilaImpressao, impressora_padrao, pedir_destinos
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
@@ -21,14 +20,24 @@ def configurar_impressora():
     print("🖨️  CONFIGURAÇÃO DA IMPRESSORA BPT-L42")
     print("="*60)
     
-    # Verificar se pywin32 está instalado
-    try:
-        import win32print
-        print("✅ pywin32 instalado")
-    except ImportError:
+    # Rede (TCP), dispositivo ou pasta: o destino é digitado, sem pywin32
+    transporte = nucleo.config.TRANSPORTE_IMPRESSORA
+    if transporte != 'spooler':
+        print(f"🔌 Transporte: {transporte}")
+        destinos = pedir_destinos(transporte)
+        if destinos:
+            IMPRESSORA_SELECIONADA = destinos[0]
+            print(f"✅ Impressora configurada: {IMPRESSORA_SELECIONADA}")
+            return True
+        print("❌ Nenhum destino informado!")
+        return False
+    
+    # Verificar se pywin32 está instalado (spooler do Windows)
+    if nucleo.transporte.win32print is None:
         print("❌ pywin32 não está instalado!")
         print("   Instale com: pip install pywin32")
         return False
+    print("✅ pywin32 instalado")
     
     # Verificar se watchdog está instalado
     try:
@@ -57,11 +66,9 @@ def configurar_impressora():
             print(f"  {i:2d}.   {nome}")
     
     # Impressora padrão
-    try:
-        padrao = win32print.GetDefaultPrinter()
+    padrao = impressora_padrao()
+    if padrao:
         print(f"\n📌 Impressora padrão do sistema: {padrao}")
-    except:
-        padrao = None
     
     print("\nEscolha uma opção:")
     print("  0. Usar impressora padrão do sistema")
@@ -94,501 +101,21 @@ def configurar_impressora():
         except Exception as e:
             print(f"❌ Erro: {e}")
 
-# ====================== CLASSES DO SISTEMA ======================
-
-class BPLBGenerator:
-    def __init__(self):
-        self.comandos = []
-        self.largura_etiqueta = 800
-        self.altura_etiqueta = 550
-        
-    def remover_acentos(self, texto):
-        """Remove acentos e caracteres especiais"""
-        if not texto:
-            return ""
-        texto = unicodedata.normalize('NFKD', str(texto))
-        texto = ''.join([c for c in texto if not unicodedata.combining(c)])
-        texto = texto.replace('Ç', 'C').replace('ç', 'c')
-        texto = texto.replace('Ã', 'A').replace('ã', 'a')
-        texto = texto.replace('Õ', 'O').replace('õ', 'o')
-        texto = texto.replace('Â', 'A').replace('â', 'a')
-        texto = texto.replace('Ê', 'E').replace('ê', 'e')
-        texto = texto.replace('Î', 'I').replace('î', 'i')
-        texto = texto.replace('Ô', 'O').replace('ô', 'o')
-        texto = texto.replace('Û', 'U').replace('û', 'u')
-        return texto.upper()
-    
-    def iniciar_etiqueta(self):
-        """Inicia uma nova etiqueta BPLB"""
-        self.comandos = []
-        self.comandos.append("N")
-        self.comandos.append("D7")
-        self.comandos.append("S3")
-        self.comandos.append("JF")
-        self.comandos.append(f"Q{self.altura_etiqueta}")
-        self.comandos.append(f"q{self.largura_etiqueta}")
-        
-    def adicionar_texto(self, x, y, texto, fonte=1, tamanho_h=1, tamanho_v=1):
-        """Adiciona comando de texto BPLB"""
-        texto_limpo = self.remover_acentos(texto)
-        cmd = f"A{x},{y},0,{fonte},{tamanho_h},{tamanho_v},N,\"{texto_limpo}\""
-        self.comandos.append(cmd)
-        
-    def adicionar_codigo_barras(self, x, y, codigo, tipo=1, largura_fina=3, largura_larga=5, altura=80, exibir_texto='B'):
-        """Adiciona comando de código de barras BPLB"""
-        cmd = f"B{x},{y},0,{tipo},{largura_fina},{largura_larga},{altura},{exibir_texto},\"{codigo}\""
-        self.comandos.append(cmd)
-    
-    def adicionar_linha_horizontal(self, x, y, comprimento, espessura=1):
-        cmd = f"LE{x},{y},{comprimento},{espessura}"
-        self.comandos.append(cmd)
-    
-    def adicionar_linha_vertical(self, x, y, comprimento, espessura=1):
-        cmd = f"LE{x},{y},{espessura},{comprimento}"
-        self.comandos.append(cmd)
-    
-    def adicionar_borda(self, x1, y1, x2, y2, espessura=2):
-        self.comandos.append(f"LE{x1},{y1},{x2-x1},{espessura}")
-        self.comandos.append(f"LE{x1},{y2},{x2-x1},{espessura}")
-        self.comandos.append(f"LE{x1},{y1},{espessura},{y2-y1}")
-        self.comandos.append(f"LE{x2-espessura},{y1},{espessura},{y2-y1}")
-        
-    def finalizar_etiqueta(self, quantidade=1):
-        self.comandos.append(f"P{quantidade}")
-        
-    def obter_comandos(self):
-        return "\n".join(self.comandos) + "\n"
-    
-    def obter_comandos_bytes(self):
-        return self.obter_comandos().encode('utf-8', 'ignore')
-
-class PPLAtoBPLBConverter:
-    def __init__(self):
-        self.parser = PPLAParser()
-        self.generator = BPLBGenerator()
-        
-    def converter_etiqueta(self, etiqueta_data):
-        self.generator.iniciar_etiqueta()
-        largura = self.generator.largura_etiqueta
-        altura = self.generator.altura_etiqueta
-        
-        self.generator.adicionar_borda(20, 20, largura-20, altura-20, espessura=2)
-        y_pos = 50
-        
-        if etiqueta_data['tipo']:
-            tipo = self.generator.remover_acentos(etiqueta_data['tipo'])
-            x_pos = (largura - len(tipo) * 16) // 2
-            self.generator.adicionar_texto(x_pos, y_pos, tipo, fonte=3, tamanho_h=3, tamanho_v=3)
-            y_pos += 70
-        
-        self.generator.adicionar_linha_horizontal(30, y_pos-10, largura-60)
-        y_pos += 20
-        
-        op_texto = ""
-        if etiqueta_data['op']:
-            op_numeros = ''.join(filter(str.isdigit, etiqueta_data['op']))
-            op_texto = f"OP: {op_numeros[:9]}"
-        
-        ref_texto = ""
-        if etiqueta_data['referencia']:
-            ref_numeros = ''.join(filter(str.isdigit, etiqueta_data['referencia']))
-            ref_texto = f"REF: {ref_numeros[:9]}"
-        
-        # Adicionar fração no canto superior direito, se existir
-        fracao_texto = ""
-        if etiqueta_data['fracao']:
-            fracao_texto = self.generator.remover_acentos(etiqueta_data['fracao'])
-        
-        if op_texto and ref_texto:
-            # OP na primeira linha
-            self.generator.adicionar_texto(40, y_pos, op_texto, fonte=3)
-            
-            # Fração no canto direito (se existir)
-            if fracao_texto:
-                x_fracao = largura - 50 - len(fracao_texto) * 24
-                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-            
-            y_pos += 30  # Espaço para a linha da REF
-            self.generator.adicionar_texto(40, y_pos, ref_texto, fonte=3)
-            y_pos += 40  # Espaçamento padrão após as duas linhas
-        
-        elif op_texto:
-            self.generator.adicionar_texto(40, y_pos, op_texto, fonte=3)
-            
-            # Fração no canto direito (se existir)
-            if fracao_texto:
-                x_fracao = largura - 40 - len(fracao_texto) * 24
-                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-            
-            y_pos += 40
-        
-        elif ref_texto:
-            self.generator.adicionar_texto(40, y_pos, ref_texto, fonte=3)
-            
-            # Fração no canto direito (se existir)
-            if fracao_texto:
-                x_fracao = largura - 40 - len(fracao_texto) * 24
-                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-            
-            y_pos += 40
-        else:
-            # Se não tiver OP nem REF, mas tiver fração, colocar a fração no canto direito
-            if fracao_texto:
-                x_fracao = largura - 40 - len(fracao_texto) * 24
-                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2)
-                y_pos += 40
-            else:
-                y_pos += 20
-        
-        if etiqueta_data['descricao']:
-            descricao = self.generator.remover_acentos(etiqueta_data['descricao'])
-            if len(descricao) > 30:
-                palavras = descricao.split()
-                linha_atual = []
-                comprimento_atual = 0
-                partes = []
-                
-                for palavra in palavras:
-                    if comprimento_atual + len(palavra) + 1 <= 30:
-                        linha_atual.append(palavra)
-                        comprimento_atual += len(palavra) + 1
-                    else:
-                        if linha_atual:
-                            partes.append(' '.join(linha_atual))
-                        linha_atual = [palavra]
-                        comprimento_atual = len(palavra)
-                
-                if linha_atual:
-                    partes.append(' '.join(linha_atual))
-                
-                for i, parte in enumerate(partes[:2]):
-                    x_centro = (largura - len(parte) * 12) // 2
-                    self.generator.adicionar_texto(x_centro, y_pos, parte, fonte=3)
-                    y_pos += 40 if i == 0 else 30
-            else:
-                x_centro = (largura - len(descricao) * 12) // 2
-                self.generator.adicionar_texto(x_centro, y_pos, descricao, fonte=3)
-                y_pos += 50
-        
-        y_pos += 20
-        
-        if etiqueta_data['faccao']:
-            faccao = self.generator.remover_acentos(etiqueta_data['faccao'])
-            self.generator.adicionar_texto(40, y_pos, "FACCÃO:", fonte=3)
-            y_pos += 40
-            
-            if len(faccao) > 30:
-                partes = [faccao[i:i+30] for i in range(0, len(faccao), 30)]
-                for parte in partes[:2]:
-                    x_centro = (largura - len(parte) * 12) // 2
-                    self.generator.adicionar_texto(x_centro, y_pos, parte, fonte=3)
-                    y_pos += 30
-            else:
-                x_centro = (largura - len(faccao) * 12) // 2
-                self.generator.adicionar_texto(x_centro, y_pos, faccao, fonte=3)
-                y_pos += 40
-        
-        cidade_texto = ""
-        if etiqueta_data['cidade']:
-            cidade = self.generator.remover_acentos(etiqueta_data['cidade'])
-            cidade_texto = f"CIDADE: {cidade}"
-        
-        regiao_texto = ""
-        if etiqueta_data['regiao']:
-            regiao = self.generator.remover_acentos(etiqueta_data['regiao'])
-            regiao_texto = f"REGIAO: {regiao}"
-        
-        if cidade_texto and regiao_texto:
-            comprimento_total = len(cidade_texto) + len(regiao_texto) + 3
-            if comprimento_total * 8 <= largura - 80:
-                self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3)
-                self.generator.adicionar_texto(40 + len(cidade_texto) * 8 + 150, y_pos, regiao_texto, fonte=3)
-                y_pos += 40
-            else:
-                self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3)
-                y_pos += 40
-                self.generator.adicionar_texto(40, y_pos, regiao_texto, fonte=3)
-                y_pos += 40
-        elif cidade_texto:
-            self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3)
-            y_pos += 40
-        elif regiao_texto:
-            self.generator.adicionar_texto(40, y_pos, regiao_texto, fonte=3)
-            y_pos += 40
-        
-        # ADICIONAR CÓDIGO DE BARRAS (NOVA FUNCIONALIDADE)
-        if etiqueta_data['codigo_barras']:
-            codigo = etiqueta_data['codigo_barras']
-            y_pos += 20  # Adicionar espaço após as informações de cidade/região
-            # Centralizar o código de barras horizontalmente
-            x_barcode = (largura - 400) // 2  # Aproximadamente a largura do código de barras
-            self.generator.adicionar_codigo_barras(x_barcode, y_pos, codigo)
-            y_pos += 100  # Espaço para o código de barras
-        
-        self.generator.finalizar_etiqueta()
-        return self.generator.obter_comandos()
-
-class ImpressoraBPLB:
-    def __init__(self, nome_impressora=None):
-        self.nome_impressora = nome_impressora or IMPRESSORA_SELECIONADA
-        self.conexao_ativa = False
-        
-    def listar_impressoras(self):
-        try:
-            impressoras = win32print.EnumPrinters(
-                win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
-            )
-            return [printer[2] for printer in impressoras]
-        except:
-            return []
-    
-    def enviar_comandos(self, comandos_bplb):
-        """Envia comandos BPLB para a impressora configurada"""
-        if not self.nome_impressora:
-            print("❌ Nenhuma impressora configurada!")
-            return False
-        
-        try:
-            if isinstance(comandos_bplb, str):
-                dados = comandos_bplb.encode('utf-8', 'ignore')
-            else:
-                dados = comandos_bplb
-            
-            hprinter = win32print.OpenPrinter(self.nome_impressora)
-            
-            try:
-                job_id = win32print.StartDocPrinter(hprinter, 1, ("Etiqueta BPLB", None, "RAW"))
-                win32print.StartPagePrinter(hprinter)
-                win32print.WritePrinter(hprinter, dados)
-                win32print.EndPagePrinter(hprinter)
-                win32print.EndDocPrinter(hprinter)
-                
-                print(f"✅ Comandos enviados para {self.nome_impressora}")
-                self.conexao_ativa = True
-                return True
-                
-            except Exception as e:
-                print(f"❌ Erro ao enviar para impressora: {e}")
-                return False
-            finally:
-                win32print.ClosePrinter(hprinter)
-                
-        except Exception as e:
-            print(f"❌ Erro de conexão com impressora: {e}")
-            return False
-
-class PPLAParser:
-    def __init__(self):
-        self.etiquetas = []
-    
-    def parse_file(self, file_path):
-        if not os.path.exists(file_path):
-            return False
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            padrao_etiqueta = r'(<xpml><page quantity=\'0\'[^>]*>.*?Q0001\s*E\s*<xpml></page></xpml><xpml><end/></xpml>)'
-            etiquetas_raw = re.findall(padrao_etiqueta, content, re.DOTALL)
-            
-            if not etiquetas_raw:
-                padrao_alternativo = r'(n.*?Q0001\s*E\s*)'
-                etiquetas_raw = re.findall(padrao_alternativo, content, re.DOTALL)
-            
-            self.etiquetas = []
-            
-            for i, etiqueta_raw in enumerate(etiquetas_raw):
-                etiqueta_data = self._processar_etiqueta(etiqueta_raw, i+1)
-                if etiqueta_data:
-                    self.etiquetas.append(etiqueta_data)
-            
-            return len(self.etiquetas) > 0
-            
-        except Exception as e:
-            print(f"Erro ao analisar arquivo: {e}")
-            return False
-    
-    def _processar_etiqueta(self, etiqueta_raw, numero_etiqueta):
-        content = re.sub(r'<[^>]*>', '', etiqueta_raw)
-        content = re.sub(r'[\x00-\x09\x0B-\x1F\x7F]', ' ', content)
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        
-        data = {
-            'numero': numero_etiqueta,
-            'tipo': '',
-            'op': '',
-            'referencia': '',
-            'descricao': '',
-            'faccao': '',
-            'cidade': '',
-            'regiao': '',
-            'fracao': '',
-            'codigo_barras': '',  # NOVO CAMPO
-            'codigos': [],
-            'textos': []
-        }
-        
-        textos_coletados = []
-        for line in lines:
-            if line.startswith('19') and len(line) >= 15:
-                texto = line[15:].strip()
-                if texto:
-                    textos_coletados.append(texto)
-            elif line.startswith('1e') and len(line) > 2:
-                codigo = line[2:].strip()
-                if codigo:
-                    data['codigos'].append(codigo)
-        
-        self._processar_textos_sequencial(textos_coletados, data)
-        return data
-    
-    def _processar_textos_sequencial(self, textos, data):
-        i = 0
-        while i < len(textos):
-            texto = textos[i]
-            data['textos'].append(texto)
-    
-            if texto == 'OP:' and i + 1 < len(textos):
-                data['op'] = textos[i + 3]
-    
-            elif texto == 'Ref:' and i + 1 < len(textos):
-                data['referencia'] = textos[i + 1]
-    
-            elif texto in ('Faccao:', 'Facção:') and i + 1 < len(textos):
-                data['faccao'] = textos[i + 1]
-    
-            elif texto == 'Cidade:' and i + 1 < len(textos):
-                data['cidade'] = textos[i + 1]
-    
-            elif texto in ('Regiao:', 'Região:') and i + 1 < len(textos):
-                data['regiao'] = textos[i + 1]
-    
-            elif 'CONSERTO' in texto:
-                data['tipo'] = 'CONSERTO'
-    
-            elif any(p in texto for p in ('CAMISETA', 'BLUSA', 'CALCA')):
-                data['descricao'] = texto
-    
-            # Detecta fração (ex: "2/2")
-            elif re.match(r'^\d+/\d+$', texto):
-                data['fracao'] = texto
-                # A linha anterior à fração é o código de barras
-                if i > 0 and re.match(r'^\d+$', textos[i-1]) and len(textos[i-1]) >= 12:
-                    data['codigo_barras'] = textos[i-1]
-    
-            i += 1
-
-# ====================== FUNÇÕES PRINCIPAIS ======================
-
-def visualizar_etiqueta_bplb(comandos_bplb):
-    print("\n📋 VISUALIZAÇÃO DA ETIQUETA BPLB:")
-    print("=" * 50)
-    
-    textos = []
-    for linha in comandos_bplb.split('\n'):
-        if linha.startswith('A'):
-            partes = linha.split('"')
-            if len(partes) >= 2:
-                textos.append(partes[1])
-        elif linha.startswith('B'):
-            partes = linha.split('"')
-            if len(partes) >= 2:
-                textos.append(f"[CÓDIGO DE BARRAS: {partes[1]}]")
-    
-    largura = 50
-    print("┌" + "─" * largura + "┐")
-    
-    for texto in textos:
-        if texto:
-            if len(texto) > largura:
-                texto = texto[:largura-3] + "..."
-            espacos = largura - len(texto)
-            margem_esq = espacos // 2
-            margem_dir = espacos - margem_esq
-            print(f"│{' ' * margem_esq}{texto}{' ' * margem_dir}│")
-    
-    print("└" + "─" * largura + "┘")
+# ====================== PROCESSAMENTO ======================
+# Análise, conversão e envio ficam no núcleo compartilhado
 
-def processar_e_imprimir(file_path, imprimir=True):
+def processar_e_imprimir(file_path, imprimir=True, fila=None):
     """Processa arquivo PPLA e imprime usando a impressora configurada"""
-    global IMPRESSORA_SELECIONADA
-    
-    print(f"\n📄 Processando: {file_path}")
-    print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    print(f"🖨️  Impressora: {IMPRESSORA_SELECIONADA}")
-    print("-" * 60)
-    
-    parser = PPLAParser()
-    if not parser.parse_file(file_path):
-        print("❌ Falha ao processar arquivo ou nenhuma etiqueta encontrada")
-        return
-    
-    print(f"✅ {len(parser.etiquetas)} etiqueta(s) encontrada(s)")
-    
-    impressora = None
-    if imprimir:
-        if not IMPRESSORA_SELECIONADA:
-            print("❌ Nenhuma impressora configurada!")
-            print("   Use a opção 3 para configurar uma impressora.")
-            imprimir = False
-        else:
-            impressora = ImpressoraBPLB(IMPRESSORA_SELECIONADA)
-    
-    converter = PPLAtoBPLBConverter()
-    
-    for i, etiqueta in enumerate(parser.etiquetas):
-        print(f"\n🔄 Convertendo etiqueta {i+1}...")
-        
-        comandos_bplb = converter.converter_etiqueta(etiqueta)
-        visualizar_etiqueta_bplb(comandos_bplb)
-        
-        nome_base = os.path.splitext(os.path.basename(file_path))[0]
-        pasta_bplb = os.path.join(os.path.dirname(file_path), "bplb_output")
-        
-        if not os.path.exists(pasta_bplb):
-            os.makedirs(pasta_bplb)
-        
-        arquivo_bplb = os.path.join(pasta_bplb, f"{nome_base}_etq{i+1}.bplb")
-        
-        try:
-            with open(arquivo_bplb, 'w', encoding='utf-8') as f:
-                f.write(comandos_bplb)
-            print(f"💾 Comandos BPLB salvos em: {arquivo_bplb}")
-            
-            print("\n📄 PREVIEW DO ARQUIVO BPLB:")
-            print("-" * 40)
-            linhas = comandos_bplb.split('\n')[:15]
-            for linha in linhas:
-                if linha.strip():
-                    print(f"  {linha[:60]}..." if len(linha) > 60 else f"  {linha}")
-            print("-" * 40)
-            
-        except Exception as e:
-            print(f"⚠️  Erro ao salvar arquivo BPLB: {e}")
-        
-        if imprimir and impressora:
-            print(f"\n🖨️  Enviando etiqueta {i+1} para impressão...")
-            if impressora.enviar_comandos(comandos_bplb):
-                print(f"✅ Etiqueta {i+1} enviada com sucesso!")
-            else:
-                print(f"❌ Falha ao enviar etiqueta {i+1}")
-            
-            if i < len(parser.etiquetas) - 1:
-                time.sleep(2)
-    
-    print("\n" + "="*60)
-    print("✅ Processamento concluído!")
-    if imprimir and impressora:
-        print(f"📤 Total de {len(parser.etiquetas)} etiqueta(s) enviada(s) para {IMPRESSORA_SELECIONADA}")
-    print("="*60)
+    return nucleo.processar_e_imprimir(file_path, imprimir, IMPRESSORA_SELECIONADA, fila=fila)
 
 # ====================== MONITORAMENTO ======================
 
 class ArquivoAlteradoHandler(FileSystemEventHandler):
     def __init__(self):
         self.ultimo_hash = None
-        self.arquivo_processando = False
+        # Leitura e impressão fora da linha do watchdog
+        self.fila = FilaImpressao(IMPRESSORA_SELECIONADA, self.processar_alteracao)
+        self.fila.iniciar()
         print(f"\n🔍 Monitorando alterações no arquivo...")
         print(f"📁 Pasta: C:\\Imp")
         print(f"📄 Arquivo: Imprime.txt")
@@ -596,31 +123,22 @@ class ArquivoAlteradoHandler(FileSystemEventHandler):
         print("⏳ Aguardando alterações...")
     
     def on_modified(self, event):
+        # Na linha do watchdog: só anota o arquivo para a fila
         if not event.is_directory and event.src_path.endswith('Imprime.txt'):
-            print(f"\n🔄 Alteração detectada em: {event.src_path}")
-            
-            if self.arquivo_processando:
-                print("⚠️  Já processando arquivo, aguarde...")
-                return
-                
-            self.arquivo_processando = True
-            
-            try:
-                time.sleep(0.5)
-                hash_atual = self.calcular_hash(event.src_path)
-                
-                if hash_atual != self.ultimo_hash:
-                    self.ultimo_hash = hash_atual
-                    print(f"📊 Hash do arquivo: {hash_atual[:16]}...")
-                    print("🔄 Iniciando processamento...")
-                    processar_e_imprimir(event.src_path, imprimir=True)
-                else:
-                    print("ℹ️  Arquivo não mudou (mesmo hash), ignorando...")
-                    
-            except Exception as e:
-                print(f"❌ Erro ao processar arquivo alterado: {e}")
-            finally:
-                self.arquivo_processando = False
+            if self.fila.avisar(event.src_path):
+                print(f"\n🔄 Alteração detectada em: {event.src_path}")
+    
+    def processar_alteracao(self, caminho):
+        """Confere a hash e põe as etiquetas na fila (linha de leitura)"""
+        hash_atual = self.calcular_hash(caminho)
+        
+        if hash_atual != self.ultimo_hash:
+            self.ultimo_hash = hash_atual
+            print(f"📊 Hash do arquivo: {hash_atual[:16]}...")
+            print("🔄 Iniciando processamento...")
+            processar_e_imprimir(caminho, imprimir=True, fila=self.fila)
+        else:
+            print("ℹ️  Arquivo não mudou (mesmo hash), ignorando...")
     
     def calcular_hash(self, file_path):
         try:
@@ -689,6 +207,8 @@ def iniciar_monitoramento():
         print(f"❌ Erro no monitoramento: {e}")
     
     observer.join()
+    # Imprime o que ainda está na fila
+    event_handler.fila.parar()
     print("👋 Monitoramento encerrado.")
 
 def testar_exemplo():
@@ -0,0 +1,27 @@
+"""
+Núcleo compartilhado pelos scripts do conversor PPLA -> BPLB: leitura do
+spool, análise das etiquetas, geração do BPLB e envio para a impressora.
+Os scripts (monitor1_1, imp, monitora, ...) só montam a interface em cima dele.
+
+A análise detalhada (nucleo.analise) usa numpy e não é importada aqui.
+"""
+from . import config
+from .diagnostico import diag, DEBUG, INFO, AVISO, ERRO
+from .etiqueta import Etiqueta, EtiquetaDetalhada, ComandosEtiqueta
+from .etiqueta_preguicosa import EtiquetaPreguicosa
+from .leitor_spool import LeitorSpool, PosicaoSpool, TrechoSpool
+from .parser import PPLAParser
+from .gerador import BPLBGenerator
+from .conversor import PPLAtoBPLBConverter
+from .transporte import Transporte, TRANSPORTES, criar_transporte
+from .ritmo import RitmoImpressora
+from .impressora import (
+    ImpressoraBPLB, SessaoImpressora, listar_impressoras, impressora_padrao, pedir_destinos,
+)
+from .formularios import EnvioFormularios
+from .emulador import EmuladorBPLB, ImpressoraTCPFalsa
+from .fila_impressao import FilaImpressao, TrabalhoImpressao, ESTRATEGIAS
+from .series import AgrupadorSeries, agrupar_series
+from .processamento import (
+    obter_cache_bplb, gerar_bplb_etiquetas, visualizar_etiqueta_bplb, processar_e_imprimir,
+)
@@ -0,0 +1,239 @@
+from .etiqueta import EtiquetaDetalhada, ComandosEtiqueta
+from .ppla_lexer import tokenizar_etiqueta, extrair_registros, TOKEN_SETUP, CODIFICACAO_ARQUIVO
+from .cabecalhos_ppla import ORIENTACOES, FONTES, decodificar_cabecalhos, posicoes_como_dicts
+from .parser import PPLAParser
+
+# ====================== ANÁLISE DETALHADA ======================
+# Usada pelos scripts de leitura (ler_ppla, converte_bbpla, teste): os campos
+# vêm do mesmo PPLAParser da impressão, e cada etiqueta ganha ainda os
+# comandos de configuração e as posições dos textos.
+
+class AnalisadorPPLA(PPLAParser):
+    # Trecho solto, sem as marcas de etiqueta: analisa o arquivo inteiro
+    _ARQUIVO_COMO_ETIQUETA = True
+    
+    def __init__(self, classificador=None, layouts=None):
+        super().__init__(classificador, layouts)
+        # Etiqueta atual e as posições dos textos dela
+        # (array estruturado de cabecalhos_ppla)
+        self.data = EtiquetaDetalhada()
+        self.posicoes = decodificar_cabecalhos([])
+    
+    def parse_file(self, file_path):
+        """
+        Localiza as etiquetas e seleciona a primeira. Cada uma vira uma
+        EtiquetaDetalhada só quando os campos forem lidos; as posições
+        (self.posicoes) são decodificadas sem analisar os campos.
+        """
+        encontrou = super().parse_file(file_path)
+        self.selecionar(0)
+        return encontrou
+    
+    def selecionar(self, indice):
+        """Torna a etiqueta indice a atual (self.data / self.posicoes)"""
+        if indice < len(self.etiquetas):
+            self.data = self.etiquetas[indice]
+            self.posicoes = self.data.posicoes
+        else:
+            self.data = EtiquetaDetalhada()
+            self.posicoes = decodificar_cabecalhos([])
+    
+    def _extrair_campos(self, etiqueta):
+        """Campos do PPLAParser mais comandos e posições de uma etiqueta"""
+        texto = bytes(etiqueta.raw).decode(CODIFICACAO_ARQUIVO, errors='ignore')
+        campos = self._processar_etiqueta(texto, etiqueta.numero).como_dict()
+        campos['codigos'] = list(campos['codigos'])
+        campos['textos'] = extrair_registros(texto)[0]
+        
+        comandos = ComandosEtiqueta()
+        outros_comandos = []
+        for tipo, valor, _ in tokenizar_etiqueta(texto):
+            if tipo == TOKEN_SETUP:
+                self._processar_comando(valor, comandos, outros_comandos)
+        
+        return EtiquetaDetalhada(comandos=comandos,
+                                 posicoes_texto=posicoes_como_dicts(etiqueta.posicoes),
+                                 outros_comandos=outros_comandos, **campos)
+    
+    @staticmethod
+    def _processar_comando(linha, comandos, outros_comandos):
+        """Processa comandos de configuração da impressora"""
+        linha = linha.strip()
+        
+        # Comando D - Direção do texto
+        if linha.startswith('D') and len(linha) > 1 and linha[1:].isdigit():
+            comandos.direcao = linha[1:]
+        
+        # Comando A - Alinhamento
+        elif linha.startswith('A') and len(linha) > 1 and linha[1:].isdigit():
+            comandos.alinhamento = linha[1:]
+        
+        # Comando Q - Quantidade
+        elif linha.startswith('Q') and len(linha) > 1:
+            comandos.quantidade = linha[1:]
+        
+        # Comando E - Final
+        elif linha == 'E':
+            comandos.final = True
+        
+        # Outros comandos importantes
+        elif linha.startswith(('M', 'O', 'V', 'f', 'L', 'H', 'S', 'P', 'n')):
+            # M - Velocidade
+            # O - Offset
+            # V - Velocidade de impressão
+            # f - Densidade térmica
+            # L - Início de formato
+            # H - Altura do caractere
+            # S - Largura do caractere
+            # P - Pitch
+            # n - Início da etiqueta (formato alternativo)
+            if linha not in outros_comandos:
+                outros_comandos.append(linha)
+    
+    def _interpretar_comandos(self):
+        """Interpreta o significado dos comandos"""
+        interpretacoes = []
+        
+        # Interpretar direção (D)
+        direcao = self.data['comandos']['direcao']
+        if direcao:
+            if direcao == '11':
+                interpretacoes.append("📐 Direção: 0° (normal)")
+            elif direcao == '21':
+                interpretacoes.append("📐 Direção: 90°")
+            elif direcao == '31':
+                interpretacoes.append("📐 Direção: 180°")
+            elif direcao == '41':
+                interpretacoes.append("📐 Direção: 270°")
+            else:
+                interpretacoes.append(f"📐 Direção: D{direcao}")
+        
+        # Interpretar alinhamento (A)
+        alinhamento = self.data['comandos']['alinhamento']
+        if alinhamento:
+            if alinhamento == '2':
+                interpretacoes.append("↔️ Alinhamento: Esquerda")
+            elif alinhamento == '3':
+                interpretacoes.append("↔️ Alinhamento: Centro")
+            elif alinhamento == '4':
+                interpretacoes.append("↔️ Alinhamento: Direita")
+            else:
+                interpretacoes.append(f"↔️ Alinhamento: A{alinhamento}")
+        
+        # Interpretar quantidade (Q)
+        quantidade = self.data['comandos']['quantidade']
+        if quantidade:
+            try:
+                qtd_num = int(quantidade)
+                interpretacoes.append(f"🔢 Quantidade: {qtd_num:,} etiqueta(s)".replace(',', '.'))
+            except:
+                interpretacoes.append(f"🔢 Quantidade: Q{quantidade}")
+        
+        # Comando final
+        if self.data['comandos']['final']:
+            interpretacoes.append("🏁 Comando E: Fim do formato")
+        
+        return interpretacoes
+    
+    def _interpretar_posicoes(self):
+        """Interpreta as posições dos textos"""
+        interpretacoes = []
+        
+        for i, pos in enumerate(self.data['posicoes_texto']):
+            # Interpretar orientação
+            orientacao = ORIENTACOES.get(pos.get('orientacao', ''), f"Desconhecida ({pos.get('orientacao', '')})")
+            
+            # Interpretar fonte
+            fonte = FONTES.get(pos.get('fonte', ''), f"Fonte {pos.get('fonte', '')}")
+            
+            # Criar interpretação
+            interpretacao = f"📝 Texto {i+1}: '{pos.get('texto', '')[:30]}...'"
+            
+            if 'y_pontos' in pos and 'x_pontos' in pos:
+                interpretacao += f"\n     📍 Posição: X={pos['x_pontos']}pts, Y={pos['y_pontos']}pts"
+            
+            if pos.get('orientacao'):
+                interpretacao += f"\n     🧭 Orientação: {orientacao}"
+            
+            if pos.get('fonte'):
+                interpretacao += f"\n     🔤 Fonte: {fonte}"
+            
+            if pos.get('multiplicador_altura') or pos.get('multiplicador_largura'):
+                altura = pos.get('multiplicador_altura', '1')
+                largura = pos.get('multiplicador_largura', '1')
+                interpretacao += f"\n     ⚖️  Multiplicador: Altura={altura}x, Largura={largura}x"
+            
+            interpretacoes.append(interpretacao)
+        
+        return interpretacoes
+    
+    def print_summary(self):
+        """Imprime um resumo dos dados extraídos"""
+        print("\n" + "="*60)
+        print("RESUMO DA ETIQUETA PPLA")
+        print("="*60)
+        
+        if self.data['tipo']:
+            print(f"📌 Tipo: {self.data['tipo']}")
+        
+        if self.data['op']:
+            print(f"🔢 OP: {self.data['op']}")
+        
+        if self.data['referencia']:
+            print(f"🏷️  Referência: {self.data['referencia']}")
+        
+        if self.data['descricao']:
+            print(f"👕 Descrição: {self.data['descricao']}")
+        
+        if self.data['faccao']:
+            print(f"🏭 Facção: {self.data['faccao']}")
+        
+        if self.data['cidade']:
+            print(f"📍 Cidade: {self.data['cidade']}")
+        
+        if self.data['regiao']:
+            print(f"🗺️  Região: {self.data['regiao']}")
+        
+        # Comandos de impressão
+        print("\n⚙️  COMANDOS DE IMPRESSÃO:")
+        interpretacoes = self._interpretar_comandos()
+        for interpretacao in interpretacoes:
+            print(f"   • {interpretacao}")
+        
+        # Mostrar comandos brutos
+        comandos = self.data['comandos']
+        if comandos['direcao']:
+            print(f"     (D{comandos['direcao']})")
+        if comandos['alinhamento']:
+            print(f"     (A{comandos['alinhamento']})")
+        if comandos['quantidade']:
+            print(f"     (Q{comandos['quantidade']})")
+        if comandos['final']:
+            print("     (E)")
+        
+        # Posições dos textos
+        if self.data['posicoes_texto']:
+            print("\n🗺️  POSIÇÕES DOS TEXTOS:")
+            pos_interpretacoes = self._interpretar_posicoes()
+            for interpretacao in pos_interpretacoes:
+                # Separar por linhas para melhor formatação
+                linhas = interpretacao.split('\n')
+                for linha in linhas:
+                    print(f"   {linha}")
+        
+        # Outros comandos
+        if self.data['outros_comandos']:
+            print("\n🔧 Outros comandos identificados:")
+            for cmd in self.data['outros_comandos']:
+                print(f"   • {cmd}")
+        
+        if self.data['codigos']:
+            print("\n🔢 Códigos identificados:")
+            for codigo in self.data['codigos']:
+                print(f"   • {codigo}")
+        
+        print("\n📝 Textos extraídos:")
+        for texto in self.data['textos']:
+            print(f"   • {texto}")
+        
+        print("\n" + "="*60)
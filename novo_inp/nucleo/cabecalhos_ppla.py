@@ -0,0 +1,154 @@
+import numpy as np
+
+# ====================== CABEÇALHOS DE POSIÇÃO PPLA ======================
+# Decodifica de uma vez todos os cabeçalhos de 13 caracteres dos registros
+# 19 de um arquivo num array estruturado do NumPy, em vez de fatiar e
+# converter com int() um cabeçalho por vez.
+#
+# Cabeçalho (ex.: 1220000010002): orientação (1), fonte (2), multiplicador
+# de altura e largura (1+1), código de barras (3), Y (4) e X (o resto).
+# Cabeçalhos com letras (ex.: 11A1202510200) só valem se os 8 últimos
+# caracteres forem dígitos: Y e X com 4 dígitos cada.
+
+TAMANHO_CABECALHO = 13
+
+ORIENTACOES = {
+    '1': "0° (normal)",
+    '2': "90°",
+    '3': "180°",
+    '4': "270°",
+    '5': "0° espelhado",
+    '6': "90° espelhado",
+    '7': "180° espelhado",
+    '8': "270° espelhado"
+}
+
+FONTES = {
+    '11': "Fonte padrão 1",
+    '22': "Fonte 2",
+    '33': "Fonte 3",
+    '44': "Fonte 4"
+}
+
+DTYPE_POSICAO = np.dtype([
+    ('valido', np.bool_),
+    ('numerico', np.bool_),      # cabeçalho só com dígitos
+    ('orientacao', np.uint8),    # 0 se não for dígito
+    ('fonte', np.uint8),         # primeiro dígito da fonte (0 se não for dígito)
+    ('mult_altura', np.uint8),
+    ('mult_largura', np.uint8),
+    ('codigo_barras', np.uint16),
+    ('y', np.int32),
+    ('x', np.int32),
+    ('cabecalho', f'U{TAMANHO_CABECALHO}'),
+    ('texto', object),
+])
+
+_PESOS_4 = np.array([1000, 100, 10, 1], dtype=np.int32)
+_PESOS_3 = np.array([100, 10, 1], dtype=np.int32)
+
+# Rotação BPLB (0-3) por orientação PPLA; as espelhadas (5-8) repetem 0-3
+_ROTACAO = np.array([0, 0, 1, 2, 3, 0, 1, 2, 3, 0], dtype=np.uint8)
+
+
+def decodificar_cabecalhos(cabecalhos, textos=None):
+    """
+    Decodifica uma lista de cabeçalhos numa única passada vetorizada.
+    Devolve um array com DTYPE_POSICAO, uma linha por cabeçalho; as linhas
+    que a análise antiga descartava ficam com valido=False.
+    """
+    n = len(cabecalhos)
+    posicoes = np.zeros(n, dtype=DTYPE_POSICAO)
+    if not n:
+        return posicoes
+
+    posicoes['cabecalho'] = cabecalhos
+    if textos is not None:
+        posicoes['texto'] = textos
+
+    # Uma matriz n x 13 de bytes; cada caractere não ASCII vira um único '?'
+    bruto = ''.join(c[:TAMANHO_CABECALHO].ljust(TAMANHO_CABECALHO, '\0') for c in cabecalhos)
+    bruto = np.frombuffer(bruto.encode('ascii', 'replace'), dtype=np.uint8)
+    bruto = bruto.reshape(n, TAMANHO_CABECALHO)
+    digitos = bruto - np.uint8(ord('0'))
+    eh_digito = digitos <= 9
+
+    completo = np.fromiter((len(c) >= TAMANHO_CABECALHO for c in cabecalhos), dtype=np.bool_, count=n)
+    numerico = completo & eh_digito.all(axis=1)
+    alternativo = completo & ~numerico & eh_digito[:, 5:13].all(axis=1)
+    digitos = np.where(eh_digito, digitos, 0).astype(np.int32)
+
+    posicoes['valido'] = numerico | alternativo
+    posicoes['numerico'] = numerico
+    posicoes['orientacao'] = digitos[:, 0]
+    posicoes['fonte'] = digitos[:, 1]
+    posicoes['mult_altura'] = np.where(numerico, digitos[:, 3], 1)
+    posicoes['mult_largura'] = np.where(numerico, digitos[:, 4], 1)
+    posicoes['codigo_barras'] = digitos[:, 5:8] @ _PESOS_3
+    posicoes['y'] = np.where(numerico, digitos[:, 8:12] @ _PESOS_4, digitos[:, 5:9] @ _PESOS_4)
+    posicoes['x'] = np.where(numerico, digitos[:, 12], digitos[:, 9:13] @ _PESOS_4)
+    return posicoes
+
+
+def posicoes_como_dicts(posicoes):
+    """Dicts no formato antigo de posicoes_texto, para resumo e relatório"""
+    resultado = []
+    for linha in posicoes[posicoes['valido']]:
+        cabecalho = str(linha['cabecalho'])
+        if linha['numerico']:
+            info = {
+                'orientacao': cabecalho[0],
+                'fonte': cabecalho[1:3],
+                'multiplicador_altura': cabecalho[3],
+                'multiplicador_largura': cabecalho[4],
+                'codigo_barras': cabecalho[5:8],
+                'y': cabecalho[8:12],
+                'x': cabecalho[12:],
+                'y_pontos': int(linha['y']),
+                'x_pontos': int(linha['x'])
+            }
+        else:
+            info = {
+                'orientacao': cabecalho[0],
+                'fonte': cabecalho[1:3],
+                'y': cabecalho[5:9],
+                'x': cabecalho[9:13],
+                'y_pontos': int(linha['y']),
+                'x_pontos': int(linha['x']),
+                'cabecalho_bruto': cabecalho
+            }
+        info['texto'] = linha['texto']
+        info['cabecalho'] = cabecalho
+        resultado.append(info)
+    return resultado
+
+
+def comandos_texto_bplb(posicoes):
+    """
+    Comandos A (texto) do BPLB para as posições válidas. Coordenadas,
+    rotação, fonte e multiplicadores são calculados como arrays.
+    """
+    posicoes = posicoes[posicoes['valido']]
+    if not len(posicoes):
+        return []
+
+    # Pontos PPLA -> coordenadas BPLB (conversão aproximada, 8 pontos/mm)
+    x_bplb = np.maximum(posicoes['x'] // 8, 0)
+    y_bplb = np.maximum(posicoes['y'] // 8, 0)
+
+    orientacao = posicoes['orientacao']
+    rotacao = _ROTACAO[orientacao]
+    reverso = np.where((orientacao >= 5) & (orientacao <= 8), 'R', 'N')
+
+    # Fonte: primeiro dígito limitado a 1-5 ('11' -> 1A ... '55' -> 5A);
+    # sem dígito a fonte ficou 0 e também cai em 1A
+    fonte = np.clip(posicoes['fonte'], 1, 5)
+
+    comandos = []
+    for x, y, r, f, h, v, rev, texto in zip(
+            x_bplb.tolist(), y_bplb.tolist(), rotacao.tolist(), fonte.tolist(),
+            posicoes['mult_largura'].tolist(), posicoes['mult_altura'].tolist(),
+            reverso.tolist(), posicoes['texto'].tolist()):
+        if texto:
+            comandos.append(f'A{x},{y},{r},{f}A,{h},{v},{rev},"{texto}"')
+    return comandos
@@ -0,0 +1,181 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+from .diagnostico import diag
+
+# ====================== CACHE DE BPLB POR ETIQUETA ======================
+# Operadores regravam o Imprime.txt com os mesmos blocos e a mesma OP é
+# reimpressa várias vezes ao dia. O BPLB pronto de cada etiqueta fica
+# guardado pela hash do bloco PPLA bruto (mais a configuração do gerador):
+# primeiro numa LRU em memória, depois, se configurado, numa pasta em disco.
+# Junto com o BPLB fica a afinidade da etiqueta, (facção, região), que a
+# fila de impressão usa para escolher a impressora.
+
+EXTENSAO = '.bplb'
+
+# Primeira linha de cada arquivo em disco: CABECALHO + facção \t região
+CABECALHO = b'BPLB\t'
+SEM_AFINIDADE = ('', '')
+_SEPARADORES = str.maketrans('\t\r\n', '   ')
+
+# Limites padrão (bytes de BPLB guardados)
+MAXIMO_MEMORIA = 4 * 1024 * 1024
+MAXIMO_DISCO = 32 * 1024 * 1024
+
+
+def assinatura_configuracao(*partes):
+    """Resumo da configuração que muda o BPLB gerado; entra em toda chave"""
+    return hashlib.blake2b(repr(partes).encode('utf-8'), digest_size=16).digest()
+
+
+def chave_etiqueta(etiqueta_raw, configuracao):
+    """Hash rápida do bloco bruto (str, bytes ou memoryview) + configuração"""
+    h = hashlib.blake2b(configuracao, digest_size=16)
+    if isinstance(etiqueta_raw, str):
+        etiqueta_raw = etiqueta_raw.encode('utf-8', 'surrogatepass')
+    h.update(etiqueta_raw)
+    return h.hexdigest()
+
+
+class CacheBPLB:
+    """LRU em memória com uma pasta opcional em disco, ambas limitadas em bytes"""
+
+    def __init__(self, maximo_memoria=MAXIMO_MEMORIA, pasta=None, maximo_disco=MAXIMO_DISCO):
+        self.maximo_memoria = maximo_memoria
+        self.maximo_disco = maximo_disco
+        self.pasta = pasta
+        self._memoria = OrderedDict()
+        self._bytes_memoria = 0
+        self._disco = None      # chave -> tamanho, do mais antigo ao mais novo
+        self._bytes_disco = 0
+        self.acertos = 0
+        self.faltas = 0
+
+    # ---------------------- memória ----------------------
+
+    def _guardar_memoria(self, chave, entrada):
+        if len(entrada[0]) > self.maximo_memoria:
+            return
+        anterior = self._memoria.pop(chave, None)
+        if anterior is not None:
+            self._bytes_memoria -= len(anterior[0])
+        self._memoria[chave] = entrada
+        self._bytes_memoria += len(entrada[0])
+        while self._bytes_memoria > self.maximo_memoria:
+            _, (removido, _) = self._memoria.popitem(last=False)
+            self._bytes_memoria -= len(removido)
+
+    # ---------------------- disco ----------------------
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave + EXTENSAO)
+
+    def _indice_disco(self):
+        """Lê a pasta uma única vez; depois o índice é mantido em memória"""
+        if self._disco is None:
+            self._disco = OrderedDict()
+            try:
+                os.makedirs(self.pasta, exist_ok=True)
+                entradas = [e for e in os.scandir(self.pasta)
+                            if e.is_file() and e.name.endswith(EXTENSAO)]
+                entradas.sort(key=lambda e: e.stat().st_mtime)
+                for entrada in entradas:
+                    tamanho = entrada.stat().st_size
+                    self._disco[entrada.name[:-len(EXTENSAO)]] = tamanho
+                    self._bytes_disco += tamanho
+            except OSError as e:
+                diag.aviso("⚠️  Cache em disco indisponível (%s): %s", self.pasta, e)
+                self.pasta = None
+        return self._disco
+
+    def _ler_disco(self, chave):
+        if not self.pasta or chave not in self._indice_disco():
+            return None
+        try:
+            with open(self._caminho(chave), 'rb') as f:
+                dados = f.read()
+        except OSError:
+            self._remover_disco(chave)
+            return None
+        cabecalho, _, bplb = dados.partition(b'\n')
+        afinidade = cabecalho[len(CABECALHO):].decode('utf-8', 'replace').split('\t')
+        if not cabecalho.startswith(CABECALHO) or len(afinidade) != 2:
+            # Gravado sem a afinidade (versão anterior): gera de novo
+            self._remover_disco(chave)
+            return None
+        self._disco.move_to_end(chave)
+        return bplb, tuple(afinidade)
+
+    def _guardar_disco(self, chave, entrada):
+        bplb, afinidade = entrada
+        cabecalho = '\t'.join(valor.translate(_SEPARADORES) for valor in afinidade).encode('utf-8')
+        dados = CABECALHO + cabecalho + b'\n' + bplb
+        if not self.pasta or len(dados) > self.maximo_disco:
+            return
+        indice = self._indice_disco()
+        if not self.pasta:
+            return
+        caminho = self._caminho(chave)
+        temporario = caminho + '.tmp'
+        try:
+            with open(temporario, 'wb') as f:
+                f.write(dados)
+            os.replace(temporario, caminho)
+        except OSError as e:
+            diag.aviso("⚠️  Erro ao gravar cache BPLB: %s", e)
+            return
+        self._bytes_disco += len(dados) - indice.pop(chave, 0)
+        indice[chave] = len(dados)
+        while self._bytes_disco > self.maximo_disco and indice:
+            self._remover_disco(next(iter(indice)))
+
+    def _remover_disco(self, chave):
+        self._bytes_disco -= self._disco.pop(chave, 0)
+        try:
+            os.remove(self._caminho(chave))
+        except OSError:
+            pass
+
+    # ---------------------- uso ----------------------
+
+    def obter(self, chave):
+        """(bplb, afinidade) guardados para a chave, ou None"""
+        entrada = self._memoria.get(chave)
+        if entrada is not None:
+            self._memoria.move_to_end(chave)
+            self.acertos += 1
+            return entrada
+        entrada = self._ler_disco(chave)
+        if entrada is not None:
+            self._guardar_memoria(chave, entrada)
+            self.acertos += 1
+            return entrada
+        self.faltas += 1
+        return None
+
+    def guardar(self, chave, bplb, afinidade=SEM_AFINIDADE):
+        entrada = (bplb, afinidade)
+        self._guardar_memoria(chave, entrada)
+        self._guardar_disco(chave, entrada)
+
+    def obter_ou_gerar(self, etiqueta_raw, configuracao, gerar):
+        """
+        Devolve (bplb, afinidade, veio_do_cache). gerar() só é chamado quando
+        o bloco ainda não está no cache e deve devolver (bplb em bytes,
+        (facção, região)).
+        """
+        chave = chave_etiqueta(etiqueta_raw, configuracao)
+        entrada = self.obter(chave)
+        if entrada is not None:
+            return entrada + (True,)
+        bplb, afinidade = gerar()
+        self.guardar(chave, bplb, afinidade)
+        return bplb, afinidade, False
+
+    def limpar(self):
+        self._memoria.clear()
+        self._bytes_memoria = 0
+        if self.pasta:
+            for chave in list(self._indice_disco()):
+                self._remover_disco(chave)
@@ -0,0 +1,135 @@
+import os
+import re
+from collections import deque
+
+# ====================== CLASSIFICADOR DE CAMPOS ======================
+# Classifica cada texto de uma etiqueta uma única vez (rótulo, fração,
+# código longo ou texto livre) e reconhece descrições de produto com um
+# autômato Aho-Corasick, cujo custo não depende do tamanho do vocabulário.
+
+CLASSE_TIPO = 'tipo'
+CLASSE_OP = 'op'
+CLASSE_REF = 'ref'
+CLASSE_FACCAO = 'faccao'
+CLASSE_CIDADE = 'cidade'
+CLASSE_REGIAO = 'regiao'
+CLASSE_FRACAO = 'fracao'
+CLASSE_CODIGO = 'codigo'
+
+# Rótulos fixos impressos pelo ERP -> classe do texto
+ROTULOS = {
+    'CONSERTO': CLASSE_TIPO,
+    'OP:': CLASSE_OP,
+    'Ref:': CLASSE_REF,
+    'Faccao:': CLASSE_FACCAO,
+    'Facção:': CLASSE_FACCAO,
+    'Cidade:': CLASSE_CIDADE,
+    'Regiao:': CLASSE_REGIAO,
+    'Região:': CLASSE_REGIAO,
+}
+
+# Rótulos que encerram a busca da OP depois da referência
+PREFIXOS_FIM_OP = ('Faccao:', 'Facção:', 'Cidade:', 'Regiao:', 'Região:')
+
+PADRAO_FRACAO = re.compile(r'\d+/\d+')
+PADRAO_CODIGO_LONGO = re.compile(r'\d{8,}')
+
+PALAVRAS_DESCRICAO_PADRAO = (
+    'CAMISETA', 'CAMISA', 'BLUSA', 'CALCA', 'CALÇA', 'BERMUDA',
+    'SHORT', 'VESTIDO', 'SAIA', 'CASACO', 'JAQUETA', 'ROUPA',
+    'MASC', 'FEM', 'INFANTIL', 'ADULTO', 'CASUAL',
+)
+
+
+def carregar_vocabulario(caminho):
+    """
+    Lê as palavras de descrição de um arquivo texto (uma por linha,
+    '#' inicia comentário). Retorna None se o arquivo não existir.
+    """
+    if not os.path.exists(caminho):
+        return None
+    palavras = []
+    with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
+        for linha in f:
+            palavra = linha.split('#', 1)[0].strip()
+            if palavra:
+                palavras.append(palavra)
+    return tuple(palavras)
+
+
+class CasadorPalavras:
+    """Autômato Aho-Corasick: diz se algum termo do vocabulário aparece no texto"""
+
+    def __init__(self, palavras):
+        # Trie
+        transicoes = [{}]
+        final = [False]
+        for palavra in palavras:
+            estado = 0
+            for c in palavra.upper():
+                proximo = transicoes[estado].get(c)
+                if proximo is None:
+                    proximo = len(transicoes)
+                    transicoes[estado][c] = proximo
+                    transicoes.append({})
+                    final.append(False)
+                estado = proximo
+            final[estado] = True
+
+        # Links de falha em largura, já resolvidos num autômato determinístico:
+        # para cada estado, o próximo estado de qualquer caractere conhecido
+        falha = [0] * len(transicoes)
+        delta = [dict(transicoes[0])]
+        delta.extend({} for _ in range(len(transicoes) - 1))
+        fila = deque(transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            final[estado] = final[estado] or final[falha[estado]]
+            delta[estado] = dict(delta[falha[estado]])
+            for c, proximo in transicoes[estado].items():
+                falha[proximo] = delta[falha[estado]].get(c, 0) if estado else 0
+                delta[estado][c] = proximo
+                fila.append(proximo)
+
+        self._delta = delta
+        self._final = final
+        self.palavras = tuple(palavras)
+
+    def encontrar(self, texto_upper):
+        """True se alguma palavra do vocabulário ocorre em texto_upper"""
+        delta = self._delta
+        final = self._final
+        estado = 0
+        for c in texto_upper:
+            estado = delta[estado].get(c, 0)
+            if final[estado]:
+                return True
+        return False
+
+
+class ClassificadorCampos:
+    """Tabela de classificação usada por PPLAParser._processar_textos_inteligente"""
+
+    def __init__(self, palavras_descricao=None):
+        self.palavras_descricao = tuple(palavras_descricao or PALAVRAS_DESCRICAO_PADRAO)
+        self.descricao = CasadorPalavras(self.palavras_descricao)
+
+    def classificar(self, texto):
+        """Classe do texto: rótulo, fração, código longo ou None (texto livre)"""
+        classe = ROTULOS.get(texto)
+        if classe is not None:
+            return classe
+        # Fração e código longo sempre começam com dígito
+        if texto[:1].isdigit():
+            if PADRAO_FRACAO.fullmatch(texto):
+                return CLASSE_FRACAO
+            if PADRAO_CODIGO_LONGO.fullmatch(texto):
+                return CLASSE_CODIGO
+        return None
+
+    def classificar_todos(self, textos):
+        return [self.classificar(texto) for texto in textos]
+
+    def parece_descricao(self, texto):
+        """Verifica se o texto contém alguma palavra do vocabulário de descrição"""
+        return self.descricao.encontrar(texto.upper())
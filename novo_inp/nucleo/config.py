@@ -0,0 +1,107 @@
+from .diagnostico import diag, INFO
+
+# ====================== CONFIGURAÇÃO DO NÚCLEO ======================
+# Valores lidos no momento do uso: um script pode trocar, por exemplo,
+# config.CODEPAGE_IMPRESSORA antes de processar o primeiro arquivo.
+
+# Palavras que identificam a descrição do produto (uma por linha).
+# Se o arquivo não existir, usa o vocabulário padrão do classificador.
+ARQUIVO_VOCABULARIO = r"C:\Imp\palavras_descricao.txt"
+
+# Nível das mensagens no console (DEBUG mostra a análise de cada texto e a
+# visualização de cada etiqueta), quantas mensagens recentes ficam em
+# memória para serem mostradas junto com um erro (0 desativa) e a partir de
+# que nível elas entram nesse rastro (DEBUG custa em cada texto analisado)
+NIVEL_DIAGNOSTICO = INFO
+RASTRO_DIAGNOSTICO = 200
+NIVEL_RASTRO_DIAGNOSTICO = INFO
+diag.configurar(NIVEL_DIAGNOSTICO, RASTRO_DIAGNOSTICO, NIVEL_RASTRO_DIAGNOSTICO)
+
+# Página de código configurada na impressora: os textos vão para ela já
+# codificados assim (caracteres sem equivalente saem como '?')
+CODEPAGE_IMPRESSORA = 'cp850'  # ou 'cp1252'
+
+# BPLB já gerado, guardado pela hash de cada etiqueta PPLA (None desativa o disco)
+PASTA_CACHE_BPLB = r"C:\Imp\cache_bplb"
+
+# Arquivos com pelo menos LIMIAR_PARALELO etiquetas (lotes de fim de dia) são
+# analisados e convertidos em vários processos, em lotes de TAMANHO_LOTE_PARALELO.
+# Abaixo do limiar subir os processos custa mais do que analisar direto (0 desativa).
+LIMIAR_PARALELO = 5000
+TAMANHO_LOTE_PARALELO = 250
+PROCESSOS_PARALELO = None  # None usa todos os núcleos
+
+# Formulários na memória da impressora (FS/FR do BPLB): o cabeçalho e a borda
+# vão uma vez e cada etiqueta manda só os seus comandos; um layout que se
+# repete (séries da mesma OP) passa a mandar só os dados. Desative se a
+# impressora não aceitar formulários.
+USAR_FORMULARIOS = False
+FORMULARIOS_NA_IMPRESSORA = 16
+
+# Etiquetas seguidas que só mudam na fração (1/3, 2/3, 3/3) ou num código de
+# barras sequencial vão num trabalho só, com os contadores da impressora
+# (formulário com C0..C9 e P com a quantidade). Precisa de formulários na
+# impressora, como USAR_FORMULARIOS.
+AGRUPAR_SERIES = False
+
+# Envio em lote: o handle da impressora fica aberto e as etiquetas vão em
+# trabalhos RAW de até ETIQUETAS_POR_TRABALHO envios ou BYTES_POR_TRABALHO
+# bytes. Antes de cada trabalho espera a fila do spooler ficar abaixo de
+# TRABALHOS_NA_FILA e a impressora sair de pausa/erro, consultando a cada
+# INTERVALO_CONSULTA_IMPRESSORA segundos por até ESPERA_MAXIMA_IMPRESSORA.
+ETIQUETAS_POR_TRABALHO = 50
+BYTES_POR_TRABALHO = 256 * 1024
+TRABALHOS_NA_FILA = 2
+INTERVALO_CONSULTA_IMPRESSORA = 0.5
+ESPERA_MAXIMA_IMPRESSORA = 60
+
+# Como os bytes chegam à impressora (nucleo/transporte.py); o nome da
+# impressora configurado é o destino:
+#   'spooler'     - spooler do Windows (pywin32), nome da impressora
+#   'tcp'         - RAW na porta 9100, "host" ou "host:porta"
+#   'dispositivo' - arquivo de dispositivo no Linux, como /dev/usb/lp0
+#   'pasta'       - um arquivo .bplb por trabalho numa pasta de spool
+TRANSPORTE_IMPRESSORA = 'spooler'
+# TCP: conexões livres guardadas por impressora (com keep-alive), por
+# quanto tempo uma conexão parada é reaproveitada e o timeout de conexão/envio
+PORTA_TCP_IMPRESSORA = 9100
+CONEXOES_TCP_POR_IMPRESSORA = 2
+TEMPO_OCIOSO_TCP = 30
+TIMEOUT_TCP_IMPRESSORA = 10
+
+# Monitoramento: o aviso do watchdog só anota o arquivo; uma linha lê o
+# Imprime.txt ESPERA_ARQUIVO_ALTERADO segundos depois (o ERP salva em várias
+# escritas) e põe as etiquetas numa fila de até TAMANHO_FILA_IMPRESSAO
+# trabalhos, esvaziada por uma linha por impressora (a ordem das etiquetas e
+# os formulários carregados são de cada impressora).
+# Com a fila cheia a leitura espera a impressora.
+ESPERA_ARQUIVO_ALTERADO = 0.5
+TAMANHO_FILA_IMPRESSAO = 200
+
+# Várias impressoras no monitoramento (FilaImpressao com uma lista): como
+# cada trabalho é distribuído ('rodizio', 'menos_ocupada', 'faccao' ou
+# 'regiao' - a mesma facção/região sempre na mesma impressora) e por quanto
+# tempo uma impressora em que o envio falhou fica fora, com os trabalhos
+# dela passados para as outras.
+ESTRATEGIA_IMPRESSORAS = 'menos_ocupada'
+TEMPO_FORA_DO_RODIZIO = 30
+
+# Ritmo do envio (nucleo/ritmo.py): cada trabalho tem um tempo previsto de
+# impressão pelo comprimento da etiqueta (Q, pontos), a velocidade (S) e a
+# quantidade (P); antes de um trabalho o envio espera a impressora ter no
+# máximo SEGUNDOS_ADIANTADOS de etiquetas por imprimir, e cada trabalho
+# fecha ao chegar nesse tempo.
+#   'adaptativo' - corrige a previsão com a hora em que os trabalhos saem da
+#                  fila (spooler, pasta); sem esse retorno (TCP), igual a 'fixo'
+#   'fixo'       - só a previsão
+#   'desligado'  - envia sem esperar (só a fila do spooler, TRABALHOS_NA_FILA)
+RITMO_IMPRESSORA = 'adaptativo'
+SEGUNDOS_ADIANTADOS = 5.0
+# BPT-L42: 203 dpi (8 pontos/mm); mm/s de cada S (S3 = 2,5 pol/s)
+PONTOS_POR_MM = 8
+VELOCIDADES_IMPRESSORA = {1: 38, 2: 51, 3: 63, 4: 89, 5: 102}
+ESPACO_ENTRE_ETIQUETAS_MM = 3
+SEGUNDOS_EXTRA_POR_ETIQUETA = 0.1
+# Usados até o primeiro Q/S do trabalho (o gerador manda Q550 e S3)
+COMPRIMENTO_ETIQUETA_PADRAO = 550
+VELOCIDADE_PADRAO = 3
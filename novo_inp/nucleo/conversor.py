@@ -0,0 +1,262 @@
+from .etiqueta import Etiqueta
+from .etiqueta_preguicosa import EtiquetaPreguicosa
+from .cache_bplb import assinatura_configuracao
+from .gerador import BPLBGenerator
+from .normalizacao import somente_digitos
+from .series import agrupar_series
+
+# ====================== CONVERSOR PPLA -> BPLB ======================
+# Layout da etiqueta BPT-L42 a partir dos campos lidos pelo PPLAParser.
+
+class PPLAtoBPLBConverter:
+    # Aumente ao mudar posições/fontes de converter_etiqueta: invalida o cache de BPLB
+    VERSAO_LAYOUT = 1
+    
+    def __init__(self, codepage=None):
+        self.generator = BPLBGenerator(codepage)
+        self.generator.montar_fixos = self._adicionar_fixos
+        
+    def assinatura_configuracao(self, parser):
+        """Tudo que muda o BPLB de uma mesma etiqueta PPLA: layout, cabeçalho e vocabulário"""
+        self.generator.iniciar_etiqueta()
+        return assinatura_configuracao(
+            self.VERSAO_LAYOUT,
+            self.generator.prefixo,
+            self.generator.codepage,
+            parser.classificador.palavras_descricao,
+        )
+        
+    @staticmethod
+    def _adicionar_fixos(generator):
+        """Borda, igual em todas as etiquetas: vai para o prefixo compilado do gerador"""
+        largura = generator.largura_etiqueta
+        altura = generator.altura_etiqueta
+        generator.adicionar_borda(20, 20, largura-20, altura-20, espessura=2)
+        
+    def converter_serie_bytes(self, etiquetas):
+        """
+        Trabalhos (quantidade, bytes) para várias etiquetas: as que só mudam
+        na fração ou num código seguido saem num programa só, com contadores
+        da impressora; as demais, com o programa de cada uma.
+        """
+        return agrupar_series(self.converter_etiqueta_bytes(etiqueta) for etiqueta in etiquetas)
+    
+    def converter_etiqueta(self, etiqueta_data):
+        return self.converter_etiqueta_bytes(etiqueta_data).decode(self.generator.codepage)
+    
+    def converter_etiqueta_bytes(self, etiqueta_data):
+        self._montar_etiqueta(etiqueta_data)
+        return self.generator.obter_comandos_bytes()
+    
+    def converter_etiqueta_buffer(self, etiqueta_data):
+        """
+        Como converter_etiqueta_bytes, sem copiar o programa: memoryview do
+        buffer do gerador, válida até a próxima conversão
+        """
+        self._montar_etiqueta(etiqueta_data)
+        return self.generator.obter_comandos_buffer()
+    
+    def _montar_etiqueta(self, etiqueta_data):
+        # Aceita também o dict usado antes do registro Etiqueta
+        if isinstance(etiqueta_data, dict):
+            etiqueta_data = Etiqueta.de_dict(etiqueta_data)
+        elif isinstance(etiqueta_data, EtiquetaPreguicosa):
+            etiqueta_data = etiqueta_data.campos
+        
+        self.generator.iniciar_etiqueta()
+        largura = self.generator.largura_etiqueta
+        
+        # Posição Y inicial
+        y_pos = 50
+        
+        # Cada campo passa uma vez por remover_acentos; o texto já normalizado
+        # vai para o gerador com normalizado=True
+        
+        # TIPO (CONSERTO) - se existir
+        if etiqueta_data.tipo:
+            tipo = self.generator.remover_acentos(etiqueta_data.tipo)
+            x_pos = (largura - len(tipo) * 18) // 3
+            self.generator.adicionar_texto(x_pos, y_pos, tipo, fonte=3, tamanho_h=3, tamanho_v=3, normalizado=True)
+            y_pos += 70
+        
+        # Linha horizontal após o tipo (ou no topo se não houver tipo)
+        self.generator.adicionar_linha_horizontal(30, y_pos-10, largura-60)
+        y_pos += 20
+        
+        # OP e REF
+        op_texto = ""
+        if etiqueta_data.op:
+            op_numeros = somente_digitos(str(etiqueta_data.op))
+            op_texto = f"OP: {op_numeros[:8]}"  # Aumentei para 12 caracteres
+        
+        ref_texto = ""
+        if etiqueta_data.referencia:
+            ref_numeros = somente_digitos(str(etiqueta_data.referencia))
+            ref_texto = f"REF: {ref_numeros[:9]}"  # Aumentei para 12 caracteres
+        
+        # Fração (se existir)
+        fracao_texto = ""
+        if etiqueta_data.fracao:
+            fracao_texto = self.generator.remover_acentos(str(etiqueta_data.fracao))
+        
+        # Se tiver ambos OP e REF
+        if op_texto and ref_texto:
+            # OP na primeira linha
+            self.generator.adicionar_texto(40, y_pos, op_texto, fonte=3)
+            
+            # Fração no canto direito (se existir)
+            if fracao_texto:
+                x_fracao = largura - 50 - len(fracao_texto) * 24
+                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2, normalizado=True)
+            
+            y_pos += 30  # Espaço para a linha da REF
+            self.generator.adicionar_texto(40, y_pos, ref_texto, fonte=3)
+            y_pos += 40  # Espaçamento padrão após as duas linhas
+        
+        # Se tiver apenas OP
+        elif op_texto:
+            self.generator.adicionar_texto(40, y_pos, op_texto, fonte=3)
+            
+            # Fração no canto direito (se existir)
+            if fracao_texto:
+                x_fracao = largura - 40 - len(fracao_texto) * 24
+                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2, normalizado=True)
+            
+            y_pos += 40
+        
+        # Se tiver apenas REF
+        elif ref_texto:
+            self.generator.adicionar_texto(40, y_pos, ref_texto, fonte=3)
+            
+            # Fração no canto direito (se existir)
+            if fracao_texto:
+                x_fracao = largura - 40 - len(fracao_texto) * 24
+                self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2, normalizado=True)
+            
+            y_pos += 40
+        
+        # Se não tiver OP nem REF, mas tiver fração
+        elif fracao_texto:
+            x_fracao = largura - 40 - len(fracao_texto) * 24
+            self.generator.adicionar_texto(x_fracao, y_pos, fracao_texto, fonte=4, tamanho_h=2, tamanho_v=2, normalizado=True)
+            y_pos += 40
+        
+        else:
+            y_pos += 20
+        
+        # DESCRIÇÃO (produto)
+        if etiqueta_data.descricao:
+            descricao = self.generator.remover_acentos(str(etiqueta_data.descricao))
+            
+            # Quebra de linha inteligente
+            if len(descricao) > 30:
+                palavras = descricao.split()
+                linha_atual = []
+                comprimento_atual = 0
+                partes = []
+                
+                for palavra in palavras:
+                    if comprimento_atual + len(palavra) + 1 <= 30:
+                        linha_atual.append(palavra)
+                        comprimento_atual += len(palavra) + 1
+                    else:
+                        if linha_atual:
+                            partes.append(' '.join(linha_atual))
+                        linha_atual = [palavra]
+                        comprimento_atual = len(palavra)
+                
+                if linha_atual:
+                    partes.append(' '.join(linha_atual))
+                
+                # Limita a 2 linhas
+                for i, parte in enumerate(partes[:2]):
+                    x_centro = (largura - len(parte) * 12) // 2
+                    self.generator.adicionar_texto(x_centro, y_pos, parte, fonte=3, normalizado=True)
+                    y_pos += 40 if i == 0 else 30
+            else:
+                x_centro = (largura - len(descricao) * 16) // 5
+                self.generator.adicionar_texto(x_centro, y_pos, descricao, fonte=3,tamanho_h=2, tamanho_v=2, normalizado=True)
+                y_pos += 50
+        
+        y_pos += 20
+        
+        # FACÇÃO
+        if etiqueta_data.faccao:
+            faccao = self.generator.remover_acentos(str(etiqueta_data.faccao))
+            self.generator.adicionar_legenda(40, y_pos, "FACCÃO:", fonte=3)
+            y_pos += 40
+            
+            # Quebra de linha para facção muito longa
+            if len(faccao) > 30:
+                partes = [faccao[i:i+30] for i in range(0, len(faccao), 30)]
+                for parte in partes[:2]:  # Limita a 2 linhas
+                    x_centro = (largura - len(parte) * 12) // 6
+                    self.generator.adicionar_texto(x_centro, y_pos, parte, fonte=2, tamanho_h=2, tamanho_v=2, normalizado=True)
+                    y_pos += 30
+            else:
+                x_centro = (largura - len(faccao) * 12) // 6
+                self.generator.adicionar_texto(x_centro, y_pos, faccao, fonte=2, tamanho_h=2, tamanho_v=2, normalizado=True)
+                y_pos += 40
+        
+        # CIDADE e REGIÃO
+        cidade_texto = ""
+        if etiqueta_data.cidade:
+            cidade = self.generator.remover_acentos(str(etiqueta_data.cidade))
+            cidade_texto = f"CIDADE: {cidade}"
+        
+        regiao_texto = ""
+        if etiqueta_data.regiao:
+            regiao = self.generator.remover_acentos(str(etiqueta_data.regiao))
+            regiao_texto = f"REGIAO: {regiao}"
+        
+        # Tenta colocar cidade e região na mesma linha
+        if cidade_texto and regiao_texto:
+            comprimento_total = len(cidade_texto) + len(regiao_texto) + 3
+            if comprimento_total * 8 <= largura - 80:
+                self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3, normalizado=True)
+                self.generator.adicionar_texto(40 + len(cidade_texto) * 8 + 150, y_pos, regiao_texto, fonte=3, normalizado=True)
+                y_pos += 40
+            else:
+                self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3, normalizado=True)
+                y_pos += 40
+                self.generator.adicionar_texto(40, y_pos, regiao_texto, fonte=3, normalizado=True)
+                y_pos += 40
+        
+        # Apenas cidade
+        elif cidade_texto:
+            self.generator.adicionar_texto(40, y_pos, cidade_texto, fonte=3, normalizado=True)
+            y_pos += 40
+        
+        # Apenas região
+        elif regiao_texto:
+            self.generator.adicionar_texto(40, y_pos, regiao_texto, fonte=3, normalizado=True)
+            y_pos += 40
+        
+        # CÓDIGO DE BARRAS (nova funcionalidade)
+        if etiqueta_data.codigo_barras:
+            codigo = str(etiqueta_data.codigo_barras)
+            # Adicionar espaço antes do código de barras
+            y_pos += 20
+            
+            # Centralizar o código de barras
+            # Estimativa: cada caractere do código 128 tem cerca de 11 unidades de largura
+            largura_estimada = len(codigo) * 11 * 3  # 3 é a largura da barra fina
+            x_barcode = max(100, (largura - largura_estimada) // 2)
+            
+            # Adicionar código de barras
+            self.generator.adicionar_codigo_barras(
+                x_barcode, 
+                y_pos, 
+                codigo,
+                tipo=1,           # Code128
+                largura_fina=3,   # Largura da barra fina
+                largura_larga=5,  # Largura da barra larga  
+                altura=80,        # Altura do código de barras
+                exibir_texto='B'  # Exibir texto abaixo
+            )
+            
+            # Espaço após código de barras
+            y_pos += 100
+        
+        # Finalizar etiqueta
+        self.generator.finalizar_etiqueta()
@@ -0,0 +1,123 @@
+import sys
+import time
+from collections import deque
+
+# ====================== DIAGNÓSTICO ======================
+# Mensagens com nível no lugar dos print("DEBUG: ...") incondicionais.
+# A mensagem só é formatada (msg % args) se for exibida ou guardada; com a
+# depuração desligada, diag.debug() volta logo na primeira linha. As
+# mensagens recentes (de INFO para cima; DEBUG só se o nível do rastro
+# pedir) ficam num buffer circular, já formatadas - o texto é o do momento
+# em que foram registradas -, e vão para o console quando acontece um erro.
+
+DEBUG = 10
+INFO = 20
+AVISO = 30
+ERRO = 40
+
+NOMES_NIVEIS = {DEBUG: 'DEBUG', INFO: 'INFO', AVISO: 'AVISO', ERRO: 'ERRO'}
+
+# Quantas mensagens recentes o buffer guarda (0 desativa) e a partir de que nível
+TAMANHO_RASTRO = 200
+NIVEL_RASTRO = INFO
+
+_agora = time.time
+
+
+def _formatar(msg, args):
+    if not args:
+        return msg
+    try:
+        return msg % args
+    except (TypeError, ValueError):
+        return f"{msg} {args!r}"
+
+
+class Diagnostico:
+    """
+    Saída com nível mínimo para o console e rastro em memória:
+
+        diag.debug("Posição %d: %r", i, texto)   # formatado só se exibido
+        diag.erro("Falha: %s", e)                 # também despeja o rastro
+    """
+
+    def __init__(self, nivel=INFO, tamanho_rastro=TAMANHO_RASTRO, saida=None, nivel_rastro=NIVEL_RASTRO):
+        self._saida = saida
+        self._rastro = None
+        self.nivel_rastro = nivel_rastro
+        self.configurar(nivel, tamanho_rastro)
+
+    def configurar(self, nivel=None, tamanho_rastro=None, nivel_rastro=None):
+        if nivel is not None:
+            self.nivel = nivel
+        if tamanho_rastro is not None:
+            self._rastro = deque(self._rastro or (), maxlen=tamanho_rastro) if tamanho_rastro > 0 else None
+        if nivel_rastro is not None:
+            self.nivel_rastro = nivel_rastro
+        self._guarda_debug = self._rastro is not None and self.nivel_rastro <= DEBUG
+        # Única verificação feita por diag.debug() antes de qualquer trabalho
+        self.depurando = self.nivel <= DEBUG or self._guarda_debug
+
+    def exibe(self, nivel):
+        """True se mensagens desse nível vão para o console"""
+        return nivel >= self.nivel
+
+    def debug(self, msg, *args):
+        if self.depurando:
+            texto = _formatar(msg, args)
+            if self._guarda_debug:
+                self._rastro.append((_agora(), DEBUG, texto))
+            if self.nivel <= DEBUG:
+                self._escrever(DEBUG, texto)
+
+    def info(self, msg, *args):
+        self._registrar(INFO, msg, args)
+
+    def aviso(self, msg, *args):
+        self._registrar(AVISO, msg, args)
+
+    def erro(self, msg, *args):
+        """Mostra o erro e, em seguida, as mensagens que levaram até ele"""
+        self._registrar(ERRO, msg, args)
+        self.despejar_rastro()
+
+    def _registrar(self, nivel, msg, args):
+        guardar = self._rastro is not None and nivel >= self.nivel_rastro
+        if not guardar and nivel < self.nivel:
+            return
+        # Formatada agora: os argumentos (etiquetas, dicts) podem mudar depois
+        texto = _formatar(msg, args)
+        if guardar:
+            self._rastro.append((_agora(), nivel, texto))
+        if nivel >= self.nivel:
+            self._escrever(nivel, texto)
+
+    def _escrever(self, nivel, texto):
+        # Só a depuração leva o prefixo; as demais mensagens já trazem o seu (❌, ⚠️)
+        if nivel == DEBUG:
+            texto = f"DEBUG: {texto}"
+        print(texto, file=self._saida or sys.stdout)
+
+    def rastro(self):
+        """Mensagens guardadas, já formatadas, da mais antiga à mais recente"""
+        if self._rastro is None:
+            return []
+        return [
+            f"{time.strftime('%H:%M:%S', time.localtime(instante))} "
+            f"{NOMES_NIVEIS.get(nivel, nivel)}: {texto}"
+            for instante, nivel, texto in self._rastro
+        ]
+
+    def despejar_rastro(self):
+        linhas = self.rastro()
+        if not linhas:
+            return
+        saida = self._saida or sys.stdout
+        print(f"🔎 Últimas {len(linhas)} mensagens de diagnóstico:", file=saida)
+        for linha in linhas:
+            print(f"   {linha}", file=saida)
+        self._rastro.clear()
+
+
+# Instância compartilhada pelos módulos
+diag = Diagnostico()
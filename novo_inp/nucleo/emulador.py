@@ -0,0 +1,207 @@
+import re
+import socketserver
+import threading
+
+from . import config
+from .impressora import ImpressoraBPLB
+
+# ====================== EMULADOR DE IMPRESSORA BPLB ======================
+# Impressora local para testes e benchmarks, sem pywin32 nem hardware:
+# recebe os mesmos bytes que iriam para o spooler, guarda os formulários
+# (FK/FS/FE) e, a cada P, registra a etiqueta impressa já com os dados
+# do formulário (FR + ?) no lugar das variáveis e contadores. Uma etiqueta
+# mandada por formulário fica igual à do programa completo. Como no EPL2,
+# o N fora de um FS limpa a imagem, inclusive o formulário chamado pelo FR
+# (o N de dentro do formulário faz parte dele e é impresso com ele).
+
+# Vnn,tamanho,justificação,"prompt" e Cdígitos,justificação,passo,"prompt"
+# (os contadores não têm número: são C0, C1... na ordem declarada)
+_VARIAVEL = re.compile(rb'V(\d\d),\d+,[LRCN],"[^"]*"$')
+_CONTADOR = re.compile(rb'C([1-9]),[LRCN],([+-]\d+),"[^"]*"$')
+# Partes do dado de um campo: "texto", V00 ou C0
+_PARTE = re.compile(rb'"([^"]*)"|(V\d\d|C\d)')
+
+
+class EmuladorBPLB(ImpressoraBPLB):
+    def __init__(self, nome_impressora="Emulador BPLB"):
+        super().__init__(nome_impressora)
+        self.formularios = {}
+        # Cada etiqueta impressa: (linhas do programa, quantidade)
+        self.etiquetas = []
+        self.trabalhos = 0
+        self.bytes_recebidos = 0
+        self._linhas = []
+        self._gravando = None
+        self._formulario = None
+        self._dados = None
+
+    def enviar_comandos(self, comandos_bplb):
+        """Interpreta o trabalho como a impressora; True, como se tivesse impresso"""
+        if isinstance(comandos_bplb, str):
+            comandos_bplb = comandos_bplb.encode(config.CODEPAGE_IMPRESSORA, 'replace')
+        dados = bytes(comandos_bplb)
+        self.trabalhos += 1
+        self.bytes_recebidos += len(dados)
+        for linha in dados.split(b"\n"):
+            self._interpretar(linha.rstrip(b"\r"))
+        self.conexao_ativa = True
+        return True
+
+    def _interpretar(self, linha):
+        if self._dados is not None:
+            # Depois do '?' vem um valor por variável/contador do formulário
+            self._dados.append(linha)
+            if len(self._dados) == len(self._formulario[0]):
+                self._formulario = (self._formulario[0], self._formulario[1], self._dados)
+                self._dados = None
+            return
+        if self._gravando is not None:
+            declaracoes, modelo = self.formularios[self._gravando]
+            variavel = _VARIAVEL.match(linha)
+            contador = _CONTADOR.match(linha)
+            if linha == b'FE':
+                self._gravando = None
+            elif variavel:
+                declaracoes.append((b"V" + variavel.group(1), 0))
+            elif contador:
+                numero = sum(1 for nome, _ in declaracoes if nome.startswith(b"C"))
+                declaracoes.append((b"C%d" % numero, int(contador.group(2))))
+            else:
+                modelo.append(linha)
+            return
+        if not linha:
+            return
+        if linha.startswith(b'FK'):
+            self.formularios.pop(linha[3:-1], None)
+        elif linha.startswith(b'FS'):
+            self._gravando = linha[3:-1]
+            self.formularios[self._gravando] = ([], [])
+        elif linha.startswith(b'FR'):
+            declaracoes, modelo = self.formularios[linha[3:-1]]
+            # O ? traz as variáveis em ordem de número e depois os contadores
+            variaveis = sorted(d for d in declaracoes if d[0].startswith(b"V"))
+            contadores = [d for d in declaracoes if d[0].startswith(b"C")]
+            self._formulario = (variaveis + contadores, modelo, [])
+        elif linha == b'N':
+            self._linhas = [linha]
+            self._formulario = None
+        elif linha == b'?':
+            self._dados = []
+            if not self._formulario[0]:
+                self._dados = None
+        elif linha.startswith(b'P'):
+            conjuntos, _, copias = linha[1:].partition(b',')
+            self._imprimir(int(conjuntos or 1), int(copias or 1))
+        else:
+            self._linhas.append(linha)
+
+    def _imprimir(self, conjuntos, copias):
+        """P conjuntos,cópias: os contadores andam a cada conjunto"""
+        if self._formulario is None:
+            self.etiquetas.extend((self._linhas, copias) for _ in range(conjuntos))
+        else:
+            declaracoes, modelo, dados = self._formulario
+            valores = {nome: valor for (nome, _), valor in zip(declaracoes, dados)}
+            for _ in range(conjuntos):
+                linhas = [self._preencher(linha, valores) for linha in modelo] + self._linhas
+                self.etiquetas.append((linhas, copias))
+                # O contador mantém os zeros à esquerda do valor informado
+                for nome, passo in declaracoes:
+                    if passo:
+                        valores[nome] = b"%0*d" % (len(valores[nome]), int(valores[nome]) + passo)
+        self._linhas = []
+        self._formulario = None
+
+    @staticmethod
+    def _preencher(linha, valores):
+        """Linha do modelo com o dado montado: "texto" e os valores de Vnn/Cn"""
+        aspas = linha.find(b'"')
+        inicio = linha.rfind(b',', 0, aspas if aspas >= 0 else len(linha)) + 1
+        partes = _PARTE.findall(linha[inicio:])
+        if not any(nome for _, nome in partes):
+            return linha
+        dado = b"".join(valores[nome] if nome else texto for texto, nome in partes)
+        return linha[:inicio] + b'"' + dado + b'"'
+
+    def programas(self):
+        """Cada etiqueta impressa como o programa BPLB completo equivalente"""
+        return [b"\n".join(linhas + [b"P%d" % quantidade]) + b"\n"
+                for linhas, quantidade in self.etiquetas]
+
+
+class ImpressoraTCPFalsa:
+    """
+    Impressora de rede local (RAW, como a porta 9100) para testar e medir o
+    TransporteTCP sem hardware. Cada conexão tem o seu EmuladorBPLB, que
+    recebe os bytes por linhas completas. Use com with; o destino para o
+    transporte 'tcp' fica em .endereco.
+    """
+
+    def __init__(self, host="127.0.0.1", porta=0):
+        self.emuladores = []
+        self.conexoes = 0
+        self.bytes_recebidos = 0
+        self._trava = threading.Lock()
+        self._linha = None
+        self._por_conexao = {}
+        impressora = self
+
+        class _Conexao(socketserver.BaseRequestHandler):
+            def handle(self):
+                impressora._receber(self.request)
+
+        class _Servidor(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            # Um trabalho por conexão chega a centenas de conexões seguidas
+            request_queue_size = 128
+
+            def process_request(self, conexao, endereco):
+                # Na linha que aceita as conexões: emuladores na ordem de chegada
+                impressora._aceitar(conexao)
+                super().process_request(conexao, endereco)
+
+        self._servidor = _Servidor((host, porta), _Conexao)
+        self.endereco = "%s:%d" % self._servidor.server_address[:2]
+
+    def __enter__(self):
+        self._linha = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._linha.start()
+        return self
+
+    def __exit__(self, *excecao):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def _aceitar(self, conexao):
+        emulador = EmuladorBPLB("Impressora TCP falsa")
+        with self._trava:
+            self.conexoes += 1
+            self.emuladores.append(emulador)
+            self._por_conexao[conexao] = emulador
+
+    def _receber(self, conexao):
+        with self._trava:
+            emulador = self._por_conexao.pop(conexao)
+        pendente = b""
+        while True:
+            dados = conexao.recv(65536)
+            if not dados:
+                break
+            pendente += dados
+            fim = pendente.rfind(b"\n") + 1
+            if fim:
+                with self._trava:
+                    self.bytes_recebidos += fim
+                    emulador.enviar_comandos(pendente[:fim])
+                pendente = pendente[fim:]
+
+    def etiquetas(self):
+        """Quantas etiquetas foram impressas, somando todas as conexões"""
+        with self._trava:
+            return sum(quantidade for emulador in self.emuladores for _, quantidade in emulador.etiquetas)
+
+    def programas(self):
+        """Programas impressos, conexão por conexão na ordem em que foram abertas"""
+        with self._trava:
+            return [programa for emulador in self.emuladores for programa in emulador.programas()]
+
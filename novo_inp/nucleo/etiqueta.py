@@ -0,0 +1,124 @@
+import sys
+
+# ====================== REGISTRO DE ETIQUETA ======================
+# Registros com __slots__ no lugar dos dicts por etiqueta: sem __dict__
+# por instância e acesso a atributo direto. Para o código que ainda usa
+# etiqueta['campo'] / etiqueta.get('campo'), aceitam também acesso por chave.
+
+CAMPOS_ETIQUETA = (
+    'numero', 'tipo', 'op', 'referencia', 'descricao', 'faccao',
+    'cidade', 'regiao', 'fracao', 'codigo_barras', 'codigos', 'textos',
+)
+
+# Campos com poucos valores distintos num arquivo (CONSERTO, facções,
+# cidades, regiões): a string é compartilhada entre as etiquetas
+CAMPOS_INTERNADOS = frozenset(('tipo', 'faccao', 'cidade', 'regiao'))
+
+
+def internar(texto):
+    return sys.intern(texto) if type(texto) is str else texto
+
+
+def _novo_registro(cls, campos):
+    return cls(**campos)
+
+
+class _Registro:
+    __slots__ = ()
+    # Todos os campos do registro, incluindo os das classes base
+    _CAMPOS = ()
+
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except (AttributeError, TypeError):
+            raise KeyError(campo) from None
+
+    def __setitem__(self, campo, valor):
+        if campo not in self._CAMPOS:
+            raise KeyError(campo)
+        setattr(self, campo, valor)
+
+    def __contains__(self, campo):
+        return campo in self._CAMPOS
+
+    def get(self, campo, padrao=None):
+        return getattr(self, campo, padrao) if campo in self._CAMPOS else padrao
+
+    def keys(self):
+        return iter(self._CAMPOS)
+
+    def como_dict(self):
+        return {campo: getattr(self, campo) for campo in self._CAMPOS}
+
+    def __eq__(self, outro):
+        if type(outro) is not type(self):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(outro, c) for c in self._CAMPOS)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Recriado pelo __init__ ao sair do pickle (análise em paralelo),
+        # para os campos internados voltarem a ser compartilhados
+        return _novo_registro, (type(self), self.como_dict())
+
+    def __repr__(self):
+        campos = ', '.join(f"{c}={getattr(self, c)!r}" for c in self._CAMPOS)
+        return f"{type(self).__name__}({campos})"
+
+
+class Etiqueta(_Registro):
+    """Campos de uma etiqueta lida do PPLA"""
+
+    __slots__ = CAMPOS_ETIQUETA
+    _CAMPOS = CAMPOS_ETIQUETA
+
+    def __init__(self, numero=0, tipo='', op='', referencia='', descricao='',
+                 faccao='', cidade='', regiao='', fracao='', codigo_barras='',
+                 codigos=(), textos=()):
+        self.numero = numero
+        self.tipo = internar(tipo)
+        self.op = op
+        self.referencia = referencia
+        self.descricao = descricao
+        self.faccao = internar(faccao)
+        self.cidade = internar(cidade)
+        self.regiao = internar(regiao)
+        self.fracao = fracao
+        self.codigo_barras = codigo_barras
+        self.codigos = codigos
+        self.textos = textos
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Monta a etiqueta a partir do dict usado antes (chaves desconhecidas são ignoradas)"""
+        return cls(**{campo: dados[campo] for campo in cls._CAMPOS if campo in dados})
+
+
+class ComandosEtiqueta(_Registro):
+    """Comandos de configuração PPLA encontrados na etiqueta (D, A, Q, E)"""
+
+    __slots__ = ('direcao', 'alinhamento', 'quantidade', 'final')
+    _CAMPOS = __slots__
+
+    def __init__(self, direcao='', alinhamento='', quantidade='', final=False):
+        self.direcao = direcao
+        self.alinhamento = alinhamento
+        self.quantidade = quantidade
+        self.final = final
+
+
+class EtiquetaDetalhada(Etiqueta):
+    """Etiqueta com os comandos e as posições de cada texto (converte_bbpla)"""
+
+    __slots__ = ('comandos', 'posicoes_texto', 'outros_comandos')
+    _CAMPOS = CAMPOS_ETIQUETA + __slots__
+
+    def __init__(self, **campos):
+        self.comandos = campos.pop('comandos', None) or ComandosEtiqueta()
+        self.posicoes_texto = campos.pop('posicoes_texto', None) or []
+        self.outros_comandos = campos.pop('outros_comandos', None) or []
+        campos.setdefault('codigos', [])
+        campos.setdefault('textos', [])
+        super().__init__(**campos)
@@ -0,0 +1,94 @@
+from .cache_bplb import chave_etiqueta
+from .ppla_lexer import extrair_registros, CODIFICACAO_ARQUIVO
+
+# ====================== ETIQUETA PREGUIÇOSA ======================
+# O parse_file só localiza as etiquetas. Cada uma guarda o trecho bruto e
+# analisa os campos, decodifica as posições ou gera o BPLB na primeira vez
+# que isso for pedido; o resultado fica guardado na própria etiqueta.
+# Quem só precisa das fronteiras e da hash (monitor), de uma etiqueta
+# (reimpressão) ou só das posições (ler_ppla) não paga pelo resto.
+
+class EtiquetaPreguicosa:
+    """
+    Trecho PPLA de uma etiqueta (bytes copiados do arquivo lido), com número e
+    posição no arquivo. Campos são lidos como na Etiqueta (etiqueta.op,
+    etiqueta['op'], etiqueta.get('op')) e disparam a análise.
+    """
+
+    __slots__ = ('numero', 'raw', 'inicio', 'fim', '_parser',
+                 '_campos', '_hash', '_posicoes', '_bplb')
+
+    def __init__(self, parser, raw, numero, inicio=None, fim=None):
+        self.numero = numero
+        self.raw = raw
+        self.inicio = inicio
+        self.fim = fim
+        self._parser = parser
+        self._campos = None
+        self._hash = None
+        self._posicoes = None
+        # (conversor, bplb) do último conversor usado
+        self._bplb = (None, None)
+
+    @property
+    def extraida(self):
+        """Se os campos já foram analisados"""
+        return self._campos is not None
+
+    @property
+    def campos(self):
+        """Etiqueta (ou EtiquetaDetalhada, no AnalisadorPPLA) com os campos lidos"""
+        if self._campos is None:
+            self._campos = self._parser._extrair_campos(self)
+        return self._campos
+
+    @property
+    def hash(self):
+        """Hash do trecho bruto (a mesma do cache de BPLB, sem a configuração)"""
+        if self._hash is None:
+            self._hash = chave_etiqueta(self.raw, b'')
+        return self._hash
+
+    @property
+    def posicoes(self):
+        """Posições dos textos (array de cabecalhos_ppla), sem analisar os campos"""
+        if self._posicoes is None:
+            # numpy só é exigido por quem pede as posições
+            from .cabecalhos_ppla import decodificar_cabecalhos
+            textos, cabecalhos, _ = extrair_registros(self.raw)
+            cabecalhos = [c.decode(CODIFICACAO_ARQUIVO, 'ignore') for c in cabecalhos]
+            self._posicoes = decodificar_cabecalhos(cabecalhos, textos)
+        return self._posicoes
+
+    def bplb(self, conversor=None):
+        """BPLB em bytes; refeito só se vier um conversor diferente do anterior"""
+        if conversor is None:
+            from .conversor import PPLAtoBPLBConverter
+            conversor = self._bplb[0] or PPLAtoBPLBConverter()
+        if self._bplb[0] is not conversor:
+            self._bplb = (conversor, conversor.converter_etiqueta_bytes(self.campos))
+        return self._bplb[1]
+
+    # Acesso aos campos como na Etiqueta
+
+    def __getattr__(self, campo):
+        if campo.startswith('_'):
+            raise AttributeError(campo)
+        return getattr(self.campos, campo)
+
+    def __getitem__(self, campo):
+        return self.campos[campo]
+
+    def __contains__(self, campo):
+        return campo in self.campos
+
+    def __eq__(self, outro):
+        if isinstance(outro, EtiquetaPreguicosa):
+            outro = outro.campos
+        return self.campos == outro
+
+    __hash__ = None
+
+    def __repr__(self):
+        campos = self._campos if self._campos is not None else '<não analisada>'
+        return f"{type(self).__name__}({self.numero}, {campos!r})"
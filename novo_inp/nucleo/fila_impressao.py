@@ -0,0 +1,360 @@
+import queue
+import threading
+import time
+from collections import deque
+
+from . import config
+from .diagnostico import diag
+from .impressora import ImpressoraBPLB
+
+# ====================== FILA DE IMPRESSÃO ======================
+# O monitor não imprime na linha do watchdog. O aviso de alteração só
+# anota o arquivo (o que já estiver anotado e ainda não foi lido é
+# ignorado) e volta na hora. Uma linha de leitura analisa o arquivo e põe os
+# trabalhos já convertidos numa fila limitada; as linhas da impressora
+# tiram da fila e enviam. Se a impressora atrasa, a fila enche e a leitura
+# espera uma vaga, sem perder avisos nem segurar o watchdog.
+#
+# Com várias impressoras (pool), cada uma tem a sua fila e a sua linha, e
+# cada trabalho vai para uma delas conforme a estratégia:
+#   'rodizio'         - uma de cada vez, em ordem
+#   'menos_ocupada'   - a com menos trabalhos na fila
+#   'faccao'/'regiao' - afinidade: a mesma facção (região) vai sempre para a
+#                       mesma impressora; na primeira vez, para a menos ocupada
+#                       (o valor vem da etiqueta analisada, ou do cache junto
+#                       com o BPLB; sem ele, vale a menos ocupada)
+# Uma impressora em que o envio falha sai do rodízio e os trabalhos dela
+# (inclusive o que falhou) vão para as outras; depois de
+# TEMPO_FORA_DO_RODIZIO segundos ela volta e é testada no próximo trabalho.
+# Um trabalho da fila só conta como enviado quando o trabalho RAW em que foi
+# escrito é terminado: se um envio ou o fim do trabalho falha, o spooler
+# descarta o trabalho inteiro, e todos os que já estavam nele voltam à fila.
+
+ESTRATEGIAS = ('rodizio', 'menos_ocupada', 'faccao', 'regiao')
+
+class TrabalhoImpressao:
+    """
+    Um envio da fila: o BPLB de uma etiqueta ou um trabalho completo (série).
+    faccao/regiao: da etiqueta (numa série, da primeira), para a afinidade.
+    """
+
+    __slots__ = ('descricao', 'bplb', 'etiqueta', 'faccao', 'regiao', 'enfileirado')
+
+    def __init__(self, descricao, bplb, etiqueta=True, faccao='', regiao=''):
+        self.descricao = descricao
+        self.bplb = bytes(bplb)  # o buffer do gerador é reaproveitado
+        self.etiqueta = etiqueta  # True: enviar_etiqueta; False: enviar_comandos
+        self.faccao = faccao
+        self.regiao = regiao
+        self.enfileirado = time.monotonic()
+
+
+class _Membro:
+    """Uma impressora da fila: a sua ImpressoraBPLB, os trabalhos dela e a situação no rodízio"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.impressora = ImpressoraBPLB(nome)
+        self.fila = deque()
+        self.ocupada = False     # enviando um trabalho agora
+        self.abertos = []        # escritos no trabalho RAW aberto, ainda não terminado
+        self.ativa = True
+        self.volta_em = 0.0      # monotonic em que volta ao rodízio
+        self.enviados = 0
+        self.falhas = 0
+
+    def carga(self):
+        return len(self.fila) + self.ocupada
+
+
+class FilaImpressao:
+    """
+    Fila limitada entre a leitura do spool e uma ou mais impressoras.
+
+    processar(caminho) é chamado na linha de leitura para cada arquivo
+    avisado; ele analisa o arquivo e entrega os trabalhos com enfileirar()
+    (processar_e_imprimir com fila=). impressoras é um nome ou uma lista de
+    nomes (destinos do transporte); cada uma tem uma linha só e a sua
+    ImpressoraBPLB, com a sessão aberta enquanto houver trabalhos. Numa
+    impressora os trabalhos saem na ordem; entre impressoras, não.
+    Nomes repetidos são a mesma impressora.
+    """
+
+    def __init__(self, impressoras, processar, maximo=None, estrategia=None):
+        if isinstance(impressoras, str):
+            impressoras = [impressoras]
+        # Uma linha por impressora física: os formulários (FK/FR) e a ordem
+        # das etiquetas são do envio dela
+        impressoras = list(dict.fromkeys(impressoras))
+        self.estrategia = estrategia or config.ESTRATEGIA_IMPRESSORAS
+        if self.estrategia not in ESTRATEGIAS:
+            raise ValueError(f"Estratégia desconhecida: {self.estrategia!r} (use {', '.join(ESTRATEGIAS)})")
+        self.membros = [_Membro(nome) for nome in impressoras]
+        self.nome_impressora = ", ".join(impressoras)
+        self.processar = processar
+        self.maximo = maximo or config.TAMANHO_FILA_IMPRESSAO
+        self._arquivos = queue.Queue()
+        self._avisados = set()
+        self._trava = threading.Lock()
+        # Trabalhos e situação das impressoras mudam sob a mesma trava
+        self._mudou = threading.Condition(self._trava)
+        self._na_fila = 0
+        self._rodizio = 0
+        self._afinidade = {}
+        self._parando = False
+        self._linhas = []
+        # Contadores para estado()
+        self.enviados = 0
+        self.falhas = 0
+        self.esperas = 0          # vezes que a leitura esperou a fila cheia
+        self.tempo_esperando = 0.0
+        self.maior_fila = 0
+        self.maior_atraso = 0.0   # segundos entre enfileirar e enviar
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *excecao):
+        self.parar()
+
+    def iniciar(self):
+        self._parando = False
+        linhas = [threading.Thread(target=self._ler, name="leitura-spool", daemon=True)]
+        for i, membro in enumerate(self.membros):
+            linhas.append(threading.Thread(target=self._imprimir, args=(membro,),
+                                           name=f"impressora-{i + 1}", daemon=True))
+        for linha in linhas:
+            linha.start()
+        self._linhas = linhas
+
+    def parar(self, esperar=True):
+        """
+        Termina as linhas; com esperar, depois de imprimir o que já está na
+        fila (o que só tem impressora fora do rodízio é descartado)
+        """
+        if not self._linhas:
+            return
+        self._arquivos.put(None)
+        self._linhas[0].join()
+        with self._mudou:
+            if not esperar:
+                self._descartar()
+            self._parando = True
+            self._mudou.notify_all()
+        for linha in self._linhas[1:]:
+            linha.join()
+        with self._mudou:
+            if self._na_fila:
+                diag.erro("❌ %d trabalho(s) não enviado(s): nenhuma impressora disponível", self._na_fila)
+                self._descartar()
+        self._linhas = []
+
+    # ---------------------- Lado do watchdog ----------------------
+
+    def avisar(self, caminho):
+        """Anota o arquivo alterado para a linha de leitura; não bloqueia"""
+        with self._trava:
+            if caminho in self._avisados:
+                return False
+            self._avisados.add(caminho)
+        self._arquivos.put(caminho)
+        return True
+
+    def estado(self):
+        """Profundidade da fila, contadores e cada impressora, para o console e os benchmarks"""
+        with self._trava:
+            return {
+                'fila': self._na_fila, 'maximo': self.maximo,
+                'arquivos': self._arquivos.qsize(), 'maior_fila': self.maior_fila,
+                'enviados': self.enviados, 'falhas': self.falhas,
+                'esperas': self.esperas, 'tempo_esperando': self.tempo_esperando,
+                'maior_atraso': self.maior_atraso,
+                'impressoras': [{'nome': m.nome, 'ativa': m.ativa, 'fila': m.carga(),
+                                 'enviados': m.enviados, 'falhas': m.falhas} for m in self.membros],
+            }
+
+    # ---------------------- Lado da leitura ----------------------
+
+    def _ler(self):
+        while True:
+            caminho = self._arquivos.get()
+            if caminho is None:
+                return
+            # O ERP salva em várias escritas: avisos até aqui viram uma leitura só
+            time.sleep(config.ESPERA_ARQUIVO_ALTERADO)
+            with self._trava:
+                self._avisados.discard(caminho)
+            try:
+                self.processar(caminho)
+            except Exception as e:
+                diag.erro("❌ Erro ao processar arquivo alterado: %s", e)
+
+    def enfileirar(self, trabalho):
+        """Põe o TrabalhoImpressao na fila de uma impressora; com a fila cheia, espera uma vaga"""
+        with self._mudou:
+            if self._na_fila >= self.maximo:
+                self.esperas += 1
+                diag.debug("Fila de impressão cheia (%d), aguardando a impressora", self.maximo)
+                inicio = time.monotonic()
+                while self._na_fila >= self.maximo:
+                    self._mudou.wait()
+                self.tempo_esperando += time.monotonic() - inicio
+            self._escolher(trabalho).fila.append(trabalho)
+            self._na_fila += 1
+            self.maior_fila = max(self.maior_fila, self._na_fila)
+            self._mudou.notify_all()
+        return True
+
+    def aguardar(self):
+        """Espera a fila esvaziar (tudo que foi enfileirado enviado ou falho)"""
+        with self._mudou:
+            while self._na_fila or any(membro.ocupada or membro.abertos for membro in self.membros):
+                self._mudou.wait()
+
+    # ---------------------- Distribuição (com a trava) ----------------------
+
+    def _escolher(self, trabalho):
+        """Impressora do trabalho pela estratégia; sem nenhuma ativa, a que volta primeiro"""
+        ativos = [membro for membro in self.membros if membro.ativa]
+        if not ativos:
+            return min(self.membros, key=lambda membro: membro.volta_em)
+        if self.estrategia == 'rodizio':
+            self._rodizio += 1
+            return ativos[(self._rodizio - 1) % len(ativos)]
+        menos_ocupado = min(ativos, key=_Membro.carga)
+        if self.estrategia == 'menos_ocupada':
+            return menos_ocupado
+        chave = getattr(trabalho, self.estrategia)
+        if not chave:
+            return menos_ocupado
+        membro = self._afinidade.get(chave)
+        if membro is None or not membro.ativa:
+            membro = self._afinidade[chave] = menos_ocupado
+        return membro
+
+    def _redistribuir(self, trabalhos):
+        for trabalho in trabalhos:
+            self._escolher(trabalho).fila.append(trabalho)
+
+    def _tirar_do_rodizio(self, membro, perdidos):
+        """
+        O envio falhou: a impressora sai e os trabalhos dela (os perdidos no
+        trabalho RAW descartado e os que esperavam) vão para as outras
+        """
+        membro.ativa = False
+        membro.volta_em = time.monotonic() + config.TEMPO_FORA_DO_RODIZIO
+        pendentes = perdidos + list(membro.fila)
+        membro.fila.clear()
+        self._na_fila += len(perdidos)
+        restantes = sum(1 for m in self.membros if m.ativa)
+        diag.aviso("⚠️  %s fora do rodízio por %d s; %d trabalho(s) passam para %s",
+                   membro.nome, config.TEMPO_FORA_DO_RODIZIO, len(pendentes),
+                   f"{restantes} outra(s) impressora(s)" if restantes else "a primeira que voltar")
+        self._redistribuir(pendentes)
+
+    def _voltar_ao_rodizio(self, membro):
+        membro.ativa = True
+        diag.info("🔄 %s de volta ao rodízio", membro.nome)
+        # Trabalhos que esperavam numa impressora ainda fora (nenhuma estava ativa)
+        for outro in self.membros:
+            if not outro.ativa and outro.fila:
+                pendentes = list(outro.fila)
+                outro.fila.clear()
+                self._redistribuir(pendentes)
+
+    def _descartar(self):
+        for membro in self.membros:
+            membro.fila.clear()
+            membro.abertos.clear()
+        self._na_fila = 0
+        self._mudou.notify_all()
+
+    # ---------------------- Lado da impressora ----------------------
+
+    def _proximo(self, membro):
+        """Próximo trabalho da impressora (com a trava), ou None se não houver agora"""
+        if not membro.ativa and time.monotonic() >= membro.volta_em:
+            self._voltar_ao_rodizio(membro)
+        if not (membro.ativa and membro.fila):
+            return None
+        membro.ocupada = True
+        self._na_fila -= 1
+        self._mudou.notify_all()
+        return membro.fila.popleft()
+
+    def _terminou(self):
+        """Parando e sem nada que uma impressora ativa ainda possa enviar"""
+        return self._parando and not any(m.ocupada or m.abertos or m.ativa and m.fila for m in self.membros)
+
+    def _confirmar(self, membro):
+        """O trabalho RAW aberto foi terminado: os trabalhos escritos nele foram enviados"""
+        self.enviados += len(membro.abertos)
+        membro.enviados += len(membro.abertos)
+        membro.abertos = []
+
+    def _falhou(self, membro, perdidos):
+        """Com a trava: os perdidos vão para as outras impressoras (com uma só, se perdem)"""
+        self.falhas += 1
+        membro.falhas += 1
+        if len(self.membros) > 1:
+            self._tirar_do_rodizio(membro, perdidos)
+        else:
+            diag.erro("❌ %d trabalho(s) perdido(s) em %s", len(perdidos), membro.nome)
+
+    def _imprimir(self, membro):
+        impressora = membro.impressora
+        while True:
+            with self._mudou:
+                trabalho = self._proximo(membro)
+            if trabalho is None:
+                # Nada para esta impressora: fecha o trabalho aberto para ela imprimir já
+                terminado = impressora.fechar_sessao()
+                with self._mudou:
+                    if terminado:
+                        self._confirmar(membro)
+                    elif membro.abertos:
+                        diag.erro("❌ Falha ao terminar o trabalho em %s", membro.nome)
+                        perdidos, membro.abertos = membro.abertos, []
+                        self._falhou(membro, perdidos)
+                    self._mudou.notify_all()
+                    while True:
+                        trabalho = self._proximo(membro)
+                        if trabalho is not None or self._terminou():
+                            break
+                        espera = None if membro.ativa else max(0.0, membro.volta_em - time.monotonic())
+                        self._mudou.wait(espera)
+                if trabalho is None:
+                    return
+            atraso = time.monotonic() - trabalho.enfileirado
+            sessao = None
+            try:
+                sessao = impressora.abrir_sessao()
+                terminados = sessao.trabalhos if sessao is not None else 0
+                if trabalho.etiqueta:
+                    ok = impressora.enviar_etiqueta(trabalho.bplb)
+                else:
+                    ok = impressora.enviar_comandos(trabalho.bplb)
+            except Exception as e:
+                diag.erro("❌ Erro ao enviar %s: %s", trabalho.descricao, e)
+                ok = False
+            # O envio terminou o trabalho RAW anterior: os abertos foram aceitos
+            trocou = sessao is not None and sessao.trabalhos > terminados
+            if not ok:
+                diag.erro("❌ Falha ao enviar %s para %s", trabalho.descricao, membro.nome)
+                # Sessão descartada; os formulários carregados podem ter se perdido
+                impressora.fechar_sessao()
+                if impressora.envio_formularios is not None:
+                    impressora.envio_formularios.esquecer()
+            with self._mudou:
+                membro.ocupada = False
+                self.maior_atraso = max(self.maior_atraso, atraso)
+                if trocou:
+                    self._confirmar(membro)
+                if ok:
+                    membro.abertos.append(trabalho)
+                else:
+                    # O trabalho RAW aberto foi descartado com tudo que já tinha
+                    perdidos, membro.abertos = membro.abertos + [trabalho], []
+                    self._falhou(membro, perdidos)
+                self._mudou.notify_all()
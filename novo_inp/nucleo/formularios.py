@@ -0,0 +1,182 @@
+import hashlib
+from collections import OrderedDict
+
+from . import config
+from .diagnostico import diag
+
+# ====================== FORMULÁRIOS NA IMPRESSORA ======================
+# O programa BPLB de uma etiqueta é separado em modelo (cabeçalho, borda,
+# linhas e as posições/fontes de cada texto) e dados (o texto entre aspas
+# de cada comando A/B). Dois tipos de formulário ficam na memória da
+# impressora (FS ... FE):
+#   base   - as linhas fixas do começo (cabeçalho e borda), iguais em quase
+#            todas as etiquetas; a etiqueta manda FR"base" e os seus comandos
+#   modelo - o programa inteiro, com V00..V99 no lugar dos dados; carregado
+#            quando o mesmo modelo se repete (séries da mesma OP, mesmas
+#            posições), e aí a etiqueta manda só FR"modelo", os dados e o P
+# As posições dos textos centralizados mudam com o tamanho do texto, então
+# um modelo só compensa quando aparece seguidas vezes.
+#
+# O que se supõe da impressora (formulários do EPL2):
+#   - FK"nome" apaga o formulário (sem erro se não existir) e vem antes de
+#     cada FS, para regravar um formulário com o mesmo nome
+#   - entre FS e FE ficam primeiro as declarações Vnn e depois o programa,
+#     começando pelo N: o N gravado no formulário limpa a imagem quando ele
+#     é chamado, e um N depois do FR descartaria o formulário chamado
+#   - FR"nome" seguido de ? recebe uma linha de dado por variável, na ordem
+#     dos números (V00, V01...), e depois os contadores
+#   - comandos depois do FR (sem ?) são desenhados por cima do formulário,
+#     e o P imprime a imagem; o formulário continua gravado para o próximo FR
+
+# Comandos cujo último campo é o dado entre aspas
+_COMANDOS_COM_DADO = (b'A', b'B')
+
+# Tamanho máximo declarado para cada variável (V00,99,...)
+TAMANHO_VARIAVEL = 99
+
+# Vezes que um modelo é mandado sobre a base antes de virar formulário:
+# a carga custa mais que uma etiqueta, e só compensa numa série
+REPETICOES_ANTES_DO_MODELO = 1
+
+
+class ProgramaDividido:
+    """Programa BPLB de uma etiqueta separado para o envio por formulários"""
+
+    __slots__ = ('fixo', 'corpo', 'modelo', 'dados', 'impressao')
+
+    def __init__(self, fixo, corpo, modelo, dados, impressao):
+        self.fixo = fixo            # linhas sem dado do começo
+        self.corpo = corpo          # as demais linhas, como no programa
+        self.modelo = modelo        # programa com Vnn no lugar dos dados
+        self.dados = dados          # dado de cada Vnn
+        self.impressao = impressao  # linha P final
+
+
+def dividir_programa(bplb):
+    """
+    ProgramaDividido de um programa BPLB, ou None se ele não tiver a forma
+    esperada (aí é enviado inteiro).
+    """
+    linhas = bytes(bplb).split(b"\n")
+    if linhas and not linhas[-1]:
+        linhas.pop()
+    if not linhas or not linhas[-1].startswith(b'P'):
+        return None
+    impressao = linhas.pop()
+    modelo = []
+    dados = []
+    fim_fixo = None
+    for i, linha in enumerate(linhas):
+        if linha.startswith(_COMANDOS_COM_DADO):
+            aspas = linha.find(b'"')
+            if aspas < 0 or not linha.endswith(b'"') or aspas == len(linha) - 1:
+                return None
+            if len(dados) == 100:
+                # Só existem V00..V99
+                return None
+            if fim_fixo is None:
+                fim_fixo = i
+            modelo.append(linha[:aspas] + b"V%02d" % len(dados))
+            dados.append(linha[aspas + 1:-1])
+        elif linha[:2] in (b'FS', b'FE', b'FR', b'FK') or linha.startswith(b'?'):
+            return None
+        else:
+            modelo.append(linha)
+    if fim_fixo is None:
+        fim_fixo = len(linhas)
+    return ProgramaDividido(b"\n".join(linhas[:fim_fixo]), b"\n".join(linhas[fim_fixo:]),
+                            b"\n".join(modelo), dados, impressao)
+
+
+def nome_formulario(modelo):
+    """Nome do formulário (até 8 caracteres) a partir do modelo"""
+    return 'E' + hashlib.blake2b(modelo, digest_size=4).hexdigest()[:7]
+
+
+def carga_formulario(nome, modelo, variaveis=0):
+    """Comandos que gravam o modelo como formulário nome na impressora"""
+    declaracoes = b"".join(b'V%02d,%d,N,""\n' % (i, TAMANHO_VARIAVEL) for i in range(variaveis))
+    nome = nome.encode('ascii')
+    return (b'FK"%b"\nFS"%b"\n' % (nome, nome)) + declaracoes + modelo + b"\nFE\n"
+
+
+def dados_etiqueta(nome, dados, impressao):
+    """Comandos de uma etiqueta que usa o formulário modelo nome"""
+    return b'FR"%b"\n?\n' % nome.encode('ascii') + b"".join(d + b"\n" for d in dados) + impressao + b"\n"
+
+
+def etiqueta_sobre_base(nome, corpo, impressao):
+    """Comandos de uma etiqueta desenhada sobre o formulário base nome"""
+    return b'FR"%b"\n' % nome.encode('ascii') + corpo + b"\n" + impressao + b"\n"
+
+
+class EnvioFormularios:
+    """
+    Envia etiquetas para uma impressora (qualquer objeto com enviar_comandos)
+    usando formulários. Guarda até config.FORMULARIOS_NA_IMPRESSORA
+    formulários; o usado há mais tempo é apagado (FK) para caber um novo.
+    """
+
+    def __init__(self, impressora, maximo=None):
+        self.impressora = impressora
+        self.maximo = maximo or config.FORMULARIOS_NA_IMPRESSORA
+        # Formulários que esta sessão já carregou na impressora
+        self._carregados = OrderedDict()
+        # Quantas vezes cada modelo recente foi mandado sobre a base
+        self._vistos = OrderedDict()
+        self.bytes_enviados = 0
+        self.bytes_programas = 0
+
+    def enviar(self, bplb):
+        """Envia o BPLB de uma etiqueta; True se a impressora aceitou"""
+        self.bytes_programas += len(bplb)
+        dividido = dividir_programa(bplb)
+        if dividido is None:
+            diag.debug("Programa sem a forma esperada, enviado inteiro")
+            return self._enviar(bplb)
+
+        nome = nome_formulario(dividido.modelo)
+        if nome in self._carregados:
+            self._carregados.move_to_end(nome)
+            return self._enviar(dados_etiqueta(nome, dividido.dados, dividido.impressao))
+        
+        if self._vistos.get(nome, 0) >= REPETICOES_ANTES_DO_MODELO:
+            # Modelo repetido: carga e etiqueta no mesmo trabalho
+            del self._vistos[nome]
+            carga = self._carregar(nome, dividido.modelo, len(dividido.dados))
+            comandos = dados_etiqueta(nome, dividido.dados, dividido.impressao)
+        else:
+            self._vistos[nome] = self._vistos.pop(nome, 0) + 1
+            if len(self._vistos) > 4 * self.maximo:
+                self._vistos.popitem(last=False)
+            base = nome_formulario(dividido.fixo)
+            carga = b""
+            if base in self._carregados:
+                self._carregados.move_to_end(base)
+            else:
+                carga = self._carregar(base, dividido.fixo)
+            comandos = etiqueta_sobre_base(base, dividido.corpo, dividido.impressao)
+            nome = base
+        
+        if not self._enviar(carga + comandos):
+            self._carregados.pop(nome, None)
+            return False
+        return True
+    
+    def _carregar(self, nome, modelo, variaveis=0):
+        """Carga do formulário, apagando antes o usado há mais tempo se não couber"""
+        apagar = b""
+        while len(self._carregados) >= self.maximo:
+            antigo, _ = self._carregados.popitem(last=False)
+            apagar += b'FK"%b"\n' % antigo.encode('ascii')
+        diag.debug("Carregando o formulário %s na impressora", nome)
+        self._carregados[nome] = True
+        return apagar + carga_formulario(nome, modelo, variaveis)
+
+    def esquecer(self):
+        """A impressora foi reiniciada/trocada: recarrega os formulários na próxima etiqueta"""
+        self._carregados.clear()
+
+    def _enviar(self, dados):
+        self.bytes_enviados += len(dados)
+        return self.impressora.enviar_comandos(dados)
@@ -0,0 +1,109 @@
+from . import config
+from .normalizacao import normalizar, codificar
+
+# ====================== GERADOR BPLB ======================
+
+class BPLBGenerator:
+    """Monta os comandos BPLB de uma etiqueta"""
+    
+    def __init__(self, codepage=None):
+        # Programa da etiqueta em bytes, na página de código da impressora:
+        # o prefixo compilado seguido dos comandos, cada um com o seu \n.
+        # O mesmo bytearray é reaproveitado de uma etiqueta para a outra.
+        self._buffer = bytearray()
+        self.codepage = codepage or config.CODEPAGE_IMPRESSORA
+        self.largura_etiqueta = 800
+        self.altura_etiqueta = 550
+        # Função que adiciona os comandos iguais em todas as etiquetas (a borda,
+        # no conversor). Vai para o prefixo junto com o cabeçalho.
+        self.montar_fixos = None
+        # Prefixo compilado e legendas fixas já montadas, do perfil atual
+        self.prefixo = b""
+        self._perfil = None
+        self._legendas = {}
+        
+    def remover_acentos(self, texto):
+        """Remove acentos e caracteres especiais"""
+        if not texto:
+            return ""
+        return normalizar(str(texto))
+    
+    def codificar(self, texto):
+        """Texto na página de código da impressora"""
+        return codificar(str(texto), self.codepage)
+    
+    def iniciar_etiqueta(self):
+        """Inicia uma nova etiqueta BPLB"""
+        # Perfil novo (tamanho da etiqueta, codepage, comandos fixos): recompila
+        perfil = (self.largura_etiqueta, self.altura_etiqueta, self.codepage, self.montar_fixos)
+        if perfil != self._perfil:
+            self._compilar_prefixo()
+            self._perfil = perfil
+        try:
+            # Volta para o fim do prefixo; o bytearray continua o mesmo
+            del self._buffer[len(self.prefixo):]
+        except BufferError:
+            # Alguém ainda segura a memoryview da etiqueta anterior: ela fica
+            # com o buffer antigo e esta etiqueta começa num novo
+            self._buffer = bytearray(self.prefixo)
+    
+    def _compilar_prefixo(self):
+        """Cabeçalho e comandos fixos, juntos em bytes uma vez por perfil"""
+        self._buffer = bytearray(b"N\nD7\nS3\nJF\nQ%d\nq%d\n" % (self.altura_etiqueta, self.largura_etiqueta))
+        if self.montar_fixos is not None:
+            self.montar_fixos(self)
+        self.prefixo = bytes(self._buffer)
+        self._legendas = {}
+        
+    def adicionar_texto(self, x, y, texto, fonte=2, tamanho_h=1, tamanho_v=1, normalizado=False):
+        """Adiciona comando de texto BPLB (normalizado=True: texto já passou por remover_acentos)"""
+        texto_limpo = self.codificar(texto if normalizado else self.remover_acentos(texto))
+        self._buffer += b'A%d,%d,0,%d,%d,%d,N,"%b"\n' % (x, y, fonte, tamanho_h, tamanho_v, texto_limpo)
+        
+    def adicionar_legenda(self, x, y, texto, fonte=2, tamanho_h=1, tamanho_v=1):
+        """Como adicionar_texto, para textos fixos (FACCÃO:): montado uma vez por posição"""
+        chave = (x, y, texto, fonte, tamanho_h, tamanho_v)
+        cmd = self._legendas.get(chave)
+        if cmd is None:
+            inicio = len(self._buffer)
+            self.adicionar_texto(x, y, texto, fonte, tamanho_h, tamanho_v)
+            cmd = self._legendas[chave] = bytes(self._buffer[inicio:])
+        else:
+            self._buffer += cmd
+        
+    def adicionar_codigo_barras(self, x, y, codigo, tipo=1, largura_fina=3, largura_larga=5, altura=80, exibir_texto='B'):
+        """Adiciona comando de código de barras BPLB"""
+        self._buffer += b'B%d,%d,0,%d,%d,%d,%d,%b,"%b"\n' % (
+            x, y, tipo, largura_fina, largura_larga, altura,
+            self.codificar(exibir_texto), self.codificar(codigo))
+    
+    def adicionar_linha_horizontal(self, x, y, comprimento, espessura=1):
+        self._buffer += b"LE%d,%d,%d,%d\n" % (x, y, comprimento, espessura)
+    
+    def adicionar_linha_vertical(self, x, y, comprimento, espessura=1):
+        self._buffer += b"LE%d,%d,%d,%d\n" % (x, y, espessura, comprimento)
+    
+    def adicionar_borda(self, x1, y1, x2, y2, espessura=2):
+        self._buffer += b"LE%d,%d,%d,%d\nLE%d,%d,%d,%d\nLE%d,%d,%d,%d\nLE%d,%d,%d,%d\n" % (
+            x1, y1, x2-x1, espessura,
+            x1, y2, x2-x1, espessura,
+            x1, y1, espessura, y2-y1,
+            x2-espessura, y1, espessura, y2-y1)
+        
+    def finalizar_etiqueta(self, quantidade=1):
+        self._buffer += b"P%d\n" % quantidade
+        
+    def obter_comandos(self):
+        """Comandos como texto (visualização e arquivo .bplb)"""
+        return self._buffer.decode(self.codepage)
+    
+    def obter_comandos_bytes(self):
+        """Comandos prontos para a impressora, sem passar por str (uma cópia do buffer)"""
+        return bytes(self._buffer)
+    
+    def obter_comandos_buffer(self):
+        """
+        Comandos sem cópia: memoryview do buffer, válida até o próximo
+        iniciar_etiqueta. Para quem só escreve (impressora, arquivo).
+        """
+        return memoryview(self._buffer)
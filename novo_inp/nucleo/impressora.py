@@ -0,0 +1,276 @@
+import time
+
+from . import config
+from .diagnostico import diag
+from .formularios import EnvioFormularios
+from .ritmo import RitmoImpressora
+from .transporte import criar_transporte, win32print
+
+# ====================== IMPRESSORA ======================
+
+def listar_impressoras():
+    """Nomes das impressoras locais e de rede do spooler do Windows"""
+    if win32print is None:
+        return []
+    try:
+        impressoras = win32print.EnumPrinters(
+            win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
+        )
+        return [printer[2] for printer in impressoras]
+    except Exception:
+        return []
+
+def impressora_padrao():
+    """Impressora padrão do spooler do Windows, ou None (sem pywin32 ou sem padrão)"""
+    if win32print is None:
+        return None
+    try:
+        return win32print.GetDefaultPrinter()
+    except Exception:
+        return None
+
+# Exemplo de destino de cada transporte fora do spooler, para os menus
+EXEMPLOS_DESTINO = {
+    'tcp': '192.168.0.50:9100',
+    'dispositivo': '/dev/usb/lp0',
+    'pasta': '/var/spool/etiquetas',
+}
+
+def pedir_destinos(tipo=None, varios=False):
+    """
+    Pergunta no console o destino de um transporte fora do spooler (host:porta,
+    dispositivo ou pasta; com varios, um ou mais separados por vírgula) e
+    confere cada um com criar_transporte. Devolve a lista, vazia se o
+    usuário só der Enter.
+    """
+    tipo = tipo or config.TRANSPORTE_IMPRESSORA
+    exemplo = EXEMPLOS_DESTINO.get(tipo, '')
+    while True:
+        resposta = input(f"\nDestino da impressora ({tipo}, ex.: {exemplo}) ou Enter para cancelar: ").strip()
+        if not resposta:
+            return []
+        partes = resposta.split(",") if varios else [resposta]
+        destinos = list(dict.fromkeys(parte.strip() for parte in partes if parte.strip()))
+        try:
+            for destino in destinos:
+                criar_transporte(destino, tipo)
+        except (RuntimeError, ValueError) as e:
+            print(f"❌ {e}")
+            continue
+        return destinos
+
+class SessaoImpressora:
+    """
+    Transporte aberto durante um lote: as etiquetas vão em trabalhos com
+    várias etiquetas cada, fechados ao chegar a ETIQUETAS_POR_TRABALHO
+    envios ou BYTES_POR_TRABALHO bytes. Antes de abrir um trabalho, espera a
+    fila e a impressora (pausa, erro, sem papel) em vez de um intervalo
+    fixo, quando o transporte informa o estado. Com um RitmoImpressora, o
+    trabalho também fecha ao somar SEGUNDOS_ADIANTADOS de impressão prevista
+    e o próximo espera a impressora dar conta. Use com with, ou chame
+    fechar() no fim.
+    """
+    
+    def __init__(self, transporte, etiquetas_por_trabalho=None, bytes_por_trabalho=None, ritmo=None):
+        self.transporte = transporte
+        self.etiquetas_por_trabalho = etiquetas_por_trabalho or config.ETIQUETAS_POR_TRABALHO
+        self.bytes_por_trabalho = bytes_por_trabalho or config.BYTES_POR_TRABALHO
+        self.ritmo = ritmo
+        self._em_trabalho = False
+        self._envios = 0
+        self._bytes = 0
+        self._previsto = 0.0  # segundos de impressão previstos no trabalho aberto
+        self.trabalhos = 0
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excecao):
+        self.fechar()
+        
+    def enviar_comandos(self, comandos_bplb):
+        """Escreve no trabalho aberto (abre transporte/trabalho se preciso); True se foi aceito"""
+        if isinstance(comandos_bplb, str):
+            comandos_bplb = comandos_bplb.encode(config.CODEPAGE_IMPRESSORA, 'replace')
+        tamanho = len(comandos_bplb)
+        previsto = self.ritmo.prever(comandos_bplb) if self.ritmo is not None else 0.0
+        try:
+            if self._em_trabalho and (self._envios >= self.etiquetas_por_trabalho or
+                                      self._bytes + tamanho > self.bytes_por_trabalho or
+                                      self.ritmo is not None and self._previsto >= self.ritmo.adiantamento):
+                self._fechar_trabalho()
+            if not self._em_trabalho:
+                self._abrir_trabalho()
+            self.transporte.escrever(comandos_bplb)
+        except Exception as e:
+            diag.erro("❌ Erro ao enviar para impressora: %s", e)
+            # Descarta o transporte; o próximo envio abre de novo. O trabalho
+            # não chegou inteiro: não é terminado nem conta no ritmo
+            self._em_trabalho = False
+            self.fechar()
+            return False
+        self._envios += 1
+        self._bytes += tamanho
+        self._previsto += previsto
+        return True
+    
+    def _abrir_trabalho(self):
+        self.transporte.abrir()
+        if self.ritmo is not None:
+            self.ritmo.aguardar(self._consultar_fila)
+        self._aguardar_impressora()
+        self.transporte.iniciar_trabalho()
+        self._em_trabalho = True
+        self._envios = self._bytes = 0
+        self._previsto = 0.0
+        
+    def _fechar_trabalho(self):
+        self._em_trabalho = False
+        self.transporte.terminar_trabalho()
+        self.trabalhos += 1
+        if self.ritmo is not None:
+            self.ritmo.enviado(self._previsto)
+        diag.debug("Trabalho com %d envio(s), %d bytes, %.1f s previstos, fechado",
+                   self._envios, self._bytes, self._previsto)
+        
+    def _estado(self):
+        """(parada, fila) do transporte, ou None se ele não informa ou a consulta falhou"""
+        try:
+            return self.transporte.estado()
+        except Exception as e:
+            diag.debug("Estado da impressora indisponível: %s", e)
+            return None
+    
+    def _consultar_fila(self):
+        estado = self._estado()
+        return None if estado is None else estado[1]
+    
+    def _aguardar_impressora(self):
+        """Espera a fila baixar de TRABALHOS_NA_FILA e a impressora sair de pausa/erro"""
+        inicio = time.monotonic()
+        avisado = False
+        while True:
+            estado = self._estado()
+            if estado is None:
+                # Transporte sem retorno (TCP, dispositivo): segue sem esperar
+                return
+            parada, fila = estado
+            if self.ritmo is not None:
+                self.ritmo.observar(fila)
+            if not parada and fila < config.TRABALHOS_NA_FILA:
+                return
+            if time.monotonic() - inicio >= config.ESPERA_MAXIMA_IMPRESSORA:
+                diag.aviso("⚠️  %s ainda ocupada (%d trabalho(s) na fila); enviando mesmo assim",
+                           self.transporte.destino, fila)
+                return
+            if parada and not avisado:
+                diag.aviso("⏸️  %s parada, aguardando...", self.transporte.destino)
+                avisado = True
+            time.sleep(config.INTERVALO_CONSULTA_IMPRESSORA)
+    
+    def fechar(self):
+        """Fecha o trabalho aberto e o transporte; False se algo falhou"""
+        ok = True
+        try:
+            if self._em_trabalho:
+                self._fechar_trabalho()
+        except Exception as e:
+            diag.erro("❌ Erro ao fechar o trabalho de impressão: %s", e)
+            ok = False
+        finally:
+            self._em_trabalho = False
+            try:
+                self.transporte.fechar()
+            except Exception as e:
+                diag.erro("❌ Erro ao fechar a impressora: %s", e)
+                ok = False
+        return ok
+
+class ImpressoraBPLB:
+    def __init__(self, nome_impressora=None, transporte=None):
+        # nome_impressora é o destino do transporte: nome no spooler,
+        # "host:porta", /dev/usb/lp0 ou a pasta de spool
+        self.nome_impressora = nome_impressora
+        self.transporte = transporte  # None usa config.TRANSPORTE_IMPRESSORA
+        self.conexao_ativa = False
+        # Formulários já carregados nesta impressora (config.USAR_FORMULARIOS)
+        self.envio_formularios = None
+        # Sessão aberta por abrir_sessao: os envios vão para ela
+        self.sessao = None
+        # Previsão do tempo de impressão (config.RITMO_IMPRESSORA), mantida
+        # de uma sessão para a outra com o que já foi aprendido
+        self.ritmo = None
+        # Transporte reaproveitado entre as sessões: ele sabe quais trabalhos
+        # da fila são deste programa; (destino, tipo) para qual foi criado
+        self._transporte = None
+        self._destino_transporte = None
+        
+    def listar_impressoras(self):
+        return listar_impressoras()
+    
+    def _criar_sessao(self):
+        destino = (self.nome_impressora, self.transporte or config.TRANSPORTE_IMPRESSORA)
+        if self._destino_transporte != destino:
+            try:
+                self._transporte = criar_transporte(*destino)
+            except (RuntimeError, ValueError) as e:
+                print(f"❌ {e}")
+                return None
+            self._destino_transporte = destino
+        transporte = self._transporte
+        ritmo = None
+        if config.RITMO_IMPRESSORA != 'desligado':
+            if self.ritmo is None:
+                self.ritmo = RitmoImpressora()
+            ritmo = self.ritmo
+        return SessaoImpressora(transporte, ritmo=ritmo)
+    
+    def abrir_sessao(self):
+        """
+        Daqui até fechar_sessao, enviar_comandos escreve num trabalho aberto
+        (SessaoImpressora) em vez de abrir a impressora a cada etiqueta
+        """
+        if self.sessao is None and self.nome_impressora:
+            self.sessao = self._criar_sessao()
+        return self.sessao
+    
+    def fechar_sessao(self):
+        """Termina o trabalho aberto; False se ele não foi aceito (o spooler o descarta)"""
+        if self.sessao is None:
+            return True
+        sessao, self.sessao = self.sessao, None
+        return sessao.fechar()
+    
+    def enviar_etiqueta(self, bplb):
+        """
+        Envia o BPLB de uma etiqueta. Com config.USAR_FORMULARIOS, o que é
+        fixo fica em formulários na impressora e vai só uma vez.
+        """
+        if not config.USAR_FORMULARIOS:
+            return self.enviar_comandos(bplb)
+        if self.envio_formularios is None:
+            self.envio_formularios = EnvioFormularios(self)
+        return self.envio_formularios.enviar(bplb)
+    
+    def enviar_comandos(self, comandos_bplb):
+        """Envia comandos BPLB para a impressora configurada"""
+        if not self.nome_impressora:
+            print("❌ Nenhuma impressora configurada!")
+            return False
+        
+        if self.sessao is not None:
+            if not self.sessao.enviar_comandos(comandos_bplb):
+                return False
+            self.conexao_ativa = True
+            return True
+        
+        # Fora de uma sessão: um trabalho só com estes comandos
+        sessao = self._criar_sessao()
+        if sessao is None:
+            return False
+        # bytes/bytearray/memoryview seguem direto, sem cópia
+        if not (sessao.enviar_comandos(comandos_bplb) and sessao.fechar()):
+            return False
+        print(f"✅ Comandos enviados para {self.nome_impressora}")
+        self.conexao_ativa = True
+        return True
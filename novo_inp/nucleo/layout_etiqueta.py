@@ -0,0 +1,192 @@
+from collections import OrderedDict
+
+from .etiqueta import CAMPOS_INTERNADOS, internar
+from .normalizacao import somente_digitos
+from .classificador_campos import (
+    ROTULOS, PADRAO_FRACAO, PADRAO_CODIGO_LONGO, CLASSE_FRACAO, CLASSE_CODIGO,
+    CLASSE_TIPO, CLASSE_OP, CLASSE_REF, CLASSE_FACCAO, CLASSE_CIDADE, CLASSE_REGIAO,
+)
+
+# ====================== PLANOS POR LAYOUT ======================
+# O ERP usa poucos layouts fixos: os cabeçalhos dos registros 19 se repetem
+# e só o texto muda. A primeira etiqueta de cada layout passa pela análise
+# heurística; dela sai um plano (posição do texto -> campo) que preenche as
+# etiquetas seguintes do mesmo layout por atribuição direta.
+
+# Campos copiados do texto como estão / só com os dígitos do texto
+CAMPOS_TEXTO = ('tipo', 'descricao', 'faccao', 'cidade', 'regiao', 'fracao', 'codigo_barras')
+CAMPOS_DIGITOS = ('op', 'referencia')
+
+# Campo que a heurística tem que ter achado para cada rótulo presente; só
+# uma etiqueta completa vira plano (a descrição é sempre exigida)
+CAMPO_POR_ROTULO = {
+    CLASSE_TIPO: 'tipo',
+    CLASSE_OP: 'op',
+    CLASSE_REF: 'referencia',
+    CLASSE_FACCAO: 'faccao',
+    CLASSE_CIDADE: 'cidade',
+    CLASSE_REGIAO: 'regiao',
+}
+
+# Campos que o fallback da descrição não repete (_encontrar_descricao_fallback)
+CAMPOS_FORA_DO_FALLBACK = ('op', 'referencia', 'faccao', 'cidade', 'regiao', 'codigo_barras')
+
+# Layouts guardados em memória (os menos usados saem primeiro)
+MAXIMO_LAYOUTS = 256
+
+
+def _classe_assinatura(texto):
+    """Rótulo fixo, forma de fração ou de código longo (como no classificador), ou None"""
+    if texto in ROTULOS:
+        return texto
+    if texto[:1].isdigit():
+        if PADRAO_FRACAO.fullmatch(texto):
+            return CLASSE_FRACAO
+        if PADRAO_CODIGO_LONGO.fullmatch(texto):
+            return CLASSE_CODIGO
+    return None
+
+
+def assinatura_layout(cabecalhos, textos):
+    """
+    Impressão digital do layout: a sequência de cabeçalhos, sem o texto,
+    mais os rótulos fixos (OP:, Ref:, Cidade:...) nas posições em que aparecem
+    e onde há fração e código longo. Uma etiqueta sem código de barras não
+    ensina um plano que depois deixaria de fora o código de outra.
+    """
+    return tuple(cabecalhos), tuple(map(_classe_assinatura, textos))
+
+
+def descricao_aceita(texto, classificador, valores):
+    """
+    Se a heurística do parser aceitaria o texto como descrição: mais de 5
+    caracteres, sem ':' no fim e com palavra do vocabulário (diferente da OP
+    e da referência) ou, no fallback, com ao menos duas palavras e diferente
+    de todos os outros campos. valores: {campo: valor} dos outros campos.
+    """
+    if len(texto) <= 5 or texto.endswith(':'):
+        return False
+    if (classificador.parece_descricao(texto) and
+            texto != valores.get('op') and texto != valores.get('referencia')):
+        return True
+    return (len(texto.split()) >= 2 and
+            all(texto != valores.get(campo) for campo in CAMPOS_FORA_DO_FALLBACK))
+
+
+def _validador(campo):
+    """
+    Função que confere se o valor lido pela posição ainda tem a forma
+    esperada para o campo (a descrição é conferida à parte, em _ler)
+    """
+    if campo in CAMPOS_DIGITOS:
+        return lambda valor: len(valor) >= 6
+    if campo == 'fracao':
+        return PADRAO_FRACAO.fullmatch
+    if campo == 'codigo_barras':
+        return PADRAO_CODIGO_LONGO.fullmatch
+    return str.strip
+
+
+class PlanoExtracao:
+    """Posição do texto de onde sai cada campo, para um layout"""
+
+    __slots__ = ('posicoes', '_leitura')
+
+    def __init__(self, posicoes):
+        # Tupla de (campo, índice do texto, só dígitos?)
+        self.posicoes = posicoes
+        # O mesmo, com o validador e se o valor é internado, resolvidos uma vez
+        self._leitura = tuple((campo, indice, digitos, _validador(campo), campo in CAMPOS_INTERNADOS)
+                              for campo, indice, digitos in posicoes)
+
+    @classmethod
+    def aprender(cls, textos, etiqueta, classificador):
+        """
+        Monta o plano a partir de uma etiqueta já preenchida pela heurística.
+        Devolve None se a etiqueta estiver incompleta, se algum valor puder ter
+        vindo de mais de uma posição ou se o plano não reproduzir o resultado.
+        """
+        exigidos = {CAMPO_POR_ROTULO[ROTULOS[texto]] for texto in textos if texto in ROTULOS}
+        exigidos.add('descricao')
+        if not all(getattr(etiqueta, campo) for campo in exigidos):
+            return None
+
+        posicoes = []
+        for campo in CAMPOS_TEXTO + CAMPOS_DIGITOS:
+            valor = getattr(etiqueta, campo)
+            if not valor:
+                continue
+            digitos = campo in CAMPOS_DIGITOS
+            indices = [indice for indice, texto in enumerate(textos)
+                       if (somente_digitos(texto) if digitos else texto) == valor]
+            if len(indices) != 1:
+                return None
+            posicoes.append((campo, indices[0], digitos))
+
+        plano = cls(tuple(posicoes))
+        valores = plano._ler(textos, classificador)
+        if valores is None or any(getattr(etiqueta, campo) != valor for campo, valor in valores):
+            return None
+        return plano
+
+    def _ler(self, textos, classificador):
+        valores = []
+        for campo, indice, digitos, valido, internado in self._leitura:
+            valor = textos[indice]
+            if digitos:
+                valor = somente_digitos(valor)
+            if not valido(valor):
+                return None
+            valores.append((campo, internar(valor) if internado else valor))
+        # A descrição só vale com as mesmas regras da heurística, que
+        # dependem do vocabulário e dos outros campos
+        lidos = dict(valores)
+        descricao = lidos.pop('descricao', None)
+        if descricao is not None and not descricao_aceita(descricao, classificador, lidos):
+            return None
+        return valores
+
+    def aplicar(self, textos, etiqueta, classificador):
+        """
+        Preenche a etiqueta pelas posições do plano. Não altera nada e
+        devolve False se algum valor não tiver a forma esperada (a
+        descrição, a que a heurística aceitaria com o classificador).
+        """
+        valores = self._ler(textos, classificador)
+        if valores is None:
+            return False
+        for campo, valor in valores:
+            setattr(etiqueta, campo, valor)
+        return True
+
+
+class CacheLayouts:
+    """Planos por assinatura de layout, com descarte do menos usado"""
+
+    def __init__(self, maximo=MAXIMO_LAYOUTS):
+        self.maximo = maximo
+        self._planos = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def buscar(self, assinatura):
+        """Plano do layout, ou None se ainda não houver um"""
+        plano = self._planos.get(assinatura)
+        if plano is None:
+            self.faltas += 1
+            return None
+        self._planos.move_to_end(assinatura)
+        self.acertos += 1
+        return plano
+
+    def guardar(self, assinatura, plano):
+        """Guarda o plano; None (etiqueta não serviu de modelo) é ignorado"""
+        if plano is None or self.maximo <= 0:
+            return
+        self._planos[assinatura] = plano
+        self._planos.move_to_end(assinatura)
+        if len(self._planos) > self.maximo:
+            self._planos.popitem(last=False)
+
+    def __len__(self):
+        return len(self._planos)
@@ -0,0 +1,236 @@
+import hashlib
+import mmap
+import re
+from itertools import islice
+
+# ====================== LEITOR DO ARQUIVO DE SPOOL ======================
+# Mapeia o arquivo em memória (mmap) e localiza as etiquetas direto nos
+# bytes com bytes.find. Cada etiqueta sai como um memoryview do mapa; só
+# os textos dos registros são decodificados depois, pelo lexer.
+
+MARCA_INICIO = b"<xpml><page quantity='0'"
+MARCA_FIM = b'<xpml></page></xpml><xpml><end/></xpml>'
+COMANDO_QUANTIDADE = b'Q0001'
+COMANDO_IMPRIMIR = ord('E')
+
+# Mesmo conjunto de espaços que o \s de um padrão em bytes
+_ESPACOS = frozenset(b' \t\n\r\x0b\x0c')
+
+_PADRAO_ALTERNATIVO = re.compile(rb'(n.*?Q0001\s*E\s*)', re.DOTALL)
+
+# Bytes do começo do arquivo e de antes da última fronteira consumida que
+# entram na assinatura usada para detectar truncamento/reescrita
+JANELA_ASSINATURA = 4096
+
+
+class LeitorSpool:
+    """
+    Arquivo de spool mapeado em memória. Use como contexto:
+
+        with LeitorSpool(caminho) as leitor:
+            leitor.hash_md5()
+            for etiqueta_raw in leitor.iterar_etiquetas(): ...
+
+    Os memoryviews devolvidos só valem enquanto o leitor estiver aberto.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._arquivo = None
+        self._mapa = None
+        self.buffer = memoryview(b'')
+        # Posição logo após a última etiqueta devolvida por iterar_etiquetas
+        self.fim_consumido = 0
+
+    def __enter__(self):
+        self._arquivo = open(self.file_path, 'rb')
+        try:
+            self._mapa = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buffer = memoryview(self._mapa)
+        except ValueError:
+            # Arquivo vazio não pode ser mapeado
+            self._mapa = None
+            self.buffer = memoryview(b'')
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        self.buffer.release()
+        self.buffer = memoryview(b'')
+        if self._mapa is not None:
+            try:
+                self._mapa.close()
+            except BufferError:
+                # Ainda há fatias em uso; o mapa é liberado junto com elas
+                pass
+            self._mapa = None
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def hash_md5(self):
+        """MD5 do conteúdo mapeado, sem copiar o arquivo"""
+        return hashlib.md5(self.buffer).hexdigest()
+
+    def assinatura(self, fim):
+        """assinatura() do arquivo até fim (PosicaoSpool)"""
+        return assinatura(self.buffer, fim)
+
+    def copiar(self, inicio=0):
+        """
+        TrechoSpool com o arquivo a partir de inicio, para continuar a leitura
+        com o mapa já fechado: no Windows, enquanto o arquivo está mapeado o
+        ERP não consegue truncá-lo nem reescrevê-lo.
+        """
+        return TrechoSpool(self, inicio)
+
+    def iterar_etiquetas(self, inicio=0):
+        """
+        Devolve um memoryview por etiqueta (do <page quantity='0'...> até o
+        <end/> que segue o Q0001/E), a partir do byte inicio. Se não houver
+        nenhuma nesse formato, aplica o padrão alternativo, como antes.
+        Uma etiqueta ainda incompleta no fim do arquivo não é devolvida.
+        """
+        buffer = self.buffer
+        for inicio_etiqueta, fim in self.iterar_limites(inicio):
+            yield buffer[inicio_etiqueta:fim]
+
+    def contar_etiquetas(self, inicio=0, maximo=None):
+        """Quantas etiquetas iterar_etiquetas devolveria (parando em maximo)"""
+        return sum(1 for _ in islice(_limites(self._mapa if self._mapa is not None else b'', inicio), maximo))
+
+    def iterar_limites(self, inicio=0):
+        """(início, fim) de cada etiqueta, como em iterar_etiquetas, sem fatiar o mapa"""
+        self.fim_consumido = inicio
+        for limites in _limites(self._mapa if self._mapa is not None else b'', inicio):
+            self.fim_consumido = limites[1]
+            yield limites
+
+
+class TrechoSpool:
+    """
+    Cópia em memória do arquivo de spool a partir de um byte (mais os bytes
+    que a assinatura da PosicaoSpool usa), com a mesma leitura do LeitorSpool.
+    As posições continuam sendo as do arquivo.
+    """
+
+    def __init__(self, leitor, inicio):
+        self._base = max(0, inicio - JANELA_ASSINATURA)
+        self._comeco = bytes(leitor.buffer[:JANELA_ASSINATURA])
+        self._dados = bytes(leitor.buffer[self._base:])
+        self.buffer = memoryview(self._dados)
+        self.tamanho = len(leitor)
+        self.fim_consumido = inicio
+
+    def __len__(self):
+        return self.tamanho
+
+    def assinatura(self, fim):
+        """Como assinatura() do arquivo inteiro, para fim a partir do início da cópia"""
+        h = hashlib.md5(self._comeco[:min(fim, JANELA_ASSINATURA)])
+        h.update(self._dados[max(0, fim - JANELA_ASSINATURA) - self._base:fim - self._base])
+        return h.hexdigest()
+
+    def contar_etiquetas(self, inicio=0, maximo=None):
+        return sum(1 for _ in islice(_limites(self._dados, inicio - self._base), maximo))
+
+    def iterar_etiquetas(self, inicio=0):
+        base = self._base
+        self.fim_consumido = inicio
+        for inicio_etiqueta, fim in _limites(self._dados, inicio - base):
+            self.fim_consumido = base + fim
+            yield self.buffer[inicio_etiqueta:fim]
+
+
+def _limites(dados, inicio):
+    """(início, fim) de cada etiqueta em dados a partir de inicio (LeitorSpool.iterar_limites)"""
+    encontrou = False
+    pos = inicio
+    while True:
+        inicio_etiqueta = dados.find(MARCA_INICIO, pos)
+        if inicio_etiqueta < 0:
+            break
+        fim_tag = dados.find(b'>', inicio_etiqueta + len(MARCA_INICIO))
+        if fim_tag < 0:
+            break
+        fim = _procurar_fim(dados, fim_tag + 1)
+        if fim < 0:
+            break
+        encontrou = True
+        yield inicio_etiqueta, fim
+        pos = fim
+
+    # Num trecho acrescentado, uma etiqueta xpml ainda sendo escrita não
+    # pode cair no padrão alternativo
+    if not encontrou and not (inicio and dados.find(MARCA_INICIO, inicio) >= 0):
+        for m in _PADRAO_ALTERNATIVO.finditer(dados, inicio):
+            yield m.start(1), m.end(1)
+
+
+def _procurar_fim(dados, pos):
+    """
+    Posição logo após o primeiro 'Q0001 E <end/>' a partir de pos, ou -1.
+    Procura a marca final com find e confirma para trás o E e o Q0001.
+    """
+    while True:
+        marca = dados.find(MARCA_FIM, pos)
+        if marca < 0:
+            return -1
+        j = marca
+        while j > pos and dados[j - 1] in _ESPACOS:
+            j -= 1
+        if j > pos and dados[j - 1] == COMANDO_IMPRIMIR:
+            j -= 1
+            while j > pos and dados[j - 1] in _ESPACOS:
+                j -= 1
+            if j - len(COMANDO_QUANTIDADE) >= pos and \
+                    dados[j - len(COMANDO_QUANTIDADE):j] == COMANDO_QUANTIDADE:
+                return marca + len(MARCA_FIM)
+        pos = marca + 1
+
+
+def assinatura(buffer, fim):
+    """MD5 do começo do arquivo e dos bytes logo antes de fim"""
+    h = hashlib.md5(buffer[:min(fim, JANELA_ASSINATURA)])
+    h.update(buffer[max(0, fim - JANELA_ASSINATURA):fim])
+    return h.hexdigest()
+
+
+class PosicaoSpool:
+    """
+    Até onde o arquivo de spool já foi consumido: o byte logo após a última
+    etiqueta completa e quantas etiquetas saíram até ali. Permite processar
+    só o que o ERP acrescentou desde a última gravação.
+    """
+
+    def __init__(self):
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.offset = 0
+        self.assinatura = None
+        self.etiquetas = 0
+
+    def inicio_para(self, leitor):
+        """
+        Byte a partir do qual o arquivo deve ser lido. Volta a 0 (passada
+        completa) se o arquivo encolheu ou se o trecho já consumido mudou.
+        """
+        if not self.offset:
+            return 0
+        if len(leitor) < self.offset or leitor.assinatura(self.offset) != self.assinatura:
+            self.reiniciar()
+            return 0
+        return self.offset
+
+    def avancar(self, leitor, etiquetas):
+        """Registra o que foi consumido na última leitura do leitor"""
+        self.offset = max(self.offset, leitor.fim_consumido)
+        self.assinatura = leitor.assinatura(self.offset)
+        self.etiquetas += etiquetas
@@ -0,0 +1,96 @@
+import unicodedata
+from functools import lru_cache
+
+# ====================== NORMALIZAÇÃO DE TEXTO ======================
+# Tabelas de str.translate montadas uma vez por caractere: acentos
+# removidos (o mesmo resultado do NFKD + combining de antes), texto na
+# página de código da impressora e extração de dígitos. Os valores
+# acentuados que se repetem (facções, cidades, regiões) ficam num LRU.
+
+# Textos acentuados já normalizados guardados no LRU
+TAMANHO_CACHE_TEXTOS = 4096
+
+# Faixa montada na importação (Latin-1 e Latin Extended A/B); os demais
+# caracteres entram na tabela na primeira vez que aparecem
+_FAIXA_PRONTA = range(0x80, 0x250)
+
+
+class _Tabela(dict):
+    """Tabela de str.translate que calcula e guarda cada caractere que ainda não tem"""
+
+    def __init__(self, traduzir, faixa=()):
+        super().__init__()
+        self._traduzir = traduzir
+        for codigo in faixa:
+            self[codigo] = traduzir(chr(codigo))
+
+    def __missing__(self, codigo):
+        valor = self[codigo] = self._traduzir(chr(codigo))
+        return valor
+
+
+def _sem_acento(caractere):
+    decomposto = unicodedata.normalize('NFKD', caractere)
+    return ''.join([c for c in decomposto if not unicodedata.combining(c)])
+
+
+_SEM_ACENTOS = _Tabela(_sem_acento, _FAIXA_PRONTA)
+
+
+def normalizar(texto):
+    """Texto em maiúsculas e sem acentos (o que a impressora recebe)"""
+    # A maior parte dos campos já vem sem acento do ERP
+    if texto.isascii():
+        return texto.upper()
+    return _normalizar_acentuado(texto)
+
+
+@lru_cache(maxsize=TAMANHO_CACHE_TEXTOS)
+def _normalizar_acentuado(texto):
+    return texto.translate(_SEM_ACENTOS).upper()
+
+
+def _tabela_codepage(codepage):
+    """
+    Cada caractere vira o de mesmo código que o byte dele na codepage
+    (ou '?'), e o texto traduzido sai em bytes pelo codec latin-1.
+    None se a codepage não tiver um byte por caractere.
+    """
+    if len('\u00e9\u4e2d'.encode(codepage, 'replace')) != 2:
+        return None
+
+    def traduzir(caractere):
+        try:
+            return chr(caractere.encode(codepage)[0])
+        except UnicodeEncodeError:
+            return '?'
+    return _Tabela(traduzir, _FAIXA_PRONTA)
+
+
+_TABELAS_CODEPAGE = {}
+
+
+def codificar(texto, codepage):
+    """Texto em bytes na página de código da impressora (sem equivalente sai '?')"""
+    # cp850/cp1252 coincidem com ASCII, e o codec ASCII é bem mais rápido
+    if texto.isascii():
+        return texto.encode('ascii')
+    if codepage not in _TABELAS_CODEPAGE:
+        _TABELAS_CODEPAGE[codepage] = _tabela_codepage(codepage)
+    tabela = _TABELAS_CODEPAGE[codepage]
+    if tabela is None:
+        return texto.encode(codepage, 'replace')
+    return texto.translate(tabela).encode('latin-1')
+
+
+# Todos os caracteres ASCII que não são dígitos, para serem apagados
+_SO_DIGITOS_ASCII = dict.fromkeys(c for c in range(128) if not chr(c).isdigit())
+
+
+def somente_digitos(texto):
+    """Só os dígitos do texto (o ''.join(filter(str.isdigit, texto)) de antes)"""
+    if texto.isdigit():
+        return texto
+    if texto.isascii():
+        return texto.translate(_SO_DIGITOS_ASCII)
+    return ''.join(filter(str.isdigit, texto))
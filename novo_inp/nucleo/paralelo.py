@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from . import config
+from .leitor_spool import LeitorSpool
+from .parser import PPLAParser
+from .conversor import PPLAtoBPLBConverter
+
+# ====================== ANÁLISE EM PARALELO ======================
+# Lotes grandes são divididos nas fronteiras das etiquetas e analisados e
+# convertidos em vários processos; o resultado volta na ordem original.
+# Cada processo recebe o classificador (vocabulário) e a página de código de
+# quem chamou, para dar o mesmo resultado da análise direta; parser ou
+# conversor de outra classe ficam na análise direta.
+
+# Parser e conversor de cada processo do pool (_iniciar_processo)
+_parser_processo = None
+_conversor_processo = None
+
+def _iniciar_processo(classificador, codepage):
+    """Inicializador do pool: monta o parser e o conversor do processo uma vez"""
+    global _parser_processo, _conversor_processo
+    _parser_processo = PPLAParser(classificador)
+    _conversor_processo = PPLAtoBPLBConverter(codepage)
+
+def _processar_lote(lote, converter=True):
+    """
+    Executado em cada processo do pool: analisa (e converte) um lote de
+    (número, bloco PPLA). Devolve [(etiqueta, bplb em bytes ou None)].
+    """
+    parser = _parser_processo
+    conversor = _conversor_processo if converter else None
+    resultado = []
+    for numero, etiqueta_raw in lote:
+        etiqueta = parser._processar_etiqueta(etiqueta_raw, numero)
+        bplb = conversor.converter_etiqueta_bytes(etiqueta) if conversor else None
+        resultado.append((etiqueta, bplb))
+    return resultado
+
+def processar_em_paralelo(numerados, converter=True, processos=None, tamanho_lote=None,
+                          parser=None, conversor=None):
+    """
+    Distribui [(número, bloco em bytes)] em lotes por um ProcessPoolExecutor.
+    Devolve (etiqueta, bplb) na ordem original, conforme cada lote termina.
+    parser/conversor: de onde vêm o classificador e a página de código dos
+    processos (padrão: os do PPLAParser e do PPLAtoBPLBConverter novos).
+    """
+    tamanho_lote = tamanho_lote or config.TAMANHO_LOTE_PARALELO
+    lotes = [numerados[i:i + tamanho_lote] for i in range(0, len(numerados), tamanho_lote)]
+    if not lotes:
+        return
+    classificador = (parser or PPLAParser()).classificador
+    codepage = conversor.generator.codepage if conversor is not None else None
+    processos = min(processos or config.PROCESSOS_PARALELO or os.cpu_count() or 1, len(lotes))
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                             initargs=(classificador, codepage)) as executor:
+        for resultado in executor.map(_processar_lote, lotes, repeat(converter)):
+            yield from resultado
+
+def paralelo_equivalente(parser, conversor=None):
+    """
+    Se os processos do pool analisam (e convertem) como parser e conversor:
+    só com as classes do núcleo, sem métodos trocados por subclasses
+    """
+    return type(parser) is PPLAParser and (conversor is None or type(conversor) is PPLAtoBPLBConverter)
+
+def _paralelo_disponivel():
+    return bool(config.LIMIAR_PARALELO) and (config.PROCESSOS_PARALELO or os.cpu_count() or 1) >= 2
+
+def contar_para_paralelo(file_path, leitor=None, inicio=0):
+    """
+    Quantas etiquetas o arquivo tem a partir de inicio, pelo índice de
+    posições (sem fatiar nem copiar os blocos) e só até config.LIMIAR_PARALELO;
+    None se a análise em paralelo estiver desligada.
+    """
+    if not _paralelo_disponivel():
+        return None
+    if leitor is None:
+        with LeitorSpool(file_path) as leitor:
+            return leitor.contar_etiquetas(inicio, config.LIMIAR_PARALELO)
+    return leitor.contar_etiquetas(inicio, config.LIMIAR_PARALELO)
+
+def _blocos_para_analise(blocos, quantidade=None):
+    """
+    Decide entre análise direta e em paralelo pela quantidade de blocos
+    (contar_para_paralelo, ou len de uma lista). Abaixo de
+    config.LIMIAR_PARALELO, ou sem quantidade, devolve (blocos, False): o
+    mesmo iterador, e a primeira etiqueta sai enquanto o resto é lido.
+    Senão devolve (todos os blocos, True), copiados para bytes (precisam ir
+    para outros processos e sobreviver ao fechamento do mapa).
+    """
+    if quantidade is None and isinstance(blocos, (list, tuple)):
+        quantidade = len(blocos)
+    if quantidade is None or quantidade < config.LIMIAR_PARALELO or not _paralelo_disponivel():
+        return blocos, False
+    return [bytes(bloco) for bloco in blocos], True
@@ -0,0 +1,300 @@
+import os
+
+from . import config
+from .ppla_lexer import extrair_registros
+from .leitor_spool import LeitorSpool
+from .etiqueta import Etiqueta, internar
+from .etiqueta_preguicosa import EtiquetaPreguicosa
+from .layout_etiqueta import CacheLayouts, PlanoExtracao, assinatura_layout
+from .diagnostico import diag
+from .normalizacao import somente_digitos
+from .classificador_campos import (
+    ClassificadorCampos, carregar_vocabulario, PREFIXOS_FIM_OP,
+    CLASSE_TIPO, CLASSE_OP, CLASSE_REF, CLASSE_FACCAO, CLASSE_CIDADE,
+    CLASSE_REGIAO, CLASSE_FRACAO, CLASSE_CODIGO,
+)
+
+# ====================== PARSER PPLA ======================
+# Único parser dos scripts: lexer em passada única, classificação por
+# tabela e planos por layout para as etiquetas repetidas.
+
+class PPLAParser:
+    # Classificador compartilhado, montado na primeira vez que for usado
+    _classificador_padrao = None
+    
+    # Planos por layout, compartilhados entre arquivos e gravações do Imprime.txt
+    _layouts_padrao = CacheLayouts()
+    
+    # Se um arquivo sem nenhuma etiqueta delimitada vira uma etiqueta só
+    _ARQUIVO_COMO_ETIQUETA = False
+    
+    def __init__(self, classificador=None, layouts=None):
+        self.etiquetas = []
+        if classificador is None:
+            if PPLAParser._classificador_padrao is None:
+                PPLAParser._classificador_padrao = ClassificadorCampos(
+                    carregar_vocabulario(config.ARQUIVO_VOCABULARIO))
+            classificador = PPLAParser._classificador_padrao
+        self.classificador = classificador
+        self.layouts = layouts if layouts is not None else PPLAParser._layouts_padrao
+    
+    def parse_file(self, file_path):
+        """
+        Localiza as etiquetas do arquivo em self.etiquetas, uma EtiquetaPreguicosa
+        por etiqueta: os campos só são analisados quando forem lidos
+        (ou todos de uma vez com extrair_campos)
+        """
+        if not os.path.exists(file_path):
+            return False
+        
+        try:
+            self.etiquetas = []
+            
+            with LeitorSpool(file_path) as leitor:
+                # Cada etiqueta copia do mapa só o seu trecho, quando é
+                # localizada: o resto do arquivo não é copiado e uma etiqueta
+                # guardada não prende as outras. O mapa não fica aberto (o ERP
+                # regrava o arquivo)
+                dados = leitor.buffer
+                for i, (inicio, fim) in enumerate(leitor.iterar_limites(), 1):
+                    self.etiquetas.append(EtiquetaPreguicosa(self, bytes(dados[inicio:fim]), i, inicio, fim))
+                # Trecho solto, sem as marcas de etiqueta: o arquivo inteiro
+                if not self.etiquetas and len(dados) and self._ARQUIVO_COMO_ETIQUETA:
+                    self.etiquetas.append(EtiquetaPreguicosa(self, bytes(dados), 1, 0, len(dados)))
+            
+            return len(self.etiquetas) > 0
+            
+        except Exception as e:
+            diag.erro("Erro ao analisar arquivo: %s", e)
+            return False
+    
+    def extrair_campos(self, etiquetas=None):
+        """
+        Analisa de uma vez as etiquetas ainda não analisadas (todas de
+        self.etiquetas, por padrão). Lotes grandes vão para vários processos.
+        """
+        # paralelo.py importa este módulo (os processos usam o PPLAParser)
+        from .paralelo import _blocos_para_analise, paralelo_equivalente, processar_em_paralelo
+        
+        pendentes = [e for e in (self.etiquetas if etiquetas is None else etiquetas)
+                     if not e.extraida]
+        # Os processos usam o PPLAParser com o classificador deste; subclasses analisam aqui mesmo
+        if paralelo_equivalente(self):
+            blocos, paralelo = _blocos_para_analise((e.raw for e in pendentes), len(pendentes))
+            if paralelo:
+                numerados = [(e.numero, bloco) for e, bloco in zip(pendentes, blocos)]
+                resultados = processar_em_paralelo(numerados, converter=False, parser=self)
+                for etiqueta, (campos, _) in zip(pendentes, resultados):
+                    etiqueta._campos = campos
+                return
+        for etiqueta in pendentes:
+            etiqueta.campos
+    
+    def _extrair_campos(self, etiqueta):
+        """Chamado pela EtiquetaPreguicosa no primeiro acesso aos campos"""
+        return self._processar_etiqueta(etiqueta.raw, etiqueta.numero)
+    
+    def iterar_etiquetas(self, file_path, leitor=None, inicio=0, numero_inicial=1):
+        """
+        Processa e devolve cada etiqueta assim que ela é encontrada no arquivo.
+        Se receber um LeitorSpool já aberto, usa o mesmo mapa em vez de reabrir.
+        inicio/numero_inicial: byte e numeração de onde continuar a leitura
+        """
+        blocos = self.iterar_blocos(file_path, leitor, inicio)
+        for i, etiqueta_raw in enumerate(blocos, numero_inicial):
+            etiqueta_data = self._processar_etiqueta(etiqueta_raw, i)
+            if etiqueta_data:
+                yield etiqueta_data
+    
+    def iterar_blocos(self, file_path, leitor=None, inicio=0):
+        """Blocos PPLA brutos de cada etiqueta, ainda sem análise"""
+        if leitor is None:
+            with LeitorSpool(file_path) as leitor:
+                yield from leitor.iterar_etiquetas(inicio)
+            return
+        yield from leitor.iterar_etiquetas(inicio)
+    
+    def _processar_etiqueta(self, etiqueta_raw, numero_etiqueta):
+        textos_coletados, cabecalhos, codigos = extrair_registros(etiqueta_raw)
+        data = Etiqueta(numero_etiqueta, codigos=codigos)
+        
+        # Layout já conhecido: preenche pelas posições, sem a busca heurística
+        assinatura = assinatura_layout(cabecalhos, textos_coletados)
+        plano = self.layouts.buscar(assinatura)
+        if plano and plano.aplicar(textos_coletados, data, self.classificador):
+            diag.debug("Layout conhecido, campos preenchidos por posição: %s", data)
+            return data
+        
+        self._processar_textos_inteligente(textos_coletados, data)
+        if plano is None:
+            # Primeira etiqueta completa deste layout vira o plano dos próximos
+            self.layouts.guardar(assinatura, PlanoExtracao.aprender(textos_coletados, data,
+                                                                    self.classificador))
+        return data
+    
+    def _processar_textos_inteligente(self, textos, data):
+        """Processa textos de forma inteligente, independente da presença de 'CONSERTO'"""
+        diag.debug("Textos recebidos: %s", textos)
+        
+        # Cada texto é classificado uma única vez; o tratamento de cada classe
+        # (rótulo, fração, código ou texto livre) vem da tabela _TRATADORES
+        classes = self.classificador.classificar_todos(textos)
+        
+        i = 0
+        while i < len(textos):
+            diag.debug("Posição %d: '%s'", i, textos[i])
+            tratador = self._TRATADORES.get(classes[i], PPLAParser._tratar_texto_livre)
+            i = tratador(self, textos, classes, i, data)
+        
+        diag.debug("Dados finais: %s", data)
+        
+        # Pós-processamento: se não encontrou descrição ainda, tenta uma abordagem diferente
+        if not data.descricao:
+            self._encontrar_descricao_fallback(textos, data, classes)
+    
+    @staticmethod
+    def _proximo_texto(textos, j):
+        """Índice do próximo texto não vazio a partir de j"""
+        while j < len(textos) and (not textos[j] or textos[j].strip() == ''):
+            j += 1
+        return j
+    
+    # Cada tratador recebe a posição atual e devolve a próxima posição a analisar
+    
+    def _tratar_tipo(self, textos, classes, i, data):
+        data.tipo = internar(textos[i])
+        diag.debug("Encontrou CONSERTO")
+        return i + 1
+    
+    def _tratar_op(self, textos, classes, i, data):
+        diag.debug("Encontrou OP: na posição %d", i)
+        # A OP vem DEPOIS da referência no formato!
+        # Não coletamos aqui, vamos coletar depois de encontrar a referência
+        return i + 1
+    
+    def _tratar_ref(self, textos, classes, i, data):
+        diag.debug("Encontrou Ref: na posição %d", i)
+        
+        # Procurar o número de referência na PRÓXIMA linha não vazia
+        j = self._proximo_texto(textos, i + 1)
+        if j >= len(textos):
+            return i + 1
+        
+        ref_texto = textos[j]
+        diag.debug("Texto após Ref:: '%s'", ref_texto)
+        
+        # Extrair apenas números
+        ref_numeros = somente_digitos(ref_texto)
+        diag.debug("Números extraídos da referência: '%s'", ref_numeros)
+        
+        if not ref_numeros or len(ref_numeros) < 6:
+            return i + 1
+        
+        data.referencia = ref_numeros
+        diag.debug("Referência definida como: %s", data.referencia)
+        
+        # AGORA, procurar a OP (que vem DEPOIS da referência)
+        k = self._proximo_texto(textos, j + 1)
+        if k >= len(textos) or textos[k].startswith(PREFIXOS_FIM_OP):
+            return j + 1
+        
+        op_texto = textos[k]
+        diag.debug("Texto após referência (candidato a OP): '%s'", op_texto)
+        
+        # Extrair apenas números para OP
+        op_numeros = somente_digitos(op_texto)
+        diag.debug("Números extraídos para OP: '%s'", op_numeros)
+        
+        if op_numeros and len(op_numeros) >= 6:
+            data.op = op_numeros
+            diag.debug("OP definida como: %s", data.op)
+            return k + 1
+        return i + 1
+    
+    def _tratador_valor_seguinte(campo, rotulo, nome):
+        """Monta o tratador dos rótulos cujo valor é o próximo texto (Faccao:, Cidade:, Regiao:)"""
+        def tratar(self, textos, classes, i, data):
+            diag.debug("Encontrou %s na posição %d", rotulo, i)
+            j = self._proximo_texto(textos, i + 1)
+            if j < len(textos):
+                setattr(data, campo, internar(textos[j]))
+                diag.debug("%s definida como: %s", nome, getattr(data, campo))
+                return j + 1
+            return i + 1
+        return tratar
+    
+    def _tratar_fracao(self, textos, classes, i, data):
+        data.fracao = textos[i]
+        diag.debug("Fração encontrada: %s", data.fracao)
+        
+        # Procurar código de barras (número longo antes da fração)
+        for m in range(1, 4):
+            if i - m >= 0 and classes[i - m] == CLASSE_CODIGO:
+                data.codigo_barras = textos[i - m]
+                diag.debug("Código de barras encontrado: %s", data.codigo_barras)
+                break
+        return i + 1
+    
+    def _tratar_codigo(self, textos, classes, i, data):
+        # Código de barras (identificação alternativa)
+        texto = textos[i]
+        if (not data.codigo_barras and
+            texto != data.op and
+            texto != data.referencia):
+            
+            diag.debug("Candidato a código de barras: '%s'", texto)
+            
+            # Só vale como código de barras se a fração vier logo em seguida
+            if i + 1 < len(textos) and classes[i + 1] == CLASSE_FRACAO:
+                data.codigo_barras = texto
+                diag.debug("Código de barras definido: %s", data.codigo_barras)
+        return i + 1
+    
+    def _tratar_texto_livre(self, textos, classes, i, data):
+        # Descrição (produto) - se ainda não encontramos
+        texto = textos[i]
+        if (not data.descricao and
+            len(texto) > 5 and
+            not texto.endswith(':') and
+            texto != data.op and
+            texto != data.referencia):
+            
+            diag.debug("Candidato a descrição: '%s'", texto)
+            
+            # Verifica se parece uma descrição de produto
+            if self.classificador.parece_descricao(texto):
+                data.descricao = texto
+                diag.debug("Descrição definida como: %s", data.descricao)
+        return i + 1
+    
+    _TRATADORES = {
+        CLASSE_TIPO: _tratar_tipo,
+        CLASSE_OP: _tratar_op,
+        CLASSE_REF: _tratar_ref,
+        CLASSE_FACCAO: _tratador_valor_seguinte('faccao', 'Faccao:', 'Facção'),
+        CLASSE_CIDADE: _tratador_valor_seguinte('cidade', 'Cidade:', 'Cidade'),
+        CLASSE_REGIAO: _tratador_valor_seguinte('regiao', 'Regiao:', 'Região'),
+        CLASSE_FRACAO: _tratar_fracao,
+        CLASSE_CODIGO: _tratar_codigo,
+    }
+    del _tratador_valor_seguinte
+    
+    def _encontrar_descricao_fallback(self, textos, data, classes=None):
+        """Tenta encontrar a descrição usando lógica alternativa"""
+        if classes is None:
+            classes = self.classificador.classificar_todos(textos)
+        
+        campos_encontrados = {data.op, data.referencia, data.faccao,
+                              data.cidade, data.regiao, data.codigo_barras}
+        
+        # Procura por texto significativo que não seja nenhum dos outros campos
+        for texto, classe in zip(textos, classes):
+            if (classe is None and
+                len(texto) > 5 and
+                not texto.endswith(':') and
+                texto not in campos_encontrados):
+                
+                # Verifica se parece uma descrição razoável (ao menos duas palavras)
+                if len(texto.split()) >= 2:
+                    data.descricao = texto
+                    break
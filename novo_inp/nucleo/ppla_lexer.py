@@ -0,0 +1,133 @@
+import re
+from itertools import compress
+from operator import not_
+
+# ====================== LEXER PPLA ======================
+# Lê o bloco bruto de uma etiqueta numa única passada e devolve tokens
+# tipados, sem gerar cópias intermediárias do texto (re.sub / split).
+
+TOKEN_TEXTO = 'texto'      # 19 + 13 caracteres de cabeçalho + texto
+TOKEN_CODIGO = 'codigo'    # 1e + dados do código de barras
+TOKEN_SETUP = 'setup'      # comandos de configuração (D, Q, E, M, O, V, f...)
+TOKEN_MARKUP = 'markup'    # tags <xpml>
+
+# Espaços e caracteres de controle descartados nas pontas de cada registro
+_ESPACO = r'[\x00-\x09\x0b-\x20\x7f]*'
+
+# Lexer completo: cada registro começa no início da linha ou logo depois de uma tag.
+# Os quantificadores possessivos (*+) evitam retrocesso nas pontas de cada registro.
+_ESPACO_POSSESSIVO = _ESPACO + '+'
+_PADRAO_TOKEN = re.compile(rf"""
+    (?:^|(?<=>)){_ESPACO_POSSESSIVO}
+    (?:
+        (?P<markup>(?:<[^>]*+>)++)
+      | 19(?P<cabecalho>[^\n<]{{13}}){_ESPACO_POSSESSIVO}(?P<texto>[^\n<]*[^\x00-\x20\x7f<])
+      | 1e{_ESPACO_POSSESSIVO}(?P<codigo>[^\n<]*[^\x00-\x20\x7f<])
+      | (?P<setup>[A-Za-z](?:[^\n<]*[^\x00-\x20\x7f<])?)
+    )
+""", re.VERBOSE | re.MULTILINE)
+
+# Caminho rápido: só registros 19/1e, ancorados em ^ (tags no começo da linha
+# são puladas). Tag dentro de um registro é rara e faz o bloco ser refeito.
+# Grupos: (cabeçalho, valor); o cabeçalho vazio indica um registro 1e.
+_FONTE_TEXTO_CODIGO = (
+    rf'^{_ESPACO_POSSESSIVO}(?:<[^>]*+>{_ESPACO_POSSESSIVO})*+'
+    rf'(?:19(.{{13}})|1e){_ESPACO_POSSESSIVO}(.*[^\x00-\x20\x7f])'
+)
+_PADRAO_TEXTO_CODIGO = re.compile(_FONTE_TEXTO_CODIGO, re.MULTILINE)
+_TAG = re.compile(r'<[^>]*>')
+
+# Mesmos padrões para blocos em bytes (memoryview do arquivo mapeado):
+# só o valor de cada registro é decodificado
+_PADRAO_TEXTO_CODIGO_BYTES = re.compile(_FONTE_TEXTO_CODIGO.encode('ascii'), re.MULTILINE)
+_TAG_BYTES = re.compile(rb'<[^>]*>')
+CODIFICACAO_ARQUIVO = 'utf-8'
+
+# Caracteres de controle dentro do valor viram espaço, como no tratamento antigo
+_CONTROLE_PARA_ESPACO = {c: ' ' for c in [*range(0x00, 0x0a), *range(0x0b, 0x20), 0x7f]}
+_CONTROLE_BYTES = re.compile(rb'[\x00-\x09\x0b-\x1f\x7f]')
+
+
+def tokenizar_etiqueta(etiqueta_raw):
+    """
+    Percorre o bloco bruto de uma etiqueta e devolve tuplas
+    (tipo, valor, cabecalho). O cabeçalho só é preenchido para TOKEN_TEXTO.
+    Linhas vazias e registros sem conteúdo não geram token.
+    """
+    for m in _PADRAO_TOKEN.finditer(etiqueta_raw):
+        tipo = m.lastgroup
+        valor = m.group(tipo)
+        if tipo == TOKEN_MARKUP:
+            yield tipo, valor, None
+            continue
+        if not valor.isprintable():
+            valor = valor.translate(_CONTROLE_PARA_ESPACO)
+        if tipo == TOKEN_TEXTO:
+            yield tipo, valor, m.group('cabecalho')
+        else:
+            yield tipo, valor, None
+
+
+def extrair_textos_e_codigos(etiqueta_raw):
+    """
+    Caminho rápido do lexer para o parser: devolve (textos, codigos) com os
+    valores dos registros 19 e 1e, na ordem em que aparecem na etiqueta.
+    Aceita str ou bytes/memoryview; nesse caso só os valores são decodificados.
+    """
+    textos, _, codigos = extrair_registros(etiqueta_raw)
+    return textos, codigos
+
+
+def extrair_registros(etiqueta_raw):
+    """
+    Como extrair_textos_e_codigos, mas devolve também o cabeçalho de 13
+    caracteres de cada texto: (textos, cabecalhos, codigos). Para entrada
+    em bytes os cabeçalhos continuam em bytes (só servem de comparação).
+    """
+    if isinstance(etiqueta_raw, str):
+        resultado = _extrair_registros(etiqueta_raw, True)
+        if resultado is None:
+            # Tag no meio de um registro: remove as tags do bloco e refaz
+            resultado = _extrair_registros(_TAG.sub('', etiqueta_raw), False)
+        return resultado
+
+    resultado = _extrair_registros_bytes(etiqueta_raw, True)
+    if resultado is None:
+        resultado = _extrair_registros_bytes(_TAG_BYTES.sub(b'', etiqueta_raw), False)
+    return resultado
+
+
+def _extrair_registros(etiqueta_raw, recusar_tags):
+    textos = []
+    cabecalhos = []
+    codigos = []
+    for cabecalho, valor in _PADRAO_TEXTO_CODIGO.findall(etiqueta_raw):
+        if recusar_tags and ('<' in valor or '<' in cabecalho):
+            return None
+        if not valor.isprintable():
+            valor = valor.translate(_CONTROLE_PARA_ESPACO)
+        if cabecalho:
+            textos.append(valor)
+            cabecalhos.append(cabecalho)
+        else:
+            codigos.append(valor)
+    return textos, cabecalhos, codigos
+
+
+def _extrair_registros_bytes(etiqueta_raw, recusar_tags):
+    registros = _PADRAO_TEXTO_CODIGO_BYTES.findall(etiqueta_raw)
+    if not registros:
+        return [], [], []
+    cabecalhos, valores = zip(*registros)
+    # Os valores (sem quebra de linha) são juntos e decodificados de uma vez
+    valores = b'\n'.join(valores)
+    if recusar_tags and (b'<' in valores or b'<' in b''.join(cabecalhos)):
+        return None
+    decodificados = valores.decode(CODIFICACAO_ARQUIVO, errors='ignore')
+    if _CONTROLE_BYTES.search(valores):
+        decodificados = decodificados.translate(_CONTROLE_PARA_ESPACO)
+    decodificados = decodificados.split('\n')
+    # Textos e códigos separados pelo cabeçalho (vazio nos registros 1e)
+    textos = list(compress(decodificados, cabecalhos))
+    codigos = list(compress(decodificados, map(not_, cabecalhos)))
+    return textos, list(filter(None, cabecalhos)), codigos
@@ -0,0 +1,274 @@
+import os
+from collections import deque
+from datetime import datetime
+
+from . import config
+from .cache_bplb import CacheBPLB, SEM_AFINIDADE, chave_etiqueta
+from .diagnostico import diag, DEBUG
+from .parser import PPLAParser
+from .conversor import PPLAtoBPLBConverter
+from .impressora import ImpressoraBPLB
+from .leitor_spool import LeitorSpool
+from .fila_impressao import FilaImpressao, TrabalhoImpressao
+from .paralelo import _blocos_para_analise, contar_para_paralelo, paralelo_equivalente, processar_em_paralelo
+from .series import AgrupadorSeries
+
+# ====================== PROCESSAMENTO DE ARQUIVOS ======================
+
+_cache_bplb = None
+
+def obter_cache_bplb():
+    """Cache de BPLB compartilhado, criado na primeira vez que for usado"""
+    global _cache_bplb
+    if _cache_bplb is None:
+        _cache_bplb = CacheBPLB(pasta=config.PASTA_CACHE_BPLB)
+    return _cache_bplb
+
+def _afinidade(etiqueta):
+    """(facção, região) da etiqueta analisada, guardada com o BPLB no cache"""
+    return etiqueta.faccao or '', etiqueta.regiao or ''
+
+def gerar_bplb_etiquetas(blocos, numero_inicial, parser, converter, cache, configuracao, quantidade=None):
+    """
+    Devolve (número, bplb, afinidade, veio_do_cache) para cada bloco, em
+    ordem; afinidade é (facção, região). Blocos já no cache não são
+    analisados; os demais são analisados aqui ou, em lotes grandes, em vários
+    processos. quantidade: quantos blocos há (de contar_para_paralelo); sem
+    ela, ou com parser/conversor de outra classe, tudo é analisado aqui.
+    """
+    paralelo = False
+    if paralelo_equivalente(parser, converter):
+        blocos, paralelo = _blocos_para_analise(blocos, quantidade)
+    if not paralelo:
+        for numero, etiqueta_raw in enumerate(blocos, numero_inicial):
+            def gerar():
+                etiqueta = parser._processar_etiqueta(etiqueta_raw, numero)
+                return converter.converter_etiqueta_bytes(etiqueta), _afinidade(etiqueta)
+            # Etiqueta já vista (mesmos bytes e mesma configuração): reaproveita o BPLB
+            bplb, afinidade, do_cache = cache.obter_ou_gerar(etiqueta_raw, configuracao, gerar)
+            yield numero, bplb, afinidade, do_cache
+        return
+    
+    chaves = [chave_etiqueta(etiqueta_raw, configuracao) for etiqueta_raw in blocos]
+    prontos = [cache.obter(chave) for chave in chaves]
+    pendentes = [(numero_inicial + i, blocos[i]) for i, entrada in enumerate(prontos) if entrada is None]
+    diag.info("⚙️  %d etiquetas: %d convertidas em paralelo, %d do cache",
+              len(blocos), len(pendentes), len(blocos) - len(pendentes))
+    gerados = processar_em_paralelo(pendentes, parser=parser, conversor=converter)
+    for i, entrada in enumerate(prontos):
+        do_cache = entrada is not None
+        if do_cache:
+            bplb, afinidade = entrada
+        else:
+            etiqueta, bplb = next(gerados)
+            afinidade = _afinidade(etiqueta)
+            cache.guardar(chaves[i], bplb, afinidade)
+        yield numero_inicial + i, bplb, afinidade, do_cache
+
+def visualizar_etiqueta_bplb(comandos_bplb):
+    print("\n📋 VISUALIZAÇÃO DA ETIQUETA BPLB:")
+    print("=" * 50)
+    
+    textos = []
+    codigos_barras = []
+    
+    for linha in comandos_bplb.split('\n'):
+        if linha.startswith('A'):
+            partes = linha.split('"')
+            if len(partes) >= 2:
+                textos.append(partes[1])
+        elif linha.startswith('B'):
+            partes = linha.split('"')
+            if len(partes) >= 2:
+                codigos_barras.append(f"[CÓDIGO DE BARRAS: {partes[1]}]")
+    
+    largura = 50
+    print("┌" + "─" * largura + "┐")
+    
+    # Mostrar textos normais
+    for texto in textos:
+        if texto:
+            if len(texto) > largura:
+                texto = texto[:largura-3] + "..."
+            espacos = largura - len(texto)
+            margem_esq = espacos // 2
+            margem_dir = espacos - margem_esq
+            print(f"│{' ' * margem_esq}{texto}{' ' * margem_dir}│")
+    
+    # Mostrar código de barras (se houver)
+    for codigo in codigos_barras:
+        if len(codigo) > largura:
+            codigo = codigo[:largura-3] + "..."
+        espacos = largura - len(codigo)
+        margem_esq = espacos // 2
+        margem_dir = espacos - margem_esq
+        print(f"│{' ' * margem_esq}{codigo}{' ' * margem_dir}│")
+        # Linha representando o código de barras
+        barras = "█" * (largura - 4)
+        print(f"│ {barras} │")
+    
+    print("└" + "─" * largura + "┘")
+
+def _enviar(impressora, descricao, bplb, etiqueta=True, afinidade=SEM_AFINIDADE):
+    """
+    Envia à impressora (etiqueta: enviar_etiqueta; senão o trabalho vai como
+    está) ou, se impressora for uma FilaImpressao, põe na fila com a
+    afinidade (facção, região)
+    """
+    if isinstance(impressora, FilaImpressao):
+        impressora.enfileirar(TrabalhoImpressao(descricao, bplb, etiqueta, *afinidade))
+        print(f"📥 {descricao.capitalize()} na fila de impressão")
+        return
+    print(f"\n🖨️  Enviando {descricao} para impressão...")
+    ok = impressora.enviar_etiqueta(bplb) if etiqueta else impressora.enviar_comandos(bplb)
+    if ok:
+        print(f"✅ {descricao.capitalize()} enviada com sucesso!")
+    else:
+        print(f"❌ Falha ao enviar {descricao}")
+
+def _enviar_trabalhos(impressora, trabalhos, numeros):
+    """
+    Envia os trabalhos (quantidade, bplb) do AgrupadorSeries; numeros são
+    (número, afinidade) das etiquetas ainda não enviadas, em ordem. A série
+    vai com a afinidade da primeira etiqueta.
+    """
+    for quantidade, bplb in trabalhos:
+        lote = [numeros.popleft() for _ in range(quantidade)]
+        (primeira, afinidade), (ultima, _) = lote[0], lote[-1]
+        if quantidade == 1:
+            _enviar(impressora, f"etiqueta {primeira}", bplb, afinidade=afinidade)
+        else:
+            # Trabalho completo (formulário com contadores): vai como está
+            _enviar(impressora, f"série das etiquetas {primeira} a {ultima}", bplb, etiqueta=False,
+                    afinidade=afinidade)
+
+def processar_e_imprimir(file_path, imprimir=True, nome_impressora=None, leitor=None,
+                         inicio=0, numero_inicial=1, fila=None):
+    """
+    Processa arquivo PPLA e imprime na impressora nome_impressora.
+    leitor: LeitorSpool (ou TrechoSpool) já aberto para o arquivo (evita mapear de novo)
+    inicio: byte a partir do qual ler (só o trecho acrescentado ao arquivo)
+    numero_inicial: número da primeira etiqueta lida
+    fila: FilaImpressao que recebe as etiquetas no lugar da impressora
+    (volta sem esperar a impressão; sem leitor, o arquivo é copiado e o mapa
+    fechado antes, porque enfileirar pode esperar a impressora)
+    Retorna quantas etiquetas foram processadas.
+    """
+    if fila is not None:
+        nome_impressora = fila.nome_impressora
+    print(f"\n📄 Processando: {file_path}")
+    print(f"📅 {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+    print(f"🖨️  Impressora: {nome_impressora}")
+    print("-" * 60)
+    
+    if not os.path.exists(file_path):
+        print("❌ Falha ao processar arquivo ou nenhuma etiqueta encontrada")
+        return 0
+    
+    impressora = None
+    if imprimir:
+        if not nome_impressora:
+            print("❌ Nenhuma impressora configurada!")
+            print("   Use a opção 3 para configurar uma impressora.")
+            imprimir = False
+        elif fila is not None:
+            # As linhas da fila abrem e fecham as sessões
+            impressora = fila
+            if leitor is None:
+                with LeitorSpool(file_path) as mapeado:
+                    leitor = mapeado.copiar(inicio)
+        else:
+            impressora = ImpressoraBPLB(nome_impressora)
+            # Um handle para o lote todo, com várias etiquetas por trabalho
+            impressora.abrir_sessao()
+    
+    parser = PPLAParser()
+    converter = PPLAtoBPLBConverter()
+    cache = obter_cache_bplb()
+    configuracao = converter.assinatura_configuracao(parser)
+    total = 0
+    
+    # Séries (frações, códigos seguidos) esperam a etiqueta seguinte para
+    # saber se continuam, e vão num trabalho só
+    agrupador = None
+    if imprimir and impressora and config.AGRUPAR_SERIES:
+        agrupador = AgrupadorSeries()
+        pendentes = deque()
+    
+    try:
+        # As etiquetas chegam do leitor conforme são encontradas no arquivo,
+        # então a primeira já é convertida/impressa antes do fim da leitura
+        blocos = parser.iterar_blocos(file_path, leitor, inicio)
+        # Análise em paralelo só num lote grande, decidida pelo índice de posições
+        quantidade = contar_para_paralelo(file_path, leitor, inicio)
+        resultados = gerar_bplb_etiquetas(blocos, numero_inicial, parser, converter, cache, configuracao,
+                                          quantidade)
+        for numero, bplb, afinidade, do_cache in resultados:
+            total += 1
+            
+            print(f"\n🔄 Convertendo etiqueta {numero}...")
+            
+            # O BPLB segue em bytes (página de código da impressora) até a
+            # impressora; só é decodificado para a visualização
+            if do_cache:
+                diag.debug("BPLB da etiqueta %d reaproveitado do cache", numero)
+            if diag.exibe(DEBUG):
+                visualizar_etiqueta_bplb(bplb.decode(config.CODEPAGE_IMPRESSORA, 'replace'))
+            
+            nome_base = os.path.splitext(os.path.basename(file_path))[0]
+            pasta_bplb = os.path.join(os.path.dirname(file_path), "bplb_output")
+            
+            if not os.path.exists(pasta_bplb):
+                os.makedirs(pasta_bplb)
+            
+            arquivo_bplb = os.path.join(pasta_bplb, f"{nome_base}_etq{numero}.bplb")
+            
+            try:
+                # Os mesmos bytes enviados à impressora
+                with open(arquivo_bplb, 'wb') as f:
+                    f.write(bplb)
+                print(f"💾 Comandos BPLB salvos em: {arquivo_bplb}")
+                
+                if diag.exibe(DEBUG):
+                    print("\n📄 PREVIEW DO ARQUIVO BPLB:")
+                    print("-" * 40)
+                    linhas = bplb.decode(config.CODEPAGE_IMPRESSORA, 'replace').split('\n')[:15]
+                    for linha in linhas:
+                        if linha.strip():
+                            print(f"  {linha[:60]}..." if len(linha) > 60 else f"  {linha}")
+                    print("-" * 40)
+                
+            except Exception as e:
+                diag.erro("⚠️  Erro ao salvar arquivo BPLB: %s", e)
+            
+            if agrupador is not None:
+                pendentes.append((numero, afinidade))
+                _enviar_trabalhos(impressora, agrupador.adicionar(bplb), pendentes)
+            elif imprimir and impressora:
+                _enviar(impressora, f"etiqueta {numero}", bplb, afinidade=afinidade)
+    
+    except Exception as e:
+        diag.erro("Erro ao analisar arquivo: %s", e)
+    
+    if agrupador is not None:
+        # Última série (ou a que estava aberta quando a análise falhou)
+        _enviar_trabalhos(impressora, agrupador.terminar(), pendentes)
+    if impressora and fila is None:
+        impressora.fechar_sessao()
+    
+    if total == 0:
+        print("❌ Falha ao processar arquivo ou nenhuma etiqueta encontrada")
+        return 0
+    
+    print("\n" + "="*60)
+    print("✅ Processamento concluído!")
+    print(f"✅ {total} etiqueta(s) encontrada(s)")
+    if fila is not None and imprimir:
+        estado = fila.estado()
+        print(f"📥 {total} etiqueta(s) na fila de {nome_impressora} "
+              f"({estado['fila']}/{estado['maximo']} trabalho(s) aguardando)")
+    elif imprimir and impressora:
+        print(f"📤 Total de {total} etiqueta(s) enviada(s) para {nome_impressora}")
+    print("="*60)
+    print("="*60)
+    return total
@@ -0,0 +1,201 @@
+import re
+import time
+from collections import deque
+
+from . import config
+from .diagnostico import diag
+
+# ====================== RITMO DA IMPRESSORA ======================
+# Em vez de um intervalo fixo entre etiquetas, cada trabalho tem um tempo
+# previsto de impressão: comprimento da etiqueta (Q, em pontos) mais o
+# espaço entre etiquetas, na velocidade do S, vezes a quantidade de cada P
+# (P n,c imprime n*c etiquetas). O envio só espera quando a impressora já
+# tem mais que SEGUNDOS_ADIANTADOS de etiquetas por imprimir: ela nunca fica
+# parada esperando dados e o que ainda não foi enviado continua na fila do
+# programa (pode ir para outra impressora).
+# No modo adaptativo, quando o transporte informa a fila (spooler, pasta), a
+# hora em que cada trabalho sai dela corrige a previsão (fator real/previsto).
+
+# Q550[,24], S3 e P1[,2] no início de uma linha
+_COMANDO_RITMO = re.compile(rb'^([QSP])(\d+)(?:,(\d+))?', re.MULTILINE)
+
+# Carga/apagamento de formulário ou dados de variáveis: há linhas que não são comandos
+_LINHA_FORMULARIO = re.compile(rb'^(?:F[SK]"|\?\r?$)', re.MULTILINE)
+# Declaração de variável ou contador (uma linha de dados depois do ? cada)
+_ENTRADA_FORMULARIO = re.compile(rb'(?:V\d\d,\d+|C[1-9]),')
+_IMPRESSAO = re.compile(rb'P\d+(?:,\d+)?')
+
+# Limites do fator aprendido e peso de cada nova medição
+FATOR_MINIMO = 0.2
+FATOR_MAXIMO = 5.0
+PESO_MEDICAO = 0.3
+
+
+class RitmoImpressora:
+    """
+    Previsão do tempo de impressão e espera antes de cada trabalho, para
+    uma impressora. Guarda o Q e o S do último cabeçalho visto: os envios
+    por formulário (FR) não repetem o cabeçalho.
+    """
+
+    def __init__(self, modo=None, adiantamento=None):
+        self.modo = modo or config.RITMO_IMPRESSORA
+        self.adiantamento = adiantamento if adiantamento is not None else config.SEGUNDOS_ADIANTADOS
+        self.comprimento = None   # Q (pontos)
+        self.espaco = None        # segundo campo do Q (pontos), se houver
+        self.velocidade = None    # S
+        self.fator = 1.0          # tempo real / previsto (modo adaptativo)
+        self.medicoes = 0
+        # Hora (monotonic) em que a impressora termina o que já foi enviado
+        self._livre_em = 0.0
+        # (segundos previstos, hora do envio) dos trabalhos ainda na fila
+        self._na_fila = deque()
+        # Desde quando a impressora imprime o primeiro trabalho da fila
+        self._inicio_ocupada = None
+        self._ultima_consulta = None
+        # Se o transporte informa a fila (só então há o que medir)
+        self._observavel = False
+        # Linhas de dados de cada formulário carregado (nome -> variáveis + contadores)
+        self._entradas = {}
+
+    @property
+    def adaptativo(self):
+        return self.modo == 'adaptativo'
+
+    def segundos_por_etiqueta(self):
+        """Tempo previsto de uma etiqueta com o Q e o S atuais, sem o fator"""
+        comprimento = self.comprimento or config.COMPRIMENTO_ETIQUETA_PADRAO
+        espaco = self.espaco if self.espaco is not None else \
+            config.ESPACO_ENTRE_ETIQUETAS_MM * config.PONTOS_POR_MM
+        velocidade = config.VELOCIDADES_IMPRESSORA.get(self.velocidade or config.VELOCIDADE_PADRAO)
+        if velocidade is None:
+            velocidade = config.VELOCIDADES_IMPRESSORA[config.VELOCIDADE_PADRAO]
+        return (comprimento + espaco) / config.PONTOS_POR_MM / velocidade + config.SEGUNDOS_EXTRA_POR_ETIQUETA
+
+    def prever(self, comandos):
+        """Segundos previstos para imprimir os comandos (sem o fator)"""
+        if _LINHA_FORMULARIO.search(comandos):
+            comandos = self._linhas_de_comando(comandos)
+        segundos = 0.0
+        for comando, valor, segundo in _COMANDO_RITMO.findall(comandos):
+            if comando == b'P':
+                segundos += int(valor) * int(segundo or 1) * self.segundos_por_etiqueta()
+            elif comando == b'Q':
+                self.comprimento = int(valor)
+                self.espaco = int(segundo) if segundo else None
+            else:
+                self.velocidade = int(valor)
+        return segundos
+
+    def _linhas_de_comando(self, comandos):
+        """
+        Os comandos sem as linhas de dados que seguem o ? (o valor de cada
+        variável/contador pode começar com P, Q ou S). Quantas são vem das
+        declarações do formulário, vistas quando ele foi carregado; de um
+        formulário desconhecido, vão até a linha P.
+        """
+        mantidas = []
+        gravando = formulario = None
+        pular = 0
+        ate_impressao = False
+        for linha in bytes(comandos).split(b"\n"):
+            comando = linha.rstrip(b"\r")
+            if pular:
+                pular -= 1
+                continue
+            if ate_impressao:
+                if not _IMPRESSAO.fullmatch(comando):
+                    continue
+                ate_impressao = False
+            mantidas.append(linha)
+            if gravando is not None:
+                if comando == b'FE':
+                    gravando = None
+                elif _ENTRADA_FORMULARIO.match(comando):
+                    self._entradas[gravando] += 1
+            elif comando.startswith(b'FS"'):
+                gravando = comando[3:-1]
+                self._entradas[gravando] = 0
+            elif comando.startswith(b'FK"'):
+                self._entradas.pop(comando[3:-1], None)
+            elif comando.startswith(b'FR"'):
+                formulario = comando[3:-1]
+            elif comando == b'?':
+                pular = self._entradas.get(formulario)
+                if pular is None:
+                    pular = 0
+                    ate_impressao = True
+        return b"\n".join(mantidas)
+
+    def pendente(self, agora=None):
+        """Segundos de impressão que a impressora ainda tem pela frente (previsão)"""
+        return max(0.0, self._livre_em - (agora or time.monotonic()))
+
+    def aguardar(self, consultar_fila=None):
+        """
+        Espera até a impressora ter no máximo self.adiantamento segundos por
+        imprimir. consultar_fila() -> trabalhos na fila ou None; no modo
+        adaptativo é consultada durante a espera para medir o tempo real.
+        """
+        consultar = consultar_fila if self.adaptativo else None
+        while True:
+            agora = time.monotonic()
+            if consultar is not None:
+                fila = consultar()
+                if fila is None:
+                    self._observavel = False
+                    consultar = None
+                else:
+                    self.observar(fila, agora)
+            espera = self._livre_em - self.adiantamento - agora
+            if espera <= 0:
+                return
+            diag.debug("Ritmo: %.1f s por imprimir, aguardando %.1f s", self._livre_em - agora, espera)
+            if consultar is not None:
+                espera = min(espera, config.INTERVALO_CONSULTA_IMPRESSORA)
+            time.sleep(espera)
+
+    def enviado(self, previsto):
+        """Trabalho de previsto segundos (sem o fator) entregue à impressora"""
+        agora = time.monotonic()
+        if previsto > 0:
+            self._livre_em = max(self._livre_em, agora) + previsto * self.fator
+        # Mesmo sem etiquetas (só carga de formulário) o trabalho conta na fila
+        if self.adaptativo and self._observavel:
+            if not self._na_fila:
+                self._inicio_ocupada = agora
+            self._na_fila.append((previsto, agora))
+
+    def observar(self, fila, agora=None):
+        """
+        Trabalhos na fila do transporte agora: os que saíram desde a última
+        consulta medem o tempo real e corrigem a previsão (modo adaptativo)
+        """
+        if not self.adaptativo:
+            return
+        agora = agora or time.monotonic()
+        self._observavel = True
+        concluidos = len(self._na_fila) - fila
+        seguida = (self._ultima_consulta is not None and
+                   agora - self._ultima_consulta <= 2 * config.INTERVALO_CONSULTA_IMPRESSORA)
+        self._ultima_consulta = agora
+        if concluidos <= 0:
+            return
+        previsto = 0.0
+        inicio = None
+        for _ in range(concluidos):
+            segundos, enviado = self._na_fila.popleft()
+            previsto += segundos
+            inicio = enviado if inicio is None else inicio
+        # Só mede quando a consulta anterior foi há pouco (a hora de saída é
+        # conhecida) e a impressora estava ocupada desde o início do primeiro
+        if seguida and previsto > 0:
+            real = agora - max(inicio, self._inicio_ocupada)
+            if real > 0:
+                medido = min(FATOR_MAXIMO, max(FATOR_MINIMO, real / previsto))
+                self.fator += PESO_MEDICAO * (medido - self.fator)
+                self.medicoes += 1
+                diag.debug("Ritmo: %.2f s reais para %.2f s previstos, fator %.2f", real, previsto, self.fator)
+        # O resto da fila é previsto a partir de agora, com o fator novo
+        self._livre_em = agora + sum(segundos for segundos, _ in self._na_fila) * self.fator
+        self._inicio_ocupada = agora if self._na_fila else None
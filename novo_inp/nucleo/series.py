@@ -0,0 +1,152 @@
+import re
+
+from .formularios import dividir_programa, nome_formulario
+
+# ====================== SÉRIES DE ETIQUETAS ======================
+# O ERP manda as frações de uma OP (1/3, 2/3, 3/3) e códigos de barras
+# seguidos como etiquetas separadas, iguais a não ser por esse número.
+# Etiquetas seguidas com as mesmas posições, em que cada dado ou se repete
+# ou tem um número que anda sempre do mesmo passo, viram um trabalho só:
+# um formulário com contadores (C0..C9) no lugar dos números e um P com a
+# quantidade; a impressora incrementa os contadores a cada etiqueta.
+# O que não for sequência segue como o programa de cada etiqueta.
+
+MAXIMO_CONTADORES = 10
+
+# Dígitos de um contador (o comando C aceita de 1 a 9); números maiores têm
+# o começo como texto fixo, e se o que muda não cabe, a série não é formada
+DIGITOS_CONTADOR = 9
+
+# Dado no fim de uma linha do modelo (A/B ...,V00)
+_CAMPO_MODELO = re.compile(rb',V(\d\d)$', re.MULTILINE)
+
+
+def _contadores(primeira, segunda):
+    """
+    {campo: (início, fim, valor, passo)} dos números que mudam da primeira
+    para a segunda etiqueta, ou None se elas não começarem uma série.
+    """
+    if primeira.modelo != segunda.modelo or primeira.impressao != segunda.impressao:
+        return None
+    contadores = {}
+    for campo, (a, b) in enumerate(zip(primeira.dados, segunda.dados)):
+        if a == b:
+            continue
+        if len(a) != len(b) or len(contadores) == MAXIMO_CONTADORES:
+            return None
+        inicio = next(i for i in range(len(a)) if a[i] != b[i])
+        fim = next(i for i in range(len(a), 0, -1) if a[i - 1] != b[i - 1])
+        # O contador vai até o fim do número (o vai-um anda para a esquerda)
+        while fim < len(a) and a[fim:fim + 1].isdigit():
+            fim += 1
+        while inicio > max(0, fim - DIGITOS_CONTADOR) and a[inicio - 1:inicio].isdigit():
+            inicio -= 1
+        if not (a[inicio:fim].isdigit() and b[inicio:fim].isdigit()) or fim - inicio > DIGITOS_CONTADOR:
+            return None
+        valor = int(a[inicio:fim])
+        contadores[campo] = (inicio, fim, valor, int(b[inicio:fim]) - valor)
+    return contadores or None
+
+
+def _continua(serie, contadores, quantidade, dividido):
+    """Se dividido é a etiqueta seguinte (a de índice quantidade) da série"""
+    if dividido.modelo != serie.modelo or dividido.impressao != serie.impressao:
+        return False
+    for campo, (a, b) in enumerate(zip(serie.dados, dividido.dados)):
+        contador = contadores.get(campo)
+        if contador is None:
+            if a != b:
+                return False
+            continue
+        inicio, fim, valor, passo = contador
+        valor += quantidade * passo
+        if not 0 <= valor < 10 ** (fim - inicio):
+            return False
+        if b != a[:inicio] + b"%0*d" % (fim - inicio, valor) + a[fim:]:
+            return False
+    return True
+
+
+def programa_serie(serie, contadores, quantidade):
+    """
+    Trabalho que imprime quantidade etiquetas da série: formulário com os
+    contadores, os valores iniciais e P; o formulário é apagado no fim.
+    """
+    def campo(encontrado):
+        indice = int(encontrado.group(1))
+        dado = serie.dados[indice]
+        if indice not in contadores:
+            return b',"%b"' % dado
+        inicio, fim, _, _ = contadores[indice]
+        numero = sorted(contadores).index(indice)
+        partes = [b'"%b"' % dado[:inicio] if inicio else b"", b"C%d" % numero,
+                  b'"%b"' % dado[fim:] if fim < len(dado) else b""]
+        return b"," + b"".join(partes)
+
+    modelo = _CAMPO_MODELO.sub(campo, serie.modelo)
+    nome = nome_formulario(modelo).encode('ascii')
+    ordem = sorted(contadores)
+    # Cdígitos,justificação,passo,"prompt": os contadores são C0, C1... na ordem declarada
+    declaracoes = b"".join(b'C%d,N,%+d,""\n' % (contadores[c][1] - contadores[c][0], contadores[c][3])
+                           for c in ordem)
+    iniciais = b"".join(b"%0*d\n" % (contadores[c][1] - contadores[c][0], contadores[c][2]) for c in ordem)
+    copias = int(serie.impressao[1:] or 1)
+    impressao = b"P%d" % quantidade if copias == 1 else b"P%d,%d" % (quantidade, copias)
+    return (b'FK"%b"\nFS"%b"\n' % (nome, nome) + declaracoes + modelo + b"\nFE\n" +
+            b'FR"%b"\n?\n' % nome + iniciais + impressao + b'\nFK"%b"\n' % nome)
+
+
+class AgrupadorSeries:
+    """
+    Recebe os programas BPLB das etiquetas, em ordem, e devolve os trabalhos
+    para a impressora: (quantidade de etiquetas, bytes). Um programa fica
+    guardado até se saber se a etiqueta seguinte continua a série.
+    """
+
+    def __init__(self):
+        self._primeiro = None   # programa da primeira etiqueta da série
+        self._serie = None      # ProgramaDividido da primeira etiqueta
+        self._contadores = None
+        self._quantidade = 0
+
+    def adicionar(self, bplb):
+        """Trabalhos que ficaram prontos com este programa (lista, pode ser vazia)"""
+        dividido = dividir_programa(bplb)
+        if self._serie is not None and dividido is not None:
+            if self._quantidade == 1:
+                self._contadores = _contadores(self._serie, dividido)
+                if self._contadores is not None:
+                    self._quantidade = 2
+                    return []
+            elif _continua(self._serie, self._contadores, self._quantidade, dividido):
+                self._quantidade += 1
+                return []
+
+        prontos = self.terminar()
+        if dividido is None:
+            prontos.append((1, bplb))
+        else:
+            self._primeiro, self._serie, self._quantidade = bplb, dividido, 1
+        return prontos
+
+    def terminar(self):
+        """Trabalho da série em andamento (fim do arquivo)"""
+        if self._serie is None:
+            return []
+        if self._quantidade == 1:
+            pronto = (1, self._primeiro)
+        else:
+            pronto = (self._quantidade, programa_serie(self._serie, self._contadores, self._quantidade))
+        self._primeiro = self._serie = self._contadores = None
+        self._quantidade = 0
+        return [pronto]
+
+
+def agrupar_series(bplbs):
+    """[(quantidade, bytes)] dos programas bplbs, com as séries num trabalho só"""
+    agrupador = AgrupadorSeries()
+    trabalhos = []
+    for bplb in bplbs:
+        trabalhos.extend(agrupador.adicionar(bplb))
+    trabalhos.extend(agrupador.terminar())
+    return trabalhos
@@ -0,0 +1,312 @@
+import os
+import select
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from . import config
+
+# O restante do núcleo (análise, conversão) funciona sem o pywin32
+try:
+    import win32print
+except ImportError:
+    win32print = None
+
+# ====================== TRANSPORTES ATÉ A IMPRESSORA ======================
+# Como os bytes chegam à impressora. A SessaoImpressora (impressora.py) cuida
+# dos limites de cada trabalho e da espera; o transporte só abre, escreve,
+# separa os trabalhos e, quando pode, diz se a impressora está parada e
+# quantos trabalhos seus (não os de outros programas) ainda estão na fila.
+# Escolhido por config.TRANSPORTE_IMPRESSORA;
+# o destino é o texto configurado como impressora.
+
+
+class Transporte(ABC):
+    """
+    Interface dos transportes. escrever e fechar são obrigatórios: um
+    transporte incompleto falha ao ser criado, não no primeiro envio.
+    estado é opcional (None: sem retorno da fila).
+    """
+
+    def __init__(self, destino):
+        self.destino = destino
+
+    def abrir(self):
+        """Prepara o envio (handle, conexão, arquivo); chamado antes de cada trabalho"""
+
+    def iniciar_trabalho(self):
+        """Começa um trabalho"""
+
+    @abstractmethod
+    def escrever(self, dados):
+        """Envia os bytes do trabalho atual"""
+
+    def terminar_trabalho(self):
+        """Fecha o trabalho atual"""
+
+    def estado(self):
+        """(parada, trabalhos deste transporte na fila), ou None se o transporte não tem esse retorno"""
+        return None
+
+    @abstractmethod
+    def fechar(self):
+        """Libera o handle/conexão"""
+
+
+# ---------------------- Spooler do Windows ----------------------
+
+def _status_parada():
+    """Bits do Status (GetPrinter nível 2) em que a impressora não imprime"""
+    status = 0
+    for nome in ('PAUSED', 'ERROR', 'PAPER_JAM', 'PAPER_OUT', 'PAPER_PROBLEM',
+                 'OFFLINE', 'DOOR_OPEN', 'USER_INTERVENTION', 'NOT_AVAILABLE'):
+        status |= getattr(win32print, 'PRINTER_STATUS_' + nome, 0)
+    return status
+
+
+class TransporteSpooler(Transporte):
+    """Spooler do Windows (pywin32): destino é o nome da impressora"""
+
+    def __init__(self, destino):
+        if win32print is None:
+            raise RuntimeError("pywin32 não está instalado! Instale com: pip install pywin32")
+        super().__init__(destino)
+        self._handle = None
+        # Ids (StartDocPrinter) dos trabalhos enviados que ainda podem estar na fila
+        self._trabalhos = set()
+        self._aberto = None
+
+    def abrir(self):
+        if self._handle is None:
+            self._handle = win32print.OpenPrinter(self.destino)
+
+    def iniciar_trabalho(self):
+        self._aberto = win32print.StartDocPrinter(self._handle, 1, ("Etiquetas BPLB", None, "RAW"))
+        win32print.StartPagePrinter(self._handle)
+
+    def escrever(self, dados):
+        win32print.WritePrinter(self._handle, dados)
+
+    def terminar_trabalho(self):
+        win32print.EndPagePrinter(self._handle)
+        win32print.EndDocPrinter(self._handle)
+        self._trabalhos.add(self._aberto)
+        self._aberto = None
+
+    def estado(self):
+        estado = win32print.GetPrinter(self._handle, 2)
+        # cJobs conta os trabalhos de todos os programas: só os nossos medem o ritmo
+        if self._trabalhos:
+            na_fila = {trabalho['JobId'] for trabalho in
+                       win32print.EnumJobs(self._handle, 0, estado['cJobs'], 1)}
+            self._trabalhos &= na_fila
+        return bool(estado['Status'] & _status_parada()), len(self._trabalhos)
+
+    def fechar(self):
+        # Trabalho interrompido (sem EndDocPrinter): o spooler o descarta
+        self._aberto = None
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            win32print.ClosePrinter(handle)
+
+
+# ---------------------- RAW TCP (porta 9100) ----------------------
+# Conexões livres de cada impressora, com a hora em que foram devolvidas.
+# Um lote pega uma, e a devolve no fim; com keep-alive, o próximo lote
+# não paga a conexão de novo.
+
+_ociosas = {}
+_trava_ociosas = threading.Lock()
+
+
+def _endereco_tcp(destino):
+    host, separador, porta = destino.rpartition(':')
+    if not separador or not porta.isdigit():
+        return destino, config.PORTA_TCP_IMPRESSORA
+    return host, int(porta)
+
+
+def _conectar(endereco):
+    conexao = socket.create_connection(endereco, timeout=config.TIMEOUT_TCP_IMPRESSORA)
+    conexao.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, 'TCP_KEEPIDLE'):
+        # Linux; no Windows ficam os tempos do sistema
+        conexao.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30)
+        conexao.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+    return conexao
+
+
+def _viva(conexao):
+    """Se a impressora não fechou a conexão (sem EOF/erro pendente)"""
+    try:
+        legivel, _, _ = select.select([conexao], [], [], 0)
+        return not legivel or conexao.recv(1, socket.MSG_PEEK) != b""
+    except OSError:
+        return False
+
+
+def _pegar_conexao(endereco):
+    """Conexão livre do pool ainda aberta, ou None"""
+    with _trava_ociosas:
+        livres = _ociosas.get(endereco, [])
+        while livres:
+            conexao, desde = livres.pop()
+            if time.monotonic() - desde < config.TEMPO_OCIOSO_TCP and _viva(conexao):
+                return conexao
+            conexao.close()
+    return None
+
+
+def _devolver_conexao(endereco, conexao):
+    with _trava_ociosas:
+        livres = _ociosas.setdefault(endereco, [])
+        if len(livres) < config.CONEXOES_TCP_POR_IMPRESSORA:
+            livres.append((conexao, time.monotonic()))
+            return
+    conexao.close()
+
+
+def fechar_conexoes_ociosas():
+    """Fecha as conexões TCP livres de todas as impressoras"""
+    with _trava_ociosas:
+        for livres in _ociosas.values():
+            for conexao, _ in livres:
+                conexao.close()
+        _ociosas.clear()
+
+
+class TransporteTCP(Transporte):
+    """
+    RAW na porta 9100 (JetDirect): destino é "host" ou "host:porta".
+    A conexão volta para o pool no fechar e fica aberta com keep-alive.
+    """
+
+    def __init__(self, destino):
+        super().__init__(destino)
+        self.endereco = _endereco_tcp(destino)
+        self._conexao = None
+        # Conexão vinda do pool e ainda sem escrita: se falhar, é só velha
+        self._do_pool = False
+
+    def abrir(self):
+        if self._conexao is None:
+            self._conexao = _pegar_conexao(self.endereco)
+            self._do_pool = self._conexao is not None
+            if self._conexao is None:
+                self._conexao = _conectar(self.endereco)
+
+    def iniciar_trabalho(self):
+        # Numa sessão a conexão fica aberta entre os trabalhos: se a impressora
+        # a fechou, conecta de novo agora em vez de escrever no vazio
+        if not _viva(self._conexao):
+            self._conexao.close()
+            self._conexao = None
+            self._conexao = _conectar(self.endereco)
+            self._do_pool = False
+
+    def escrever(self, dados):
+        try:
+            self._conexao.sendall(dados)
+        except OSError:
+            self._conexao.close()
+            self._conexao = None
+            if not self._do_pool:
+                raise
+            # A impressora fechou a conexão parada no pool: uma nova
+            self._conexao = _conectar(self.endereco)
+            self._conexao.sendall(dados)
+        self._do_pool = False
+
+    def fechar(self):
+        conexao, self._conexao = self._conexao, None
+        if conexao is not None:
+            _devolver_conexao(self.endereco, conexao)
+
+
+# ---------------------- Arquivo de dispositivo ----------------------
+
+class TransporteDispositivo(Transporte):
+    """Arquivo de dispositivo (Linux): destino é o caminho, como /dev/usb/lp0"""
+
+    def __init__(self, destino):
+        super().__init__(destino)
+        self._arquivo = None
+
+    def abrir(self):
+        if self._arquivo is None:
+            self._arquivo = open(self.destino, 'wb')
+
+    def escrever(self, dados):
+        self._arquivo.write(dados)
+
+    def terminar_trabalho(self):
+        self._arquivo.flush()
+
+    def fechar(self):
+        arquivo, self._arquivo = self._arquivo, None
+        if arquivo is not None:
+            arquivo.close()
+
+
+# ---------------------- Pasta de spool ----------------------
+
+class TransportePasta(Transporte):
+    """
+    Um arquivo .bplb por trabalho na pasta destino, para outro programa
+    (lpr, CUPS, script) levar à impressora. O arquivo é gravado como .tmp e
+    renomeado no fim: quem lê a pasta nunca pega um trabalho pela metade.
+    A fila são os .bplb deste transporte ainda na pasta.
+    """
+
+    def __init__(self, destino):
+        super().__init__(destino)
+        self._arquivo = None
+        self._caminho = None
+        self._sequencia = 0
+        self._trabalhos = set()  # nomes dos .bplb gravados
+
+    def iniciar_trabalho(self):
+        os.makedirs(self.destino, exist_ok=True)
+        self._sequencia += 1
+        nome = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{os.getpid()}_{self._sequencia:04d}.bplb"
+        self._caminho = os.path.join(self.destino, nome)
+        self._arquivo = open(self._caminho + '.tmp', 'wb')
+
+    def escrever(self, dados):
+        self._arquivo.write(dados)
+
+    def terminar_trabalho(self):
+        arquivo, self._arquivo = self._arquivo, None
+        arquivo.close()
+        os.replace(self._caminho + '.tmp', self._caminho)
+        self._trabalhos.add(os.path.basename(self._caminho))
+
+    def estado(self):
+        if self._trabalhos:
+            self._trabalhos &= set(os.listdir(self.destino))
+        return False, len(self._trabalhos)
+
+    def fechar(self):
+        # Trabalho interrompido: não deixa o .tmp para trás
+        arquivo, self._arquivo = self._arquivo, None
+        if arquivo is not None:
+            arquivo.close()
+            os.remove(self._caminho + '.tmp')
+
+
+TRANSPORTES = {
+    'spooler': TransporteSpooler,
+    'tcp': TransporteTCP,
+    'dispositivo': TransporteDispositivo,
+    'pasta': TransportePasta,
+}
+
+
+def criar_transporte(destino, tipo=None):
+    """Transporte tipo (padrão: config.TRANSPORTE_IMPRESSORA) para destino"""
+    tipo = tipo or config.TRANSPORTE_IMPRESSORA
+    if tipo not in TRANSPORTES:
+        raise ValueError(f"Transporte desconhecido: {tipo!r} (use {', '.join(TRANSPORTES)})")
+    return TRANSPORTES[tipo](destino)
@@ -2,184 +2,11 @@ import os
 import time
 import hashlib
 from datetime import datetime
-import re
+from nucleo.analise import AnalisadorPPLA
+from nucleo.normalizacao import somente_digitos
 
-class PPLAParser:
-    def __init__(self):
-        self.etiquetas = []  # Lista para armazenar múltiplas etiquetas
-        self.etiqueta_atual = None
-        self.proximo_valor_para = None
-    
-    def parse_file(self, file_path):
-        """Analisa um arquivo PPLA completo, identificando múltiplas etiquetas"""
-        if not os.path.exists(file_path):
-            return False
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Dividir o conteúdo em etiquetas usando os delimitadores
-            # O padrão: cada etiqueta começa com <xpml><page...> e termina com Q0001\nE
-            # Mas também pode ter múltiplas etiquetas em sequência
-            
-            # Primeiro, vamos dividir por possíveis separadores de etiqueta
-            # Podemos usar a tag <xpml><page quantity='0' como indicador de início de etiqueta
-            padrao_etiqueta = r'(<xpml><page quantity=\'0\'[^>]*>.*?Q0001\s*E\s*<xpml></page></xpml><xpml><end/></xpml>)'
-            
-            # Encontrar todas as etiquetas no conteúdo
-            etiquetas_raw = re.findall(padrao_etiqueta, content, re.DOTALL)
-            
-            if not etiquetas_raw:
-                # Tentar outro padrão se o primeiro não encontrar
-                padrao_alternativo = r'(n.*?Q0001\s*E\s*)'
-                etiquetas_raw = re.findall(padrao_alternativo, content, re.DOTALL)
-            
-            self.etiquetas = []
-            
-            for i, etiqueta_raw in enumerate(etiquetas_raw):
-                etiqueta_data = self._processar_etiqueta(etiqueta_raw, i+1)
-                if etiqueta_data:
-                    self.etiquetas.append(etiqueta_data)
-            
-            return len(self.etiquetas) > 0
-            
-        except Exception as e:
-            print(f"Erro ao analisar arquivo: {e}")
-            return False
-    
-    def _processar_etiqueta(self, etiqueta_raw, numero_etiqueta):
-        """Processa uma única etiqueta raw e retorna seus dados"""
-        # Limpar conteúdo - remover tags XML
-        content = re.sub(r'<[^>]*>', '', etiqueta_raw)
-        
-        # Remover caracteres de controle (mantendo quebras de linha)
-        content = re.sub(r'[\x00-\x09\x0B-\x1F\x7F]', ' ', content)
-        
-        # Dividir por linhas
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        
-        # Inicializar dados para esta etiqueta
-        data = {
-            'numero': numero_etiqueta,
-            'tipo': '',
-            'op': '',
-            'referencia': '',
-            'descricao': '',
-            'faccao': '',
-            'cidade': '',
-            'regiao': '',
-            'fracao': '',
-            'codigos': [],
-            'textos': [],
-            'comandos': {
-                'direcao': '',
-                'alinhamento': '',
-                'quantidade': '',
-                'final': False
-            },
-            'posicoes_texto': [],
-            'outros_comandos': []
-        }
-        
-        self.proximo_valor_para = None
-        
-        # Primeiro, coletar todos os textos na ordem
-        textos_coletados = []
-        for line in lines:
-            # Buscar comandos de texto que começam com "19"
-            if line.startswith('19') and len(line) >= 15:
-                # Extrair texto (começa na posição 15, índice 14)
-                texto = line[15:].strip()
-                if texto:
-                    textos_coletados.append(texto)
-            
-            # Buscar por códigos específicos
-            elif line.startswith('1e') and len(line) > 2:
-                codigo = line[2:].strip()
-                if codigo:
-                    data['codigos'].append(codigo)
-            
-            # Buscar comandos de configuração
-            else:
-                self._processar_comando(line, data)
-        
-        # Processar textos na ordem correta
-        self._processar_textos_sequencial(textos_coletados, data)
-        
-        return data
-    
-    def _processar_comando(self, linha, data):
-        """Processa comandos de configuração da impressora"""
-        linha = linha.strip()
-        
-        # Comando D - Direção do texto
-        if linha.startswith('D') and len(linha) > 1 and linha[1:].isdigit():
-            data['comandos']['direcao'] = linha[1:]
-        
-        # Comando A - Alinhamento
-        elif linha.startswith('A') and len(linha) > 1 and linha[1:].isdigit():
-            data['comandos']['alinhamento'] = linha[1:]
-        
-        # Comando Q - Quantidade
-        elif linha.startswith('Q') and len(linha) > 1:
-            data['comandos']['quantidade'] = linha[1:]
-        
-        # Comando E - Final
-        elif linha == 'E':
-            data['comandos']['final'] = True
-        
-        # Outros comandos importantes
-        elif linha.startswith(('M', 'O', 'V', 'f', 'L', 'H', 'S', 'P', 'n')):
-            if linha not in data['outros_comandos']:
-                data['outros_comandos'].append(linha)
-    
-    def _processar_textos_sequencial(self, textos, data):
-        """Processa os textos na ordem sequencial correta"""
-        i = 0
-        while i < len(textos):
-            texto = textos[i]
-            data['textos'].append(texto)
-    
-            # OP
-            if texto == 'OP:' and i + 1 < len(textos):
-                data['op'] = textos[i + 3]
-    
-            # Referência
-            elif texto == 'Ref:' and i + 1 < len(textos):
-                data['referencia'] = textos[i + 1]
-    
-            # Facção
-            elif texto in ('Faccao:', 'Facção:') and i + 1 < len(textos):
-                data['faccao'] = textos[i + 1]
-    
-            # Cidade
-            elif texto == 'Cidade:' and i + 1 < len(textos):
-                data['cidade'] = textos[i + 1]
-    
-            # Região
-            elif texto in ('Regiao:', 'Região:') and i + 1 < len(textos):
-                data['regiao'] = textos[i + 1]
-    
-            # Tipo
-            elif 'CONSERTO' in texto:
-                data['tipo'] = 'CONSERTO'
-    
-            # Descrição
-            elif any(p in texto for p in ('CAMISETA', 'BLUSA', 'CALCA')):
-                data['descricao'] = texto
-    
-            # Fração
-            elif re.match(r'^\d+/\d+$', texto):
-                data['fracao'] = texto
-    
-            # Códigos numéricos longos
-            elif texto.isdigit() and len(texto) >= 8:
-                if texto not in (data['op'], data['referencia']):
-                    data['codigos'].append(texto)
-    
-            i += 1
-    
+class PPLAParser(AnalisadorPPLA):
+    """Analisador do núcleo com a etiqueta formatada em caixa de texto"""
     
     def formatar_etiqueta(self, etiqueta_data=None):
         """Formata uma etiqueta específica para exibição"""
@@ -208,8 +35,8 @@ class PPLAParser:
         linhas.append(meio)
         
         # OP e REF
-        op = ''.join(filter(str.isdigit, etiqueta_data['op']))[:9]
-        ref = ''.join(filter(str.isdigit, etiqueta_data['referencia']))[:9]
+        op = somente_digitos(etiqueta_data['op'])[:9]
+        ref = somente_digitos(etiqueta_data['referencia'])[:9]
         linhas.append(linha(f"OP: {op}".ljust(21) + f"REF: {ref}"))
         
         linhas.append(linha())
@@ -297,7 +124,7 @@ class PPLAParser:
             
             # Comandos de impressão
             com = etiqueta['comandos']
-            if any(com.values()):
+            if any(com.como_dict().values()):
                 print(f"\n⚙️  COMANDOS DE IMPRESSÃO:")
                 if com['direcao']:
                     print(f"   • Direção: D{com['direcao']}")